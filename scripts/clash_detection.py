@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Clash detection of a volume model of blocks, and scaling of the sweep and
+prune broad phase with the number of bounding boxes. The largest size is
+only timed outside of the CI (CI environment variable unset).
+"""
+
+import itertools
+import os
+import random
+import time
+
+import numpy as npy
+import volmdlr as vm
+import volmdlr.core
+import volmdlr.primitives3d as p3d
+
+random.seed(0)
+blocks = []
+for i in range(30):
+    frame = vm.Frame3D(vm.Point3D(random.uniform(0, 4), random.uniform(0, 4),
+                                  random.uniform(0, 1)),
+                       0.5 * vm.X3D, 0.5 * vm.Y3D, 0.5 * vm.Z3D)
+    blocks.append(p3d.Block(frame, name='block {}'.format(i)))
+model = volmdlr.core.VolumeModel(blocks)
+
+report = model.clash_report(narrow_phase='distance', resolution=0.1)
+print(report.summary())
+
+# The broad phase finds the same pairs as comparing all the boxes
+pairs = [(i, j) for i, j in itertools.combinations(range(len(blocks)), 2)
+         if blocks[i].bounding_box.bbox_intersection(blocks[j].bounding_box)]
+assert set(pairs) <= set(report.candidate_pairs)
+
+numbers_boxes = [1000, 10000]
+if not os.environ.get('CI'):
+    numbers_boxes.append(100000)
+
+random_generator = npy.random.default_rng(0)
+for number_boxes in numbers_boxes:
+    # Boxes of constant size in a volume growing with their number
+    side = number_boxes ** (1 / 3)
+    mins = random_generator.uniform(0, side, (number_boxes, 3))
+    boxes = volmdlr.core.BoundingBoxArray(
+        npy.column_stack((mins[:, 0], mins[:, 0] + 0.5, mins[:, 1],
+                          mins[:, 1] + 0.5, mins[:, 2], mins[:, 2] + 0.5)))
+    start = time.perf_counter()
+    candidate_pairs = boxes.sweep_and_prune()
+    duration = time.perf_counter() - start
+    print('{:7} boxes: {:7} pairs in {:.4f} s'.format(
+        number_boxes, len(candidate_pairs), duration))
+
+    if number_boxes == 1000:
+        bounding_boxes = boxes.to_bounding_boxes()
+        start = time.perf_counter()
+        brute_force_pairs = [
+            (i, j) for i, j in itertools.combinations(range(number_boxes), 2)
+            if bounding_boxes[i].bbox_intersection(bounding_boxes[j])]
+        print('{:7} boxes: {:7} pairs in {:.4f} s comparing all the '
+              'pairs'.format(number_boxes, len(brute_force_pairs),
+                             time.perf_counter() - start))
+        assert set(brute_force_pairs) <= set(map(tuple,
+                                                 candidate_pairs.tolist()))
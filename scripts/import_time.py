@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the import time of volmdlr modules. Each module is imported in a
+fresh interpreter, and the heavy optional dependencies must not be imported
+until plotting, optimization or graph features are used.
+"""
+
+import subprocess
+import sys
+
+modules = ['volmdlr', 'volmdlr.edges', 'volmdlr.wires', 'volmdlr.faces',
+           'volmdlr.primitives3d', 'volmdlr.step']
+lazy_modules = ['matplotlib.pyplot', 'mpl_toolkits.mplot3d', 'scipy.optimize',
+                'scipy.spatial', 'networkx', 'plot_data']
+repeats = 3
+# Generous bound on the import time, in seconds
+max_import_time = 5.
+
+probe = '''
+import sys, time
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+print(duration)
+print(','.join(m for m in {lazy_modules!r} if m in sys.modules))
+'''
+
+for module in modules:
+    durations = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, '-c',
+             probe.format(module=module, lazy_modules=lazy_modules)],
+            check=True, capture_output=True, text=True).stdout.splitlines()
+        durations.append(float(output[0]))
+        imported = [m for m in output[1:2] and output[1].split(',') if m]
+        assert not imported, '{} imports {}'.format(module, ', '.join(imported))
+    duration = min(durations)
+    print('import {:24} {:.3f} s'.format(module, duration))
+    assert duration < max_import_time
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the memory used by each vector or point, measured with
+tracemalloc on a large list of objects
+"""
+
+import tracemalloc
+import volmdlr as vm
+
+number_points = 100000
+
+
+def memory_per_object(factory):
+    tracemalloc.start()
+    objects = [factory(i) for i in range(number_points)]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return memory / number_points
+
+
+factories = {'Point2D': lambda i: vm.Point2D(0.5*i, 0.25*i),
+             'Vector2D': lambda i: vm.Vector2D(0.5*i, 0.25*i),
+             'Point3D': lambda i: vm.Point3D(0.5*i, 0.25*i, 0.125*i),
+             'Vector3D': lambda i: vm.Vector3D(0.5*i, 0.25*i, 0.125*i),
+             'tuple of 3 floats': lambda i: (0.5*i, 0.25*i, 0.125*i)}
+
+for name, factory in factories.items():
+    print('{:20} {:6.1f} bytes'.format(name, memory_per_object(factory)))
+
+points = vm.Points3D([(0.5*i, 0.25*i, 0.125*i) for i in range(number_points)])
+print('{:20} {:6.1f} bytes'.format('Points3D row', points.array.nbytes / number_points))
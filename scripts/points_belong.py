@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the batch classification of points against closed shells by ray
+parity on their triangulation, compared to calling point_belongs per point
+"""
+
+import math
+import random
+import time
+
+import numpy as npy
+
+import volmdlr as vm
+import volmdlr.wires as vmw
+import volmdlr.primitives3d as p3d
+
+number_points = 5000
+number_reference_points = 200
+
+
+def star_extrusion(number_sides):
+    points = []
+    for i in range(number_sides):
+        angle = 2 * math.pi * i / number_sides
+        radius = 1 + 0.3 * math.cos(7 * angle)
+        points.append(vm.Point2D(radius * math.cos(angle),
+                                 radius * math.sin(angle)))
+    return vmw.ClosedPolygon2D(points), p3d.ExtrudedProfile(
+        vm.O3D, vm.X3D, vm.Y3D, vmw.ClosedPolygon2D(points), [],
+        vm.Z3D * 0.5)
+
+
+def random_point():
+    return vm.Point3D(random.uniform(-1.4, 1.4), random.uniform(-1.4, 1.4),
+                      random.uniform(-0.1, 0.6))
+
+
+for number_sides in [100, 1000]:
+    random.seed(0)
+    polygon, shell = star_extrusion(number_sides)
+    points = [random_point() for _ in range(number_points)]
+    expected = [0 <= point.z <= 0.5
+                and polygon.point_belongs(vm.Point2D(point.x, point.y))
+                for point in points]
+
+    start = time.perf_counter()
+    shell.classification_mesh()
+    mesh_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    inside = shell.points_belong(points)
+    batch_duration = time.perf_counter() - start
+    assert inside.tolist() == expected
+
+    start = time.perf_counter()
+    reference = [shell.point_belongs(point)
+                 for point in points[:number_reference_points]]
+    reference_duration = (time.perf_counter() - start) \
+        / number_reference_points
+    assert reference == expected[:number_reference_points]
+
+    print('{:5} faces: mesh in {:.3f} s, points_belong {:.2f} us per point, '
+          'point_belongs {:.2f} us per point'.format(
+              len(shell.faces), mesh_duration,
+              1e6 * batch_duration / number_points,
+              1e6 * reference_duration))
+
+# Curved faces are approximated by their triangles: points farther from the
+# surface than the approximation are checked against the analytic cylinder
+center = npy.array([0.1, 0.2, 0.3])
+axis = npy.array([1., 1., 0.]) / 2 ** 0.5
+radius, length = 0.5, 1.
+cylinder = p3d.Cylinder(vm.Point3D(*center), vm.Vector3D(*axis), radius,
+                        length)
+random_generator = npy.random.default_rng(0)
+points = random_generator.uniform(-1, 1.4, (number_points, 3))
+heights = (points - center) @ axis
+radiuses = npy.linalg.norm(points - center - npy.outer(heights, axis),
+                           axis=1)
+expected = (npy.abs(heights) <= 0.5 * length) & (radiuses <= radius)
+near_caps = (npy.abs(npy.abs(heights) - 0.5 * length) < 0.01) \
+    & (radiuses < radius + 0.01)
+near_side = (npy.abs(radiuses - radius) < 0.01) \
+    & (npy.abs(heights) < 0.5 * length + 0.01)
+far = ~(near_caps | near_side)
+
+start = time.perf_counter()
+inside = cylinder.points_belong(points)
+duration = time.perf_counter() - start
+assert npy.array_equal(inside[far], expected[far])
+print('cylinder: points_belong {:.2f} us per point, {} points near the '
+      'surface not checked'.format(1e6 * duration / number_points,
+                                   number_points - far.sum()))
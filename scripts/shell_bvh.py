@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the point membership and segment intersections of shells with
+an increasing number of faces, visited through the bounding volume hierarchy
+of their faces
+"""
+
+import math
+import random
+import time
+
+import volmdlr as vm
+import volmdlr.edges as vme
+import volmdlr.wires as vmw
+import volmdlr.primitives3d as p3d
+
+number_points = 200
+
+
+def star_extrusion(number_sides):
+    points = []
+    for i in range(number_sides):
+        angle = 2 * math.pi * i / number_sides
+        radius = 1 + 0.3 * math.cos(7 * angle)
+        points.append(vm.Point2D(radius * math.cos(angle),
+                                 radius * math.sin(angle)))
+    return vmw.ClosedPolygon2D(points), p3d.ExtrudedProfile(
+        vm.O3D, vm.X3D, vm.Y3D, vmw.ClosedPolygon2D(points), [],
+        vm.Z3D * 0.5)
+
+
+def random_point():
+    return vm.Point3D(random.uniform(-1.3, 1.3), random.uniform(-1.3, 1.3),
+                      random.uniform(0, 0.5))
+
+
+for number_sides in [100, 1000, 4000]:
+    random.seed(0)
+    polygon, shell = star_extrusion(number_sides)
+    points = [random_point() for _ in range(number_points)]
+
+    start = time.perf_counter()
+    shell.faces_bvh
+    build_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    inside = [shell.point_belongs(point) for point in points]
+    belongs_duration = (time.perf_counter() - start) / number_points
+    assert inside == [polygon.point_belongs(vm.Point2D(point.x, point.y))
+                      for point in points]
+
+    segments = [vme.LineSegment3D(random_point(), random_point())
+                for _ in range(number_points)]
+    start = time.perf_counter()
+    for segment in segments:
+        shell.linesegment_intersections(segment)
+    segment_duration = (time.perf_counter() - start) / number_points
+
+    print('{:5} faces: BVH built in {:.3f} s, point_belongs {:.2f} ms, '
+          'linesegment_intersections {:.2f} ms'.format(
+              len(shell.faces), build_duration, 1000 * belongs_duration,
+              1000 * segment_duration))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Box, radius and nearest queries on the primitives of a volume model through
+its spatial index, compared to scanning all the primitives
+"""
+
+import random
+import time
+
+import volmdlr as vm
+import volmdlr.core
+import volmdlr.primitives3d as p3d
+
+number_primitives = 1000
+number_queries = 200
+
+random.seed(0)
+
+
+def random_point(size=20):
+    return vm.Point3D(random.uniform(0, size), random.uniform(0, size),
+                      random.uniform(0, size))
+
+
+def random_block(i):
+    frame = vm.Frame3D(random_point(), 0.5 * vm.X3D, 0.3 * vm.Y3D,
+                       0.4 * vm.Z3D)
+    return p3d.Block(frame, name='block {}'.format(i))
+
+
+model = volmdlr.core.VolumeModel([random_block(i)
+                                  for i in range(number_primitives)])
+start = time.perf_counter()
+model.spatial_index
+print('spatial index of {} primitives built in {:.4f} s'.format(
+    number_primitives, time.perf_counter() - start))
+
+boxes = []
+for _ in range(number_queries):
+    point = random_point()
+    boxes.append(volmdlr.core.BoundingBox(point.x, point.x + 2, point.y,
+                                          point.y + 2, point.z, point.z + 2))
+points = [random_point() for _ in range(number_queries)]
+
+
+def scan_box(bbox):
+    return [primitive for primitive in model.primitives
+            if primitive.bounding_box.xmin <= bbox.xmax
+            and bbox.xmin <= primitive.bounding_box.xmax
+            and primitive.bounding_box.ymin <= bbox.ymax
+            and bbox.ymin <= primitive.bounding_box.ymax
+            and primitive.bounding_box.zmin <= bbox.zmax
+            and bbox.zmin <= primitive.bounding_box.zmax]
+
+
+def timed(function, arguments):
+    start = time.perf_counter()
+    results = [function(argument) for argument in arguments]
+    return results, (time.perf_counter() - start) / len(arguments)
+
+
+indexed, indexed_duration = timed(model.primitives_in_box, boxes)
+scanned, scanned_duration = timed(scan_box, boxes)
+assert all({id(p) for p in r1} == {id(p) for p in r2}
+           for r1, r2 in zip(indexed, scanned))
+print('box query:     {:.3f} ms, scanning {:.3f} ms'.format(
+    1000 * indexed_duration, 1000 * scanned_duration))
+
+_, radius_duration = timed(lambda point: model.primitives_in_radius(point, 2.),
+                           points)
+print('radius query:  {:.3f} ms'.format(1000 * radius_duration))
+_, nearest_duration = timed(lambda point: model.nearest_primitives(point, 5),
+                            points)
+print('5 nearest:     {:.3f} ms'.format(1000 * nearest_duration))
+
+# Incremental updates
+for i in range(100):
+    model.add_primitive(random_block(number_primitives + i))
+moved = model.primitives[:100]
+for primitive in moved:
+    primitive.translation(vm.Vector3D(random.uniform(-5, 5),
+                                      random.uniform(-5, 5), 0), copy=False)
+model.update_spatial_index(moved)
+indexed, _ = timed(model.primitives_in_box, boxes)
+scanned, _ = timed(scan_box, boxes)
+assert all({id(p) for p in r1} == {id(p) for p in r2}
+           for r1, r2 in zip(indexed, scanned))
+print('box queries consistent after adding and moving primitives')
+
+# Primitives replaced or removed in the primitives list
+model.primitives[0] = random_block(2 * number_primitives)
+del model.primitives[1]
+model.primitives.append(random_block(2 * number_primitives + 1))
+indexed, _ = timed(model.primitives_in_box, boxes)
+scanned, _ = timed(scan_box, boxes)
+assert all({id(p) for p in r1} == {id(p) for p in r2}
+           for r1, r2 in zip(indexed, scanned))
+print('box queries consistent after replacing and removing primitives')
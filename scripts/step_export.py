@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Round trip of a volume model through a STEP export with deduplication: every
+referenced id is defined, parts do not share topology, the file is read back
+with the same number of shells, and the export in a pool of processes is the
+same as the sequential one
+"""
+
+import re
+
+import volmdlr as vm
+import volmdlr.core
+import volmdlr.primitives3d as p3d
+import volmdlr.step
+
+record_pattern = re.compile(r"^#(\d+) ?= ?([A-Z0-9_]*)(.*);$", re.M)
+reference_pattern = re.compile(r"'[^']*'|#(\d+)")
+
+# Touching blocks share vertices in space, but not in the file
+blocks = [p3d.Block(vm.Frame3D(vm.Point3D(0.1 * i, 0, 0), 0.1 * vm.X3D,
+                               0.1 * vm.Y3D, 0.1 * vm.Z3D),
+                    name='block {}'.format(i))
+          for i in range(3)]
+cylinder = p3d.Cylinder(vm.Point3D(0, 0.2, 0), vm.Z3D, 0.05, 0.1,
+                        name='cylinder')
+model = volmdlr.core.VolumeModel(blocks + [cylinder])
+
+content = model.to_step()
+records = {}
+for match in record_pattern.finditer(content):
+    records[int(match.group(1))] = (
+        match.group(2),
+        [int(i) for i in reference_pattern.findall(match.group(3)) if i])
+
+undefined = {i for _, references in records.values() for i in references
+             if i not in records}
+assert not undefined, 'undefined ids: {}'.format(sorted(undefined))
+
+
+def vertices(record_id, visited):
+    if record_id in visited:
+        return set()
+    visited.add(record_id)
+    entity, references = records[record_id]
+    if entity == 'VERTEX_POINT':
+        return {record_id}
+    return set().union(*[vertices(i, visited) for i in references])
+
+
+solids = [i for i, (entity, _) in records.items()
+          if entity == 'MANIFOLD_SOLID_BREP']
+assert len(solids) == len(model.primitives)
+solids_vertices = [vertices(i, set()) for i in solids]
+for i, vertices1 in enumerate(solids_vertices):
+    for vertices2 in solids_vertices[i + 1:]:
+        assert not vertices1 & vertices2, 'vertices shared between solids'
+
+with open('step_export.step', 'w') as file:
+    file.write(content)
+step = volmdlr.step.Step('step_export.step')
+imported_model = step.to_volume_model()
+assert len(imported_model.primitives) == len(model.primitives)
+print('{} records, {} shells read back'.format(
+    len(records), len(imported_model.primitives)))
+
+# Export in a pool of processes gives the same file, names included
+model.primitives[-1].name = 'Part #12'
+timestamp_pattern = re.compile(r"FILE_NAME\('[^']*','[^']*'")
+serial_content = timestamp_pattern.sub('FILE_NAME', model.to_step())
+parallel_content = timestamp_pattern.sub('FILE_NAME',
+                                         model.to_step(processes=2))
+assert "PRODUCT('Part #12','Part #12'" in parallel_content
+assert parallel_content == serial_content
+print('same export with 2 processes')
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Duration and peak memory of the parsing of a STEP file by the line reader
+and by the streaming reader (Step streaming option), which parses the records
+of a chunk with one regular expression and pauses the garbage collector. Only
+the streaming reader reads files with several records per line.
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import volmdlr as vm
+import volmdlr.core
+import volmdlr.primitives3d as p3d
+import volmdlr.step
+
+number_parts = 200
+repeats = 5
+
+primitives = []
+for i in range(number_parts):
+    primitives.append(p3d.Block(
+        vm.Frame3D(vm.Point3D(i, 0, 0), 0.5 * vm.X3D, 0.5 * vm.Y3D,
+                   0.5 * vm.Z3D), name='block {}'.format(i)))
+    primitives.append(p3d.Cylinder(vm.Point3D(i, 2, 0), vm.Z3D, 0.2, 0.5,
+                                   name='cylinder {}'.format(i)))
+
+with tempfile.TemporaryDirectory() as directory:
+    filename = os.path.join(directory, 'parts.step')
+    with open(filename, 'w') as file:
+        volmdlr.core.VolumeModel(primitives).to_step_stream(
+            file, deduplicate=False)
+    size = os.path.getsize(filename)
+
+    step = volmdlr.step.Step.__new__(volmdlr.step.Step)
+    step.stepfile = filename
+    readers = {'lines': step.read_functions,
+               'streaming': step.read_functions_streaming}
+
+    # Readers are alternated, so that both see the same machine load
+    durations = {name: [] for name in readers}
+    results = {}
+    for _ in range(repeats):
+        for name, reader in readers.items():
+            start = time.perf_counter()
+            results[name] = reader()
+            durations[name].append(time.perf_counter() - start)
+    functions, connections = results['lines']
+    streaming_functions, streaming_connections = results['streaming']
+    assert connections == streaming_connections
+    assert {i: (f.name, f.arg) for i, f in functions.items()} \
+        == {i: (f.name, f.arg) for i, f in streaming_functions.items()}
+
+    # All the records on a single line
+    with open(filename) as file:
+        content = file.read()
+    with open(filename, 'w') as file:
+        file.write(content.replace(';\n', ';'))
+    streaming_functions, _ = step.read_functions_streaming()
+    assert len(streaming_functions) == len(functions)
+    assert not step.read_functions()[0]
+    with open(filename, 'w') as file:
+        file.write(content)
+
+    peak_memories = {}
+    for name, reader in readers.items():
+        tracemalloc.start()
+        reader()
+        peak_memories[name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+print('{:.1f} MB, {} entities'.format(size / 1e6, len(functions)))
+for name in readers:
+    duration = min(durations[name])
+    print('{:9}: best of {} {:.3f} s ({:.1f} MB/s), peak memory {:.1f} MB'
+          .format(name, repeats, duration, size / duration / 1e6,
+                  peak_memories[name] / 1e6))
+print('streaming speedup: {:.2f}'.format(min(durations['lines'])
+                                         / min(durations['streaming'])))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the scaling with the number of threads of the batch kernels of
+core_compiled, which release the GIL, split by volmdlr.parallel.map_batches
+"""
+
+import math
+import time
+
+import numpy as npy
+import volmdlr as vm
+import volmdlr.parallel
+from volmdlr.core_compiled import (polygon_points_belong,
+                                   LineSegment2DPointsDistance,
+                                   vectors3D_rotation,
+                                   matrix_vectors_multiplication3)
+
+number_points = 400000
+repeats = 3
+
+random = npy.random.default_rng(0)
+points_2d = random.uniform(-1, 1, (number_points, 2))
+points_3d = random.uniform(-1, 1, (number_points, 3))
+angles = npy.linspace(0, 2*math.pi, 200, endpoint=False)
+polygon = npy.column_stack(((0.8 + 0.1*npy.cos(7*angles))*npy.cos(angles),
+                            (0.8 + 0.1*npy.cos(7*angles))*npy.sin(angles)))
+axis = vm.Vector3D(1, 1, 1)
+axis.normalize()
+matrix = random.uniform(-1, 1, (3, 3))
+
+kernels = {
+    'polygon_points_belong': (polygon_points_belong, points_2d, (polygon,)),
+    'LineSegment2DPointsDistance': (
+        lambda batch: LineSegment2DPointsDistance([(0., 0.), (1., 0.5)],
+                                                  batch),
+        points_2d, ()),
+    'vectors3D_rotation': (vectors3D_rotation, points_3d,
+                           (vm.O3D, axis, 0.3)),
+    'matrix_vectors_multiplication3': (
+        lambda batch: matrix_vectors_multiplication3(matrix, batch),
+        points_3d, ())}
+
+max_threads = volmdlr.parallel.default_threads()
+threads_list = sorted({1, 2, 4, 8, max_threads} - {n for n in (2, 4, 8)
+                                                   if n > max(max_threads, 2)})
+print('{} cores available'.format(max_threads))
+
+for name, (function, array, args) in kernels.items():
+    reference = function(array, *args)
+    durations = {}
+    for threads in threads_list:
+        best = math.inf
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = volmdlr.parallel.map_batches(function, array, *args,
+                                                  threads=threads)
+            best = min(best, time.perf_counter() - start)
+        if isinstance(reference, tuple):
+            assert all(npy.array_equal(r, a)
+                       for r, a in zip(reference, result))
+        else:
+            assert npy.array_equal(reference, result)
+        durations[threads] = best
+    print(name)
+    for threads, duration in durations.items():
+        print('  {:2} threads {:8.4f} s  speedup {:4.2f}'.format(
+            threads, duration, durations[1] / duration))
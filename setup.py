@@ -126,4 +126,5 @@ setup(name='volmdlr',
                         'triangle',
                         'plot_data>=0.4.5'],
       classifiers=['Topic :: Scientific/Engineering','Development Status :: 3 - Alpha'],
+      entry_points={'console_scripts': ['volmdlr-convert=volmdlr.convert:main']},
       ext_modules = cythonize(["volmdlr/core_compiled.pyx"]))
@@ -1,13 +1,12 @@
 # -*- coding: utf-8 -*-
 
 import math
-import pkg_resources
-__version__ = pkg_resources.require("volmdlr")[0].version
 
 from volmdlr.core_compiled import (Vector2D, Vector3D, Point2D, Point3D,
                             O2D, X2D, Y2D, OXY,
                             Basis2D, Basis3D, Frame2D, Frame3D,
-                            O3D, X3D, Y3D, Z3D, Matrix22, Matrix33
+                            O3D, X3D, Y3D, Z3D, Matrix22, Matrix33,
+                            Points2D, Points3D
                             )
 
 TWO_PI = 2*math.pi
@@ -18,4 +17,19 @@ ZXY = Basis3D(Z3D, X3D, Y3D)
 
 OXYZ = Frame3D(O3D, X3D, Y3D, Z3D)
 OYZX = Frame3D(O3D, Y3D, Z3D, X3D)
-OZXY = Frame3D(O3D, Z3D, X3D, Y3D)
\ No newline at end of file
+OZXY = Frame3D(O3D, Z3D, X3D, Y3D)
+
+def __getattr__(name):
+    # The version is looked up at first use: the package metadata is slow to
+    # load at import
+    if name != '__version__':
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+    try:
+        from importlib.metadata import version
+        __version__ = version('volmdlr')
+    except ImportError:
+        import pkg_resources
+        __version__ = pkg_resources.require('volmdlr')[0].version
+    globals()['__version__'] = __version__
+    return __version__
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch conversion of STEP files, in a pool of processes. Installed as the
+volmdlr-convert command.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import volmdlr.core
+import volmdlr.step
+
+STEP_EXTENSIONS = ('.step', '.stp')
+# Output formats and the extensions of the converted files
+CONVERSION_FORMATS = {'html': '.html',
+                      'babylon': '.babylon.json',
+                      'step': '.step'}
+
+
+def step_files(paths):
+    """
+    STEP files from a list of files, directories (searched recursively) and
+    glob patterns, sorted and without duplicates
+    """
+    filenames = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, files in os.walk(path):
+                for filename in files:
+                    if filename.lower().endswith(STEP_EXTENSIONS):
+                        filenames.add(os.path.join(directory, filename))
+        elif os.path.isfile(path):
+            filenames.add(path)
+        else:
+            filenames.update(filename for filename
+                             in glob.glob(path, recursive=True)
+                             if os.path.isfile(filename))
+    return sorted(filenames)
+
+
+def output_paths(filenames, output_directory):
+    """
+    Paths of the converted files, without their extension: the paths of the
+    STEP files relative to their common directory, in the output directory
+
+    :returns: A dict of the output paths by STEP file
+    """
+    if not filenames:
+        return {}
+    absolute_paths = [os.path.splitext(os.path.abspath(filename))[0]
+                      for filename in filenames]
+    root = os.path.commonpath([os.path.dirname(path)
+                               for path in absolute_paths])
+    return {filename: os.path.join(output_directory,
+                                   os.path.relpath(path, root))
+            for filename, path in zip(filenames, absolute_paths)}
+
+
+def convert_step_file(filename, output_path, formats, streaming=False,
+                      use_cdn=True):
+    """
+    Convert a STEP file in the given formats. Errors are caught and
+    reported in the result, so that a failing file does not stop a batch.
+
+    :param output_path: The path of the converted files, without their
+        extension, see output_paths
+    :returns: A dict with the input file, the written files, the number of
+        shells, the duration in seconds and the error if any
+    """
+    result = {'file': filename, 'outputs': [], 'shells': 0,
+              'duration': 0., 'error': None}
+    start = time.perf_counter()
+    try:
+        outputs = [output_path + CONVERSION_FORMATS[conversion_format]
+                   for conversion_format in formats]
+        for output in outputs:
+            if os.path.exists(output) and os.path.samefile(output, filename):
+                raise ValueError('Converting {} would overwrite it'.format(
+                    filename))
+        model = volmdlr.step.Step(filename,
+                                  streaming=streaming).to_volume_model()
+        result['shells'] = len(model.primitives)
+        if not model.primitives:
+            raise ValueError('No shell found in {}'.format(filename))
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)),
+                    exist_ok=True)
+
+        babylon_data = None
+        for conversion_format, output in zip(formats, outputs):
+            if conversion_format == 'step':
+                with open(output, 'w') as file:
+                    model.to_step_stream(file, filename=output)
+            else:
+                if babylon_data is None:
+                    babylon_data = model.babylon_data()
+                with open(output, 'w') as file:
+                    if conversion_format == 'html':
+                        file.write(volmdlr.core.VolumeModel
+                                   .babylonjs_script_from_babylon_data(
+                                       babylon_data, use_cdn=use_cdn))
+                    else:
+                        json.dump(babylon_data, file)
+            result['outputs'].append(output)
+    except Exception:
+        result['error'] = traceback.format_exc()
+    result['duration'] = time.perf_counter() - start
+    return result
+
+
+def convert_step_files(filenames, output_directory, formats, processes=1,
+                       streaming=False, use_cdn=True):
+    """
+    Convert STEP files in a pool of processes. Results (see
+    convert_step_file) are yielded as files are converted. Files whose
+    converted files would have the same path, such as part.step and
+    part.stp, are reported as failures and not converted.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    paths = output_paths(filenames, output_directory)
+    files_by_path = {}
+    for filename, path in paths.items():
+        files_by_path.setdefault(os.path.normcase(os.path.abspath(path)),
+                                 []).append(filename)
+    converted_files = []
+    for filename in filenames:
+        same_path_files = files_by_path[os.path.normcase(
+            os.path.abspath(paths[filename]))]
+        if len(same_path_files) > 1:
+            yield {'file': filename, 'outputs': [], 'shells': 0,
+                   'duration': 0.,
+                   'error': 'Converted files of {} would have the same '
+                            'path'.format(', '.join(same_path_files))}
+        else:
+            converted_files.append(filename)
+
+    if processes <= 1:
+        for filename in converted_files:
+            yield convert_step_file(filename, paths[filename], formats,
+                                    streaming=streaming, use_cdn=use_cdn)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(convert_step_file, filename,
+                                   paths[filename], formats,
+                                   streaming=streaming, use_cdn=use_cdn)
+                   for filename in converted_files]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='volmdlr-convert',
+        description='Convert STEP files with volmdlr')
+    parser.add_argument('inputs', nargs='+',
+                        help='STEP files, directories or glob patterns')
+    parser.add_argument('-o', '--output-directory', default='.',
+                        help='Directory of the converted files, in which '
+                             'the paths of the inputs relative to their '
+                             'common directory are kept')
+    parser.add_argument('-f', '--format', dest='formats', action='append',
+                        choices=sorted(CONVERSION_FORMATS),
+                        help='Output format, can be repeated (default: html)')
+    parser.add_argument('-j', '--processes', type=int,
+                        default=os.cpu_count() or 1,
+                        help='Number of worker processes')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Read the STEP files by binary chunks')
+    parser.add_argument('--embedded', action='store_true',
+                        help='Embed babylonjs in HTML pages instead of '
+                             'using its CDN')
+    parser.add_argument('--report',
+                        help='Write the results of the conversion in this '
+                             'JSON file')
+    arguments = parser.parse_args(argv)
+
+    filenames = step_files(arguments.inputs)
+    if not filenames:
+        print('No STEP file found', file=sys.stderr)
+        return 2
+    formats = arguments.formats or ['html']
+
+    results = []
+    start = time.perf_counter()
+    for result in convert_step_files(filenames, arguments.output_directory,
+                                     formats,
+                                     processes=arguments.processes,
+                                     streaming=arguments.streaming,
+                                     use_cdn=not arguments.embedded):
+        results.append(result)
+        if result['error'] is None:
+            print('OK     {:8.2f} s  {} ({} shells)'.format(
+                result['duration'], result['file'], result['shells']))
+        else:
+            print('FAILED {:8.2f} s  {}: {}'.format(
+                result['duration'], result['file'],
+                result['error'].strip().splitlines()[-1]))
+    failures = [result for result in results if result['error'] is not None]
+    print('{} files converted, {} failed in {:.2f} s'.format(
+        len(results) - len(failures), len(failures),
+        time.perf_counter() - start))
+
+    if arguments.report:
+        with open(arguments.report, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
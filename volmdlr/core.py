@@ -5,14 +5,19 @@
 """
 
 import math
+import re
+import heapq
+import operator
+import time
 import numpy as npy
 
 
 npy.seterr(divide='raise')
 from datetime import datetime
 
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
+from volmdlr.lazy import lazy_module
+plt = lazy_module('matplotlib.pyplot')
+mplot3d = lazy_module('mpl_toolkits.mplot3d')
 
 import volmdlr
 import volmdlr.templates
@@ -20,9 +25,11 @@ import volmdlr.templates
 import dessia_common as dc
 
 import webbrowser
+import io
 import os
 import tempfile
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 
 # TODO: put voldmlr metadata in this freecad header
 STEP_HEADER = '''ISO-10303-21;
@@ -45,6 +52,184 @@ STEP_FOOTER = '''ENDSEC;
 END-ISO-10303-21;
 '''
 
+# First id of the entities written after STEP_HEADER
+STEP_FIRST_ID = 8
+
+STEP_WRITER_BUFFER_SIZE = 1 << 20
+
+STEP_WRITER_RECORD = re.compile(r'^#(\d+) ?= ?(([A-Z0-9_]*).*);\n?', re.M)
+# Quoted strings are matched as a whole, so that ids are only searched
+# outside of them
+STEP_WRITER_REFERENCE = re.compile(r"'[^']*'|#(\d+)")
+
+# Geometric entities that are written once and referenced by id when
+# deduplication is enabled
+STEP_INTERNED_ENTITIES = {'CARTESIAN_POINT', 'DIRECTION', 'VECTOR',
+                          'AXIS2_PLACEMENT_2D', 'AXIS2_PLACEMENT_3D',
+                          'LINE', 'CIRCLE', 'ELLIPSE',
+                          'B_SPLINE_CURVE_WITH_KNOTS', 'PLANE',
+                          'CYLINDRICAL_SURFACE', 'CONICAL_SURFACE',
+                          'SPHERICAL_SURFACE', 'TOROIDAL_SURFACE',
+                          'B_SPLINE_SURFACE_WITH_KNOTS', 'VERTEX_POINT',
+                          'EDGE_CURVE'}
+# Topological entities, only shared within a shell
+STEP_SHELL_INTERNED_ENTITIES = {'VERTEX_POINT', 'EDGE_CURVE'}
+STEP_WRITER_SHELLS = {'OPEN_SHELL', 'CLOSED_SHELL'}
+
+
+class StepWriter:
+    """
+    Buffered writer of STEP records into a text stream. Content is flushed
+    to the stream by chunks of buffer_size characters, so that the whole
+    file is never held in memory.
+
+    With deduplicate, identical geometric records (points, directions,
+    placements, curves, surfaces, vertices and edges) are written once and
+    referenced by the id of their first occurrence. Straight edges shared by
+    two faces are written once and used reversed by the second face.
+    Vertices and edges are only shared within a shell, whose record ends
+    the sharing of its topology.
+    Each call to write must contain complete subgraphs (a face, a shell...).
+
+    :param stream: A text stream (opened file, io.StringIO...)
+    """
+
+    def __init__(self, stream, buffer_size=STEP_WRITER_BUFFER_SIZE,
+                 deduplicate=False):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.deduplicate = deduplicate
+        self._buffer = []
+        self._buffer_length = 0
+        # Deduplication state
+        self._interned = {}
+        self._shell_interned = {}
+        self._id_mapping = {}
+        self._reversed_ids = set()
+        self._line_ids = set()
+        self._straight_edges = {}
+
+    def write(self, content):
+        if self.deduplicate:
+            content = self._deduplicate(content)
+        self._buffer.append(content)
+        self._buffer_length += len(content)
+        if self._buffer_length >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.stream.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffer_length = 0
+
+    def _remap(self, match):
+        if match.group(1) is None:
+            return match.group(0)
+        return '#{}'.format(self._id_mapping.get(int(match.group(1)),
+                                                 match.group(1)))
+
+    def _deduplicate(self, content):
+        """
+        Rewrites the records of content against the already written ones.
+        Returns the content to write
+        """
+        pieces = []
+        records = []
+        last_end = 0
+        for match in STEP_WRITER_RECORD.finditer(content):
+            pieces.append(content[last_end:match.start()])
+            last_end = match.end()
+            pieces.append(None)
+            records.append([len(pieces) - 1, int(match.group(1)),
+                            match.group(3), match.group(2)])
+        pieces.append(content[last_end:])
+
+        new_ids = set()
+        dropped = set()
+        references = {}
+        for record in records:
+            piece_index, record_id, entity, body = record
+            referenced_ids = step_references(body)
+            if entity == 'ORIENTED_EDGE' and referenced_ids \
+                    and referenced_ids[-1] in self._reversed_ids:
+                if body.endswith('.T.)'):
+                    body = body[:-4] + '.F.)'
+                elif body.endswith('.F.)'):
+                    body = body[:-4] + '.T.)'
+            body = STEP_WRITER_REFERENCE.sub(self._remap, body)
+            record[3] = body
+
+            canonical_id = None
+            if entity in STEP_INTERNED_ENTITIES:
+                if entity in STEP_SHELL_INTERNED_ENTITIES:
+                    interned = self._shell_interned
+                else:
+                    interned = self._interned
+                canonical_id = interned.get(body, None)
+                if canonical_id is None and entity == 'EDGE_CURVE':
+                    canonical_id = self._straight_edge(record_id, body)
+                if canonical_id is None:
+                    interned[body] = record_id
+                    if entity == 'LINE':
+                        self._line_ids.add(record_id)
+            elif entity in STEP_WRITER_SHELLS:
+                self._shell_interned = {}
+                self._straight_edges = {}
+
+            if canonical_id is None:
+                new_ids.add(record_id)
+                pieces[piece_index] = '#{} = {};\n'.format(record_id, body)
+            else:
+                self._id_mapping[record_id] = canonical_id
+                dropped.add(record_id)
+                pieces[piece_index] = ''
+            # References after remapping: a record may now use the
+            # canonical record of one it referenced
+            for referenced_id in step_references(body):
+                references.setdefault(referenced_id, []).append(record_id)
+
+        # New records only used by dropped ones are dropped too. Records
+        # are in dependency order, so referrers are processed first
+        for piece_index, record_id, entity, body in reversed(records):
+            if record_id in new_ids and record_id in references:
+                if all(r in dropped for r in references[record_id]):
+                    dropped.add(record_id)
+                    new_ids.remove(record_id)
+                    pieces[piece_index] = ''
+                    for interned in (self._interned, self._shell_interned):
+                        if interned.get(body, None) == record_id:
+                            del interned[body]
+                    self._line_ids.discard(record_id)
+
+        return ''.join(p for p in pieces if p)
+
+    def _straight_edge(self, record_id, body):
+        """
+        Search for an already written straight edge between the same
+        vertices. Returns its id or None
+        """
+        start_id, end_id, curve_id = step_references(body)[:3]
+        if curve_id not in self._line_ids:
+            return None
+        edge_id = self._straight_edges.get((start_id, end_id), None)
+        if edge_id is not None:
+            return edge_id
+        edge_id = self._straight_edges.get((end_id, start_id), None)
+        if edge_id is not None:
+            self._reversed_ids.add(record_id)
+            return edge_id
+        self._straight_edges[(start_id, end_id)] = record_id
+        return None
+
+
+def step_references(content):
+    """
+    The ids referenced in STEP content, outside of quoted strings
+    """
+    return [int(i) for i in STEP_WRITER_REFERENCE.findall(content) if i]
+
+
 def find_and_replace(string, find, replace):
     """
     Finds a string in a string and replace it
@@ -522,7 +707,7 @@ class CompositePrimitive3D(Primitive3D):
     def plot(self, ax=None, equal_aspect=True, color='k', alpha=1):
         if ax is None:
             fig = plt.figure()
-            ax = Axes3D(fig)
+            ax = mplot3d.Axes3D(fig)
         else:
             fig = None
         # if equal_aspect:
@@ -536,6 +721,233 @@ class CompositePrimitive3D(Primitive3D):
         return ax
 
 
+def homogeneous_rotation_matrix(center, axis, angle):
+    """
+    The (4, 4) homogeneous matrix of the rotation of angle around the axis
+    passing through center, as in Vector3D.rotation
+    """
+    cos_angle = math.cos(angle)
+    sin_angle = math.sin(angle)
+    axis = npy.array([axis.x, axis.y, axis.z])
+    cross_matrix = npy.array([[0., -axis[2], axis[1]],
+                              [axis[2], 0., -axis[0]],
+                              [-axis[1], axis[0], 0.]])
+    center = npy.array([center.x, center.y, center.z])
+    matrix = npy.identity(4)
+    matrix[:3, :3] = (cos_angle * npy.identity(3)
+                      + (1 - cos_angle) * npy.outer(axis, axis)
+                      + sin_angle * cross_matrix)
+    matrix[:3, 3] = center - matrix[:3, :3].dot(center)
+    return matrix
+
+
+def homogeneous_translation_matrix(offset):
+    """
+    The (4, 4) homogeneous matrix of a translation
+    """
+    matrix = npy.identity(4)
+    matrix[:3, 3] = (offset.x, offset.y, offset.z)
+    return matrix
+
+
+class TransformedPrimitive3D(Primitive3D):
+    """
+    A view of a 3D primitive moved by rotations, translations and frame
+    mappings, which are accumulated in a (4, 4) homogeneous matrix instead
+    of copying the geometry of the primitive. The bounding box,
+    triangulation and distances are computed from the ones of the primitive,
+    and materialize builds the transformed primitive.
+
+    :param primitive: The primitive in its own coordinates, such as an
+        OpenShell3D
+    :param frame: The frame in which the primitive is placed, as in
+        primitive.frame_mapping(frame, 'old'). Defaults to the global frame
+    """
+    _standalone_in_db = True
+    _eq_is_data_eq = False
+    _non_serializable_attributes = ['matrix']
+
+    def __init__(self, primitive, frame=None, name=''):
+        self.primitive = primitive
+        if frame is None:
+            self.matrix = npy.identity(4)
+        else:
+            self.matrix = frame.homogeneous_matrix()
+        # Results computed on the primitive, shared by the views of a same
+        # primitive
+        self._primitive_cache = {}
+        Primitive3D.__init__(self, color=primitive.color,
+                             alpha=primitive.alpha,
+                             name=name or primitive.name)
+
+    def _serializable_dict(self):
+        dict_ = Primitive3D._serializable_dict(self)
+        dict_['frame'] = self.frame
+        return dict_
+
+    def _cached(self, name, compute):
+        if name not in self._primitive_cache:
+            self._primitive_cache[name] = compute()
+        return self._primitive_cache[name]
+
+    def _view(self, matrix):
+        view = TransformedPrimitive3D(self.primitive, name=self.name)
+        view.matrix = matrix
+        view._primitive_cache = self._primitive_cache
+        return view
+
+    def _transform(self, matrix, copy):
+        matrix = matrix.dot(self.matrix)
+        if copy:
+            return self._view(matrix)
+        self.matrix = matrix
+
+    def _is_rigid(self):
+        basis = self.matrix[:3, :3]
+        return npy.allclose(basis.T.dot(basis), npy.identity(3), atol=1e-9)
+
+    def _global_array(self, array):
+        return array.dot(self.matrix[:3, :3].T) + self.matrix[:3, 3]
+
+    def _global_point(self, point):
+        return volmdlr.Point3D(*self._global_array(
+            npy.array([point.x, point.y, point.z])).tolist())
+
+    def _local_point(self, point):
+        return volmdlr.Point3D(*npy.linalg.solve(
+            self.matrix[:3, :3],
+            npy.array([point.x, point.y, point.z]) - self.matrix[:3, 3]
+        ).tolist())
+
+    def _get_frame(self):
+        return volmdlr.Frame3D.from_homogeneous_matrix(self.matrix)
+
+    frame = property(_get_frame)
+
+    def _get_bounding_box(self):
+        """
+        Bounding box of the transformed corners of the primitive's one
+        """
+        corners = self._cached(
+            'bounding_box_corners',
+            lambda: volmdlr.Points3D.from_points(
+                self.primitive.bounding_box.points).array)
+        corners = self._global_array(corners)
+        (xmin, ymin, zmin), (xmax, ymax, zmax) = (corners.min(axis=0).tolist(),
+                                                  corners.max(axis=0).tolist())
+        return BoundingBox(xmin, xmax, ymin, ymax, zmin, zmax)
+
+    bounding_box = property(_get_bounding_box)
+
+    def rotation(self, center, axis, angle, copy=True):
+        return self._transform(
+            homogeneous_rotation_matrix(center, axis, angle), copy)
+
+    def translation(self, offset, copy=True):
+        return self._transform(homogeneous_translation_matrix(offset), copy)
+
+    def frame_mapping(self, frame, side, copy=True):
+        """
+        side = 'old' or 'new'
+        """
+        if side == 'old':
+            matrix = frame.homogeneous_matrix()
+        elif side == 'new':
+            matrix = frame.inverse_homogeneous_matrix()
+        else:
+            raise ValueError('side must be either old or new')
+        return self._transform(matrix, copy)
+
+    def copy(self):
+        view = TransformedPrimitive3D(self.primitive.copy(), name=self.name)
+        view.matrix = self.matrix.copy()
+        return view
+
+    def materialize(self):
+        """
+        The primitive transformed by the accumulated transformations
+        """
+        return self.primitive.frame_mapping(self.frame, 'old', copy=True)
+
+    def triangulation(self):
+        mesh = self._cached('triangulation', self.primitive.triangulation)
+        points = self._cached(
+            'triangulation_points',
+            lambda: volmdlr.Points3D.from_points(mesh.points).array)
+        return mesh.__class__(
+            [volmdlr.Point3D(*point)
+             for point in self._global_array(points).tolist()],
+            mesh.triangles)
+
+    def babylon_meshes(self):
+        """
+        The meshes of the primitive are computed once, and their positions
+        transformed
+        """
+        meshes = []
+        for mesh in self._cached('babylon_meshes',
+                                 self.primitive.babylon_meshes):
+            positions = npy.array(mesh['positions']).reshape(-1, 3)
+            view_mesh = mesh.copy()
+            view_mesh['positions'] = npy.round(
+                self._global_array(positions), 6).ravel().tolist()
+            meshes.append(view_mesh)
+        return meshes
+
+    def point_belongs(self, point):
+        return self.primitive.point_belongs(self._local_point(point))
+
+    def minimum_distance_point(self, point):
+        """
+        The point of the primitive closest to the given point. Distances are
+        computed on the primitive if the transformation keeps them
+        """
+        if not self._is_rigid():
+            return self.materialize().minimum_distance_point(point)
+        return self._global_point(
+            self.primitive.minimum_distance_point(self._local_point(point)))
+
+    def minimum_distance_points(self, other_primitive, resolution):
+        """
+        The closest points of the primitive and of another primitive or
+        view, computed in the coordinates of the primitive if the
+        transformation keeps distances
+        """
+        if not self._is_rigid():
+            primitive = self.materialize()
+            if isinstance(other_primitive, TransformedPrimitive3D):
+                other_primitive = other_primitive.materialize()
+            return primitive.minimum_distance_points(other_primitive,
+                                                     resolution)
+        if isinstance(other_primitive, TransformedPrimitive3D):
+            # Placed relatively to the primitive with one copy
+            other_local = other_primitive.primitive.frame_mapping(
+                volmdlr.Frame3D.from_homogeneous_matrix(
+                    npy.linalg.solve(self.matrix, other_primitive.matrix)),
+                'old', copy=True)
+        else:
+            other_local = other_primitive.frame_mapping(
+                volmdlr.Frame3D.from_homogeneous_matrix(
+                    npy.linalg.inv(self.matrix)), 'old', copy=True)
+        points = self.primitive.minimum_distance_points(other_local,
+                                                        resolution)
+        if points is None:
+            return None
+        return tuple(self._global_point(point) for point in points)
+
+    def distance_to_shell(self, other_primitive, resolution):
+        points = self.minimum_distance_points(other_primitive, resolution)
+        if points is None:
+            return None
+        return points[0].point_distance(points[1])
+
+    def to_step(self, current_id, writer=None):
+        return self.materialize().to_step(current_id, writer=writer)
+
+    def plot(self, ax=None, color='k', alpha=1):
+        return self.materialize().plot(ax=ax, color=color, alpha=alpha)
+
+
 class BoundingBox(dc.DessiaObject):
     """
     An axis aligned boundary box
@@ -548,16 +960,37 @@ class BoundingBox(dc.DessiaObject):
         self.ymax = ymax
         self.zmin = zmin
         self.zmax = zmax
-        self.points = [volmdlr.Point3D(self.xmin, self.ymin, self.zmin), \
-                       volmdlr.Point3D(self.xmax, self.ymin, self.zmin), \
-                       volmdlr.Point3D(self.xmax, self.ymax, self.zmin), \
-                       volmdlr.Point3D(self.xmin, self.ymax, self.zmin), \
-                       volmdlr.Point3D(self.xmin, self.ymin, self.zmax), \
-                       volmdlr.Point3D(self.xmax, self.ymin, self.zmax), \
-                       volmdlr.Point3D(self.xmax, self.ymax, self.zmax), \
-                       volmdlr.Point3D(self.xmin, self.ymax, self.zmax)]
-        self.center = (self.points[0] + self.points[-2]) / 2
         self.name = name
+        self._points_cache = None
+
+    def _bounds(self):
+        return (self.xmin, self.xmax, self.ymin, self.ymax,
+                self.zmin, self.zmax)
+
+    @property
+    def points(self):
+        """
+        The eight corners, computed at first access
+        """
+        bounds = self._bounds()
+        if self._points_cache is None or self._points_cache[0] != bounds:
+            xmin, xmax, ymin, ymax, zmin, zmax = bounds
+            self._points_cache = (
+                bounds, [volmdlr.Point3D(xmin, ymin, zmin),
+                         volmdlr.Point3D(xmax, ymin, zmin),
+                         volmdlr.Point3D(xmax, ymax, zmin),
+                         volmdlr.Point3D(xmin, ymax, zmin),
+                         volmdlr.Point3D(xmin, ymin, zmax),
+                         volmdlr.Point3D(xmax, ymin, zmax),
+                         volmdlr.Point3D(xmax, ymax, zmax),
+                         volmdlr.Point3D(xmin, ymax, zmax)])
+        return self._points_cache[1]
+
+    @property
+    def center(self):
+        return volmdlr.Point3D((self.xmin + self.xmax) / 2,
+                               (self.ymin + self.ymax) / 2,
+                               (self.zmin + self.zmax) / 2)
 
     def __hash__(self):
         return sum([hash(p) for p in self.points])
@@ -607,6 +1040,11 @@ class BoundingBox(dc.DessiaObject):
     def from_points(cls, points):
         # if len(points) == 0:
         #     return (0, 0, 0, 0, 0, 0)
+        if isinstance(points, volmdlr.Points3D):
+            (xmin, ymin, zmin), (xmax, ymax, zmax) = (
+                points.array.min(axis=0).tolist(),
+                points.array.max(axis=0).tolist())
+            return cls(xmin, xmax, ymin, ymax, zmin, zmax)
         xmin = min([pt.x for pt in points])
         xmax = max([pt.x for pt in points])
         ymin = min([pt.y for pt in points])
@@ -1101,6 +1539,625 @@ class BoundingBox(dc.DessiaObject):
         return s
 
 
+# Maximum number of pairs of boxes compared at once by sweep and prune
+SWEEP_AND_PRUNE_CHUNK = 1000000
+# Boxes spanning more columns of the sweep and prune grid are compared to all
+# the other boxes
+SWEEP_AND_PRUNE_MAX_COLUMNS = 16
+
+
+class BoundingBoxArray:
+    """
+    A batch of axis aligned bounding boxes stored in a (N, 6) array of
+    xmin, xmax, ymin, ymax, zmin, zmax rows. Queries against a BoundingBox
+    or a point return an array of shape (N,), queries against another
+    BoundingBoxArray of M boxes or M points return a (N, M) array.
+
+    :param array: An array-like of shape (N, 6)
+    """
+
+    def __init__(self, array):
+        self.array = npy.asarray(array, dtype=float).reshape(-1, 6)
+
+    def __len__(self):
+        return self.array.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, npy.integer)):
+            return BoundingBox(*self.array[key].tolist())
+        return self.__class__(self.array[key])
+
+    def __repr__(self):
+        return '{}: {} boxes'.format(self.__class__.__name__, len(self))
+
+    @classmethod
+    def from_bounding_boxes(cls, bounding_boxes):
+        return cls(npy.array([(bbox.xmin, bbox.xmax, bbox.ymin, bbox.ymax,
+                               bbox.zmin, bbox.zmax)
+                              for bbox in bounding_boxes], dtype=float))
+
+    def to_bounding_boxes(self):
+        return [BoundingBox(*bounds) for bounds in self.array.tolist()]
+
+    @property
+    def mins(self):
+        """
+        The (N, 3) array of the xmin, ymin, zmin of the boxes
+        """
+        return self.array[:, 0::2]
+
+    @property
+    def maxs(self):
+        """
+        The (N, 3) array of the xmax, ymax, zmax of the boxes
+        """
+        return self.array[:, 1::2]
+
+    def _other_bounds(self, other):
+        """
+        Mins and maxs of the other boxes, broadcastable against the (N, 3)
+        mins and maxs of this array
+        """
+        if isinstance(other, BoundingBoxArray):
+            return other.mins[npy.newaxis], other.maxs[npy.newaxis]
+        other_bounds = npy.array([[other.xmin, other.ymin, other.zmin],
+                                  [other.xmax, other.ymax, other.zmax]])
+        return other_bounds[0], other_bounds[1]
+
+    def _self_bounds(self, other):
+        if isinstance(other, BoundingBoxArray):
+            return self.mins[:, npy.newaxis], self.maxs[:, npy.newaxis]
+        return self.mins, self.maxs
+
+    def _points_array(self, points):
+        if isinstance(points, volmdlr.Points3D):
+            return points.array[npy.newaxis], self.mins[:, npy.newaxis], \
+                   self.maxs[:, npy.newaxis]
+        if isinstance(points, volmdlr.Vector3D):
+            points = (points.x, points.y, points.z)
+        points = npy.asarray(points, dtype=float)
+        if points.ndim == 2:
+            return points[npy.newaxis], self.mins[:, npy.newaxis], \
+                   self.maxs[:, npy.newaxis]
+        return points, self.mins, self.maxs
+
+    def volume(self):
+        lengths = self.maxs - self.mins
+        return lengths[:, 0] * lengths[:, 1] * lengths[:, 2]
+
+    def union(self):
+        """
+        The BoundingBox of all the boxes
+        """
+        mins = self.mins.min(axis=0).tolist()
+        maxs = self.maxs.max(axis=0).tolist()
+        return BoundingBox(mins[0], maxs[0], mins[1], maxs[1],
+                           mins[2], maxs[2])
+
+    def sweep_and_prune(self, tolerance: float = 0.):
+        """
+        Pairs of boxes intersecting or touching. The boxes are sorted along
+        the axis where their centers are the most spread, and swept in the
+        columns of a grid on the two other axes: only the boxes sharing a
+        column and overlapping along the sweep axis are compared.
+
+        :param tolerance: The boxes are inflated by this length
+        :returns: The indices i < j of the pairs, an array of shape (K, 2)
+            sorted by i then j
+        """
+        number_boxes = len(self)
+        if number_boxes < 2:
+            return npy.empty((0, 2), dtype=npy.intp)
+        mins = self.mins - tolerance
+        maxs = self.maxs + tolerance
+        axis = int(npy.argmax(npy.var(mins + maxs, axis=0)))
+        other_axes = [other_axis for other_axis in range(3)
+                      if other_axis != axis]
+
+        # Columns twice as large as the median box. Boxes spanning too many
+        # columns are compared to all the others.
+        extents = (maxs - mins)[:, other_axes]
+        cell_size = 2 * float(npy.median(extents.max(axis=1)))
+        if not cell_size > 0:
+            cell_size = max(float(extents.max()), 1.)
+        origin = mins[:, other_axes].min(axis=0)
+        first_cells = npy.floor(
+            (mins[:, other_axes] - origin) / cell_size).astype(npy.int64)
+        last_cells = npy.floor(
+            (maxs[:, other_axes] - origin) / cell_size).astype(npy.int64)
+        spans = last_cells - first_cells + 1
+        large = spans[:, 0] * spans[:, 1] > SWEEP_AND_PRUNE_MAX_COLUMNS
+
+        pairs = [self._large_boxes_pairs(mins, maxs, large)]
+
+        # Entries of the boxes in their columns, sorted by column and start
+        boxes = npy.flatnonzero(~large)
+        columns_numbers = spans[boxes, 0] * spans[boxes, 1]
+        entries_boxes = npy.repeat(boxes, columns_numbers)
+        ranks = npy.arange(len(entries_boxes)) - npy.repeat(
+            npy.cumsum(columns_numbers) - columns_numbers, columns_numbers)
+        entries_cells = first_cells[entries_boxes] + npy.column_stack(
+            (ranks // spans[entries_boxes, 1], ranks % spans[entries_boxes, 1]))
+        _, columns = npy.unique(entries_cells, axis=0, return_inverse=True)
+        columns = columns.reshape(-1)
+        entries_mins = mins[entries_boxes, axis]
+        order = npy.lexsort((entries_mins, columns))
+        entries_boxes = entries_boxes[order]
+        entries_cells = entries_cells[order]
+
+        # Sweep: positions on the sweep axis are replaced by their ranks,
+        # so that the searches stay in the column of each entry
+        values, value_ranks = npy.unique(
+            npy.concatenate((entries_mins[order],
+                             maxs[entries_boxes, axis])),
+            return_inverse=True)
+        value_ranks = value_ranks.reshape(-1)
+        number_entries = len(entries_boxes)
+        starts = columns[order] * len(values) + value_ranks[:number_entries]
+        stops = columns[order] * len(values) + value_ranks[number_entries:]
+        ends = npy.searchsorted(starts, stops, side='right')
+        counts = npy.maximum(ends - npy.arange(number_entries) - 1, 0)
+        cumulative_counts = npy.cumsum(counts)
+
+        start = 0
+        while start < number_entries:
+            # Bound the number of pairs compared at once
+            done = cumulative_counts[start - 1] if start else 0
+            stop = int(npy.searchsorted(cumulative_counts,
+                                        done + SWEEP_AND_PRUNE_CHUNK,
+                                        side='right'))
+            stop = min(max(stop, start + 1), number_entries)
+            chunk_counts = counts[start:stop]
+            first = npy.repeat(npy.arange(start, stop), chunk_counts)
+            second = first + 1 + npy.arange(len(first)) - npy.repeat(
+                npy.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+            boxes1 = entries_boxes[first]
+            boxes2 = entries_boxes[second]
+            # A pair sharing several columns is kept in the one of the
+            # lower corner of the intersection of the boxes
+            keep = npy.all(
+                (mins[boxes2] <= maxs[boxes1]) & (mins[boxes1] <= maxs[boxes2]),
+                axis=1) & npy.all(
+                    entries_cells[first] == npy.maximum(first_cells[boxes1],
+                                                        first_cells[boxes2]),
+                    axis=1)
+            pairs.append(npy.column_stack((boxes1[keep], boxes2[keep])))
+            start = stop
+
+        pairs = npy.sort(npy.concatenate(pairs), axis=1)
+        return pairs[npy.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+    @staticmethod
+    def _large_boxes_pairs(mins, maxs, large):
+        """
+        Pairs of a large box with any intersecting box
+        """
+        pairs = [npy.empty((0, 2), dtype=npy.intp)]
+        for index in npy.flatnonzero(large):
+            overlap = npy.all((mins <= maxs[index]) & (mins[index] <= maxs),
+                              axis=1)
+            # Pairs of large boxes are kept once
+            overlap &= ~large | (npy.arange(len(large)) > index)
+            overlap[index] = False
+            others = npy.flatnonzero(overlap)
+            pairs.append(npy.column_stack(
+                (npy.full(len(others), index), others)))
+        return npy.concatenate(pairs)
+
+    def bbox_intersection(self, other):
+        """
+        Vectorized BoundingBox.bbox_intersection
+        """
+        other_mins, other_maxs = self._other_bounds(other)
+        mins, maxs = self._self_bounds(other)
+        return npy.all((mins < other_maxs) & (maxs > other_mins), axis=-1)
+
+    def intersection_volume(self, other):
+        """
+        Vectorized BoundingBox.intersection_volume
+        """
+        other_mins, other_maxs = self._other_bounds(other)
+        mins, maxs = self._self_bounds(other)
+        lengths = npy.minimum(maxs, other_maxs) - npy.maximum(mins, other_mins)
+        volumes = lengths[..., 0] * lengths[..., 1] * lengths[..., 2]
+        return npy.where(npy.all(lengths > 0, axis=-1), volumes, 0.)
+
+    def distance_to_bbox(self, other):
+        """
+        Vectorized BoundingBox.distance_to_bbox
+        """
+        other_mins, other_maxs = self._other_bounds(other)
+        mins, maxs = self._self_bounds(other)
+        gaps = npy.maximum(npy.maximum(other_mins - maxs, mins - other_maxs),
+                           0.)
+        return (gaps[..., 0] ** 2 + gaps[..., 1] ** 2
+                + gaps[..., 2] ** 2) ** 0.5
+
+    def point_belongs(self, points):
+        """
+        Vectorized BoundingBox.point_belongs, for a point or a batch of
+        points (a Points3D or an (M, 3) array-like)
+        """
+        points, mins, maxs = self._points_array(points)
+        return npy.all((mins < points) & (points < maxs), axis=-1)
+
+    def distance_to_point(self, points):
+        """
+        Vectorized BoundingBox.distance_to_point, for a point or a batch of
+        points (a Points3D or an (M, 3) array-like). As in BoundingBox, the
+        distance of a point inside a box is its distance to the nearest face.
+        """
+        points, mins, maxs = self._points_array(points)
+        gaps = npy.maximum(npy.maximum(mins - points, points - maxs), 0.)
+        outside_distances = (gaps[..., 0] ** 2 + gaps[..., 1] ** 2
+                             + gaps[..., 2] ** 2) ** 0.5
+        inside_distances = npy.minimum(maxs - points,
+                                       points - mins).min(axis=-1)
+        inside = npy.all((mins < points) & (points < maxs), axis=-1)
+        return npy.where(inside, inside_distances, outside_distances)
+
+
+class BoundingVolumeHierarchy:
+    """
+    A binary tree of bounding boxes, built by splitting the boxes at the
+    median of their centers along the longest axis. Queries visit only the
+    nodes whose box may contain a result, in O(log N) for small results.
+    Boxes can be inserted and moved without rebuilding the tree.
+
+    :param boxes: A BoundingBoxArray, or a list of BoundingBox
+    :param leaf_size: The maximum number of boxes in a leaf
+    :param tolerance: The boxes are inflated by this length in all
+        directions, so that flat boxes and rounding errors are handled
+    """
+
+    def __init__(self, boxes, leaf_size: int = 4, tolerance: float = 1e-6):
+        if not isinstance(boxes, BoundingBoxArray):
+            boxes = BoundingBoxArray.from_bounding_boxes(boxes)
+        self.leaf_size = leaf_size
+        self.tolerance = tolerance
+        self._boxes_bounds = [self._inflated(bounds)
+                              for bounds in boxes.array.tolist()]
+        self.rebuild()
+
+    def __len__(self):
+        return len(self._boxes_bounds)
+
+    def _inflated(self, bounds):
+        xmin, xmax, ymin, ymax, zmin, zmax = bounds
+        return (xmin - self.tolerance, xmax + self.tolerance,
+                ymin - self.tolerance, ymax + self.tolerance,
+                zmin - self.tolerance, zmax + self.tolerance)
+
+    def rebuild(self):
+        """
+        Build the tree again, when boxes have moved a lot since it was built
+        """
+        self._nodes_bounds = []
+        # Children of the internal nodes, boxes indices of the leaves
+        self._nodes_children = []
+        self._nodes_items = []
+        self._nodes_parents = []
+        self._leaves = [None] * len(self._boxes_bounds)
+        if self._boxes_bounds:
+            self._build(npy.arange(len(self._boxes_bounds)), None)
+
+    def _build(self, indices, parent):
+        node = len(self._nodes_bounds)
+        self._nodes_bounds.append(None)
+        self._nodes_children.append(None)
+        self._nodes_items.append(None)
+        self._nodes_parents.append(parent)
+        if len(indices) <= self.leaf_size:
+            self._nodes_items[node] = indices.tolist()
+            for index in self._nodes_items[node]:
+                self._leaves[index] = node
+        else:
+            array = npy.array([self._boxes_bounds[index]
+                               for index in indices.tolist()])
+            centers = array[:, 0::2] + array[:, 1::2]
+            # Boxes without bounds (infinite) are not spread on an axis
+            centers[~npy.isfinite(centers)] = 0.
+            axis = int(npy.argmax(centers.max(axis=0) - centers.min(axis=0)))
+            half = len(indices) // 2
+            split = npy.argpartition(centers[:, axis], half)
+            self._nodes_children[node] = (
+                self._build(indices[split[:half]], node),
+                self._build(indices[split[half:]], node))
+        self._nodes_bounds[node] = self._node_union(node)
+        return node
+
+    def _node_union(self, node):
+        children = self._nodes_children[node]
+        if children is None:
+            bounds = [self._boxes_bounds[index]
+                      for index in self._nodes_items[node]]
+        else:
+            bounds = [self._nodes_bounds[child] for child in children]
+        return (min(b[0] for b in bounds), max(b[1] for b in bounds),
+                min(b[2] for b in bounds), max(b[3] for b in bounds),
+                min(b[4] for b in bounds), max(b[5] for b in bounds))
+
+    def _refit_ancestors(self, node):
+        while node is not None:
+            bounds = self._node_union(node)
+            if bounds == self._nodes_bounds[node]:
+                break
+            self._nodes_bounds[node] = bounds
+            node = self._nodes_parents[node]
+
+    def insert(self, bbox):
+        """
+        Add a box in the leaf whose box grows the least, split if full
+
+        :returns: The index of the box
+        """
+        index = len(self._boxes_bounds)
+        bounds = self._inflated((bbox.xmin, bbox.xmax, bbox.ymin, bbox.ymax,
+                                 bbox.zmin, bbox.zmax))
+        self._boxes_bounds.append(bounds)
+        self._leaves.append(None)
+        if not self._nodes_bounds:
+            self._build(npy.array([index]), None)
+            return index
+
+        node = 0
+        while self._nodes_children[node] is not None:
+            node = min(self._nodes_children[node],
+                       key=lambda child: self._enlargement(
+                           self._nodes_bounds[child], bounds))
+        self._nodes_items[node].append(index)
+        self._leaves[index] = node
+        if len(self._nodes_items[node]) > 2 * self.leaf_size:
+            # The full leaf becomes the root of a new subtree
+            items = npy.array(self._nodes_items[node])
+            half = len(items) // 2
+            array = npy.array([self._boxes_bounds[i] for i in items.tolist()])
+            centers = array[:, 0::2] + array[:, 1::2]
+            centers[~npy.isfinite(centers)] = 0.
+            axis = int(npy.argmax(centers.max(axis=0) - centers.min(axis=0)))
+            split = npy.argpartition(centers[:, axis], half)
+            self._nodes_items[node] = None
+            self._nodes_children[node] = (
+                self._build(items[split[:half]], node),
+                self._build(items[split[half:]], node))
+        self._refit_ancestors(node)
+        return index
+
+    @staticmethod
+    def _enlargement(node_bounds, bounds):
+        """
+        Growth of the volume of a node box containing new bounds, then its
+        volume to break ties
+        """
+        union = [min(node_bounds[0], bounds[0]), max(node_bounds[1], bounds[1]),
+                 min(node_bounds[2], bounds[2]), max(node_bounds[3], bounds[3]),
+                 min(node_bounds[4], bounds[4]), max(node_bounds[5], bounds[5])]
+        volume = ((node_bounds[1] - node_bounds[0])
+                  * (node_bounds[3] - node_bounds[2])
+                  * (node_bounds[5] - node_bounds[4]))
+        union_volume = ((union[1] - union[0]) * (union[3] - union[2])
+                        * (union[5] - union[4]))
+        return union_volume - volume, volume
+
+    def refit(self, index, bbox):
+        """
+        Move a box: the boxes of the nodes containing it are updated, the
+        tree structure is kept
+        """
+        self._boxes_bounds[index] = self._inflated(
+            (bbox.xmin, bbox.xmax, bbox.ymin, bbox.ymax, bbox.zmin, bbox.zmax))
+        self._refit_ancestors(self._leaves[index])
+
+    def refit_all(self, bboxes):
+        """
+        Move all the boxes, with the same tree structure
+        """
+        self._boxes_bounds = [
+            self._inflated((bbox.xmin, bbox.xmax, bbox.ymin, bbox.ymax,
+                            bbox.zmin, bbox.zmax)) for bbox in bboxes]
+        # Children are created after their parent
+        for node in reversed(range(len(self._nodes_bounds))):
+            self._nodes_bounds[node] = self._node_union(node)
+
+    def _query(self, node_test):
+        """
+        Indices of the boxes whose bounds pass node_test, which must pass
+        for the bounds of all the nodes containing them. Sorted.
+        """
+        if not self._nodes_bounds:
+            return []
+        indices = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if not node_test(self._nodes_bounds[node]):
+                continue
+            children = self._nodes_children[node]
+            if children is None:
+                indices.extend(index for index in self._nodes_items[node]
+                               if node_test(self._boxes_bounds[index]))
+            else:
+                stack.extend(children)
+        return sorted(indices)
+
+    def bbox_query(self, bbox):
+        """
+        Indices of the boxes intersecting or touching a BoundingBox
+        """
+        def node_test(bounds):
+            return (bounds[0] <= bbox.xmax and bbox.xmin <= bounds[1]
+                    and bounds[2] <= bbox.ymax and bbox.ymin <= bounds[3]
+                    and bounds[4] <= bbox.zmax and bbox.zmin <= bounds[5])
+        return self._query(node_test)
+
+    def point_query(self, point):
+        """
+        Indices of the boxes containing a point
+        """
+        x, y, z = point.x, point.y, point.z
+
+        def node_test(bounds):
+            return (bounds[0] <= x <= bounds[1] and bounds[2] <= y <= bounds[3]
+                    and bounds[4] <= z <= bounds[5])
+        return self._query(node_test)
+
+    def segment_query(self, start, end):
+        """
+        Indices of the boxes crossed by the segment from start to end
+        """
+        origin = (start.x, start.y, start.z)
+        direction = (end.x - start.x, end.y - start.y, end.z - start.z)
+
+        def node_test(bounds):
+            # Slab test: clip the [0, 1] parameter range by each axis
+            t_min, t_max = 0., 1.
+            for axis in range(3):
+                lower, upper = bounds[2*axis], bounds[2*axis + 1]
+                if direction[axis] == 0.:
+                    if not lower <= origin[axis] <= upper:
+                        return False
+                    continue
+                t1 = (lower - origin[axis]) / direction[axis]
+                t2 = (upper - origin[axis]) / direction[axis]
+                if t1 > t2:
+                    t1, t2 = t2, t1
+                t_min = max(t_min, t1)
+                t_max = min(t_max, t2)
+                if t_min > t_max:
+                    return False
+            return True
+        return self._query(node_test)
+
+    def sphere_query(self, point, radius: float):
+        """
+        Indices of the boxes closer to a point than the radius
+        """
+        def node_test(bounds):
+            return self._point_bounds_distance(point, bounds) <= radius
+        return self._query(node_test)
+
+    def k_nearest(self, point, k: int = 1):
+        """
+        The k boxes nearest to a point, found best first
+
+        :returns: A list of (index, distance) sorted by distance to the
+            boxes, then by index. The distance of a point inside a box is 0.
+        """
+        results = []
+        heap = [(0., 0, 0)] if self._nodes_bounds else []
+        while heap and len(results) < k:
+            # At equal distances, nodes are visited before boxes
+            distance, is_box, item = heapq.heappop(heap)
+            if is_box:
+                results.append((item, distance))
+                continue
+            children = self._nodes_children[item]
+            if children is None:
+                entries = [(self._point_bounds_distance(
+                    point, self._boxes_bounds[index]), 1, index)
+                    for index in self._nodes_items[item]]
+            else:
+                entries = [(self._point_bounds_distance(
+                    point, self._nodes_bounds[child]), 0, child)
+                    for child in children]
+            for entry in entries:
+                if entry[0] < math.inf:
+                    heapq.heappush(heap, entry)
+        return results
+
+    @staticmethod
+    def _point_bounds_distance(point, bounds):
+        dx = max(bounds[0] - point.x, point.x - bounds[1], 0.)
+        dy = max(bounds[2] - point.y, point.y - bounds[3], 0.)
+        dz = max(bounds[4] - point.z, point.z - bounds[5], 0.)
+        return (dx ** 2 + dy ** 2 + dz ** 2) ** 0.5
+
+    def nearest(self, point, distance_function):
+        """
+        The box content nearest to a point, found best first: the boxes are
+        visited by increasing distance to the point, until it exceeds the
+        best distance found.
+
+        :param distance_function: A function of a box index returning the
+            distance of its content to the point and a result, such as the
+            nearest point of the content
+        :returns: The index of the nearest box, the distance and the result
+            of distance_function. On ties, the smallest index.
+        """
+        if not self._nodes_bounds:
+            return None
+        best_index, best_distance, best_result = None, math.inf, None
+        heap = [(0., 0)]
+        while heap:
+            node_distance, node = heapq.heappop(heap)
+            if node_distance > best_distance:
+                break
+            children = self._nodes_children[node]
+            if children is None:
+                for index in self._nodes_items[node]:
+                    if self._point_bounds_distance(
+                            point, self._boxes_bounds[index]) > best_distance:
+                        continue
+                    distance, result = distance_function(index)
+                    if best_index is None or distance < best_distance or (
+                            distance == best_distance and index < best_index):
+                        best_index, best_distance, best_result = \
+                            index, distance, result
+            else:
+                for child in children:
+                    heapq.heappush(heap, (self._point_bounds_distance(
+                        point, self._nodes_bounds[child]), child))
+        return best_index, best_distance, best_result
+
+
+
+
+
+class ClashReport:
+    """
+    The colliding primitives of a VolumeModel, see VolumeModel.clash_report
+
+    :param primitives: The primitives of the volume model
+    :param candidate_pairs: The pairs of indices of primitives whose bounding
+        boxes intersect (broad phase)
+    :param clashes: The pairs of indices of colliding primitives
+    :param undecided: The candidate pairs that the narrow phase could not
+        check, as their primitives do not implement it
+    :param results: The result of the narrow phase for each checked pair
+    :param timings: The duration in seconds of each phase
+    """
+
+    def __init__(self, primitives, candidate_pairs, clashes, undecided,
+                 results, timings):
+        self.primitives = primitives
+        self.candidate_pairs = candidate_pairs
+        self.clashes = clashes
+        self.undecided = undecided
+        self.results = results
+        self.timings = timings
+
+    def __len__(self):
+        return len(self.clashes)
+
+    def __repr__(self):
+        return '{}: {} clashes'.format(self.__class__.__name__, len(self))
+
+    def clashing_primitives(self):
+        return [(self.primitives[i], self.primitives[j])
+                for i, j in self.clashes]
+
+    def summary(self):
+        lines = ['{} primitives, {} candidate pairs, {} clashes, '
+                 '{} undecided'.format(len(self.primitives),
+                                       len(self.candidate_pairs),
+                                       len(self.clashes),
+                                       len(self.undecided))]
+        for phase, duration in self.timings.items():
+            lines.append('  {:16} {:.4f} s'.format(phase, duration))
+        for i, j in self.clashes:
+            lines.append('  {} ({}) - {} ({})'.format(
+                i, self.primitives[i].name, j, self.primitives[j].name))
+        return '\n'.join(lines)
 
 
 class VolumeModel(dc.DessiaObject):
@@ -1124,6 +2181,8 @@ class VolumeModel(dc.DessiaObject):
         # if self.shells:
 
         self.bounding_box = self._bounding_box()
+        self._spatial_index = None
+        self._indexed_primitives = []
         # else:
         #     self.bounding_box = BoundingBox(-1, 1, -1, 1, -1, 1)
 
@@ -1163,6 +2222,7 @@ class VolumeModel(dc.DessiaObject):
             for primitive in self.primitives:
                 primitive.rotation(center, axis, angle, copy=False)
             self.bounding_box = self._bounding_box()
+            self.update_spatial_index()
 
     def translation(self, offset, copy=True):
         if copy:
@@ -1173,6 +2233,7 @@ class VolumeModel(dc.DessiaObject):
             for primitives in self.primitives:
                 primitives.translation(offset, copy=False)
             self.bounding_box = self._bounding_box()
+            self.update_spatial_index()
 
     def frame_mapping(self, frame, side, copy=True):
         """
@@ -1186,11 +2247,189 @@ class VolumeModel(dc.DessiaObject):
             for primitives in self.primitives:
                 primitives.frame_mapping(frame, side, copy=False)
             self.bounding_box = self._bounding_box()
+            self.update_spatial_index()
 
     def copy(self):
         new_primitives = [primitive.copy() for primitive in self.primitives]
         return VolumeModel(new_primitives, self.name)
 
+    def view(self):
+        """
+        A volume model of views of the primitives: its rotations,
+        translations and frame mappings accumulate transformation matrices
+        instead of copying the geometry
+        """
+        return VolumeModel([TransformedPrimitive3D(primitive)
+                            for primitive in self.primitives], self.name)
+
+    @staticmethod
+    def _primitive_bounding_box(primitive):
+        if hasattr(primitive, 'bounding_box'):
+            return primitive.bounding_box
+        # Never found by the queries of the spatial index
+        return BoundingBox(math.inf, -math.inf, math.inf, -math.inf,
+                           math.inf, -math.inf)
+
+    @property
+    def spatial_index(self):
+        """
+        The BoundingVolumeHierarchy of the bounding boxes of the primitives,
+        built at first use. The indexed primitives are compared by identity
+        to the primitives list at each access: appended primitives are
+        inserted, replaced ones are refitted, and the index is rebuilt if
+        primitives were removed or many were replaced. Primitives transformed
+        in place by the model are refitted, others must be signaled with
+        update_spatial_index.
+        """
+        index = getattr(self, '_spatial_index', None)
+        indexed = getattr(self, '_indexed_primitives', [])
+        if index is not None and len(indexed) == len(index) \
+                and len(indexed) <= len(self.primitives):
+            if len(indexed) == len(self.primitives) \
+                    and all(map(operator.is_, indexed, self.primitives)):
+                return index
+            replaced = [i for i, primitive in enumerate(indexed)
+                        if primitive is not self.primitives[i]]
+            if len(replaced) > len(indexed) // 4:
+                index = None
+            else:
+                for i in replaced:
+                    index.refit(i, self._primitive_bounding_box(
+                        self.primitives[i]))
+                for primitive in self.primitives[len(index):]:
+                    index.insert(self._primitive_bounding_box(primitive))
+        else:
+            index = None
+        if index is None:
+            index = BoundingVolumeHierarchy(
+                [self._primitive_bounding_box(primitive)
+                 for primitive in self.primitives])
+            self._spatial_index = index
+        self._indexed_primitives = list(self.primitives)
+        return index
+
+    def add_primitive(self, primitive):
+        self.primitives.append(primitive)
+        self.bounding_box = self._bounding_box()
+        if getattr(self, '_spatial_index', None) is not None \
+                and len(self._indexed_primitives) == len(self.primitives) - 1:
+            self._spatial_index.insert(
+                self._primitive_bounding_box(primitive))
+            self._indexed_primitives.append(primitive)
+
+    def update_spatial_index(self, primitives=None):
+        """
+        Refit the spatial index to the bounding boxes of primitives which
+        were transformed in place, all of them by default
+        """
+        if getattr(self, '_spatial_index', None) is None:
+            return
+        # Follows the changes of the primitives list first
+        index = self.spatial_index
+        if primitives is None:
+            index.refit_all([self._primitive_bounding_box(primitive)
+                             for primitive in self.primitives])
+            return
+        positions = {id(primitive): i
+                     for i, primitive in enumerate(self.primitives)}
+        for primitive in primitives:
+            index.refit(positions[id(primitive)],
+                        self._primitive_bounding_box(primitive))
+
+    def primitives_in_box(self, bbox):
+        """
+        The primitives whose bounding box intersects a BoundingBox
+        """
+        return [self.primitives[i]
+                for i in self.spatial_index.bbox_query(bbox)]
+
+    def primitives_in_radius(self, point, radius: float):
+        """
+        The primitives whose bounding box is closer to a point than the radius
+        """
+        return [self.primitives[i]
+                for i in self.spatial_index.sphere_query(point, radius)]
+
+    def nearest_primitives(self, point, k: int = 1):
+        """
+        The k primitives whose bounding boxes are the nearest to a point,
+        sorted by distance (0 for a point inside a box)
+        """
+        return [self.primitives[i]
+                for i, _ in self.spatial_index.k_nearest(point, k)]
+
+    def clash_report(self, narrow_phase: str = 'intersection',
+                     resolution: float = 0.01, clearance: float = 0.):
+        """
+        Pairs of colliding primitives, in three phases:
+
+        - the bounding boxes of the primitives are gathered in a
+          BoundingBoxArray
+        - the broad phase finds the pairs of intersecting bounding boxes with
+          BoundingBoxArray.sweep_and_prune, in O(N log N) for sparse models
+        - the narrow phase checks each candidate pair of shells
+
+        :param narrow_phase: 'intersection' to check the pairs with
+            ClosedShell3D.shell_intersection, 'distance' to report the pairs
+            closer than the clearance with distance_to_shell, or None to
+            report the candidate pairs
+        :param resolution: The resolution of the narrow phase methods
+        :param clearance: With 'distance', the minimum distance between
+            primitives that is not a clash
+        :rtype: ClashReport
+        """
+        if narrow_phase not in ('intersection', 'distance', None):
+            raise ValueError('Unknown narrow phase {}'.format(narrow_phase))
+        timings = {}
+
+        start = time.perf_counter()
+        indices = [i for i, primitive in enumerate(self.primitives)
+                   if hasattr(primitive, 'bounding_box')]
+        boxes = BoundingBoxArray.from_bounding_boxes(
+            [self.primitives[i].bounding_box for i in indices])
+        timings['bounding_boxes'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tolerance = 0.5 * clearance if narrow_phase == 'distance' else 0.
+        candidate_pairs = [(indices[i], indices[j]) for i, j
+                           in boxes.sweep_and_prune(tolerance).tolist()]
+        timings['broad_phase'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        clashes, undecided, results = [], [], {}
+        if narrow_phase is None:
+            clashes = candidate_pairs[:]
+        shells = {}
+
+        def shell(index):
+            # Views are checked on their transformed geometry
+            if index not in shells:
+                primitive = self.primitives[index]
+                if hasattr(primitive, 'materialize'):
+                    primitive = primitive.materialize()
+                shells[index] = primitive
+            return shells[index]
+
+        for i, j in (candidate_pairs if narrow_phase else []):
+            try:
+                if narrow_phase == 'intersection':
+                    result = shell(i).shell_intersection(shell(j), resolution)
+                    clash = result is not None
+                else:
+                    result = shell(i).distance_to_shell(shell(j), resolution)
+                    # None: the shells intersect
+                    clash = result is None or result < clearance
+            except (AttributeError, NotImplementedError):
+                undecided.append((i, j))
+                continue
+            results[(i, j)] = result
+            if clash:
+                clashes.append((i, j))
+        timings['narrow_phase'] = time.perf_counter() - start
+
+        return ClashReport(self.primitives, candidate_pairs, clashes,
+                           undecided, results, timings)
+
     def _bounding_box(self):
         bboxes = []
         points = []
@@ -1400,9 +2639,10 @@ class VolumeModel(dc.DessiaObject):
         return babylon_data
 
     @classmethod
-    def babylonjs_from_babylon_data(cls, babylon_data, page_name='Volmdlr model',
-                                    use_cdn=True, debug=False):
-
+    def babylonjs_script_from_babylon_data(cls, babylon_data, use_cdn=True):
+        """
+        The HTML page displaying babylon_data
+        """
         if use_cdn:
             script = volmdlr.templates.babylon_unpacker_cdn_header#.substitute(name=page_name)
         else:
@@ -1410,6 +2650,14 @@ class VolumeModel(dc.DessiaObject):
 
         script += volmdlr.templates.babylon_unpacker_body_template.substitute(
                         babylon_data=babylon_data)
+        return script
+
+    @classmethod
+    def babylonjs_from_babylon_data(cls, babylon_data, page_name='Volmdlr model',
+                                    use_cdn=True, debug=False):
+
+        script = cls.babylonjs_script_from_babylon_data(babylon_data,
+                                                        use_cdn=use_cdn)
 
         if page_name is None:
             with tempfile.NamedTemporaryFile(suffix=".html",
@@ -1428,107 +2676,178 @@ class VolumeModel(dc.DessiaObject):
         self.babylonjs_from_babylon_data(babylon_data, page_name=page_name,
                                          use_cdn=use_cdn, debug=debug)
 
-    def to_step(self, filename:str=None):
-        
+    def to_step(self, filename:str=None, deduplicate:bool=True,
+                processes:int=1):
+        """
+        :param deduplicate: Write identical geometric entities only once
+        :param processes: If greater than 1, primitives are serialized in a
+            pool of this number of processes
+        """
         if filename and not (filename.endswith('.step') or filename.endswith('.stp')):
             print('Adding .step extension to filename')
             filename += '.step'
-        
-        step_content = STEP_HEADER.format(name=self.name,
-                                          filename=filename,
-                                          timestamp=datetime.now().isoformat(),
-                                          version=volmdlr.__version__)
-        current_id = 8
 
-        for primitive in self.primitives:
-            primitive_content, primitive_id = primitive.to_step(current_id)
-
-            step_content += primitive_content
-
-            product_definition_context_id = primitive_id + 1
-            step_content += "#{} = PRODUCT_DEFINITION_CONTEXT('part definition',#2,'design');\n"\
-                .format(product_definition_context_id)
-
-            product_context_id = product_definition_context_id + 1
-            step_content += "#{} = PRODUCT_CONTEXT('',#2,'mechanical');\n".format(product_context_id)
-            product_id = product_context_id + 1
-            step_content += "#{} = PRODUCT('{}','{}','',(#{}));\n".format(product_id,
-                                                                          primitive.name,
-                                                                          primitive.name,
-                                                                          product_context_id)
-            product_definition_formation_id = product_id + 1
-            step_content += "#{} = PRODUCT_DEFINITION_FORMATION('','',#{});\n".format(product_definition_formation_id, product_id)
-            product_definition_id = product_definition_formation_id + 1
-            step_content += "#{} = PRODUCT_DEFINITION('design','',#{},#{});\n".format(product_definition_id,
-                                                                                    product_definition_formation_id,
-                                                                                    product_definition_context_id)
-            product_definition_shape_id = product_definition_id + 1
-            step_content += "#{} = PRODUCT_DEFINITION_SHAPE('','',#{});\n".format(product_definition_shape_id, product_definition_id)
-            shape_definition_repr_id = product_definition_shape_id + 1
-            step_content += "#{} = SHAPE_DEFINITION_REPRESENTATION(#{},#{});\n".format(shape_definition_repr_id,
-                                                                                      product_definition_shape_id,
-                                                                                      primitive_id
-                                                                                      )
-            product_related_category = shape_definition_repr_id + 1
-            step_content += "#{} = PRODUCT_RELATED_PRODUCT_CATEGORY('part',$,(#{}));\n".format(
-                product_related_category,
-                product_id
-                )
-            draughting_id = product_related_category + 1
-            step_content += "#{} = DRAUGHTING_PRE_DEFINED_CURVE_FONT('continuous');\n".format(
-                draughting_id)
-            color_id = draughting_id + 1
-            step_content += "#{} = COLOUR_RGB('',{}, {}, {});\n".format(
-                color_id,
-                round(float(primitive.color[0]), 4),
-                round(float(primitive.color[1]), 4),
-                round(float(primitive.color[2]), 4)
+        if filename:
+            with open(filename, 'w') as f:
+                self.to_step_stream(f, filename=filename,
+                                    deduplicate=deduplicate,
+                                    processes=processes)
+                print('file written to {}'.format(os.path.abspath(filename)))
+        else:
+            stream = io.StringIO()
+            self.to_step_stream(stream, deduplicate=deduplicate,
+                                processes=processes)
+            return stream.getvalue()
+
+    def to_step_stream(self, stream, filename:str=None,
+                       deduplicate:bool=True, processes:int=1):
+        """
+        Write the STEP file of the model into a text stream, by buffered
+        chunks: memory use does not depend on the size of the model
+
+        :param deduplicate: Write identical geometric entities only once,
+            see StepWriter
+        :param processes: If greater than 1, primitives are serialized
+            independently with local ids in a pool of this number of
+            processes, then renumbered in the global id space
+        """
+        writer = StepWriter(stream, deduplicate=deduplicate)
+        writer.write(STEP_HEADER.format(name=self.name,
+                                        filename=filename,
+                                        timestamp=datetime.now().isoformat(),
+                                        version=volmdlr.__version__))
+        current_id = STEP_FIRST_ID
+        if processes > 1:
+            chunksize = max(1, len(self.primitives) // (4 * processes))
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                for content, next_id in executor.map(primitive_step_content,
+                                                     self.primitives,
+                                                     chunksize=chunksize):
+                    writer.write(step_offset_ids(content,
+                                                 current_id - STEP_FIRST_ID))
+                    current_id += next_id - STEP_FIRST_ID
+        else:
+            for primitive in self.primitives:
+                current_id = self.primitive_to_step(primitive, current_id,
+                                                    writer)
+
+        writer.write(STEP_FOOTER)
+        writer.flush()
+
+    @staticmethod
+    def primitive_to_step(primitive, current_id, writer):
+        """
+        Write the STEP records of a primitive: its shell, product and
+        styling. Returns the next free id
+        """
+        _, primitive_id = primitive.to_step(current_id, writer=writer)
+
+        step_content = ''
+
+        product_definition_context_id = primitive_id + 1
+        step_content += "#{} = PRODUCT_DEFINITION_CONTEXT('part definition',#2,'design');\n"\
+            .format(product_definition_context_id)
+
+        product_context_id = product_definition_context_id + 1
+        step_content += "#{} = PRODUCT_CONTEXT('',#2,'mechanical');\n".format(product_context_id)
+        product_id = product_context_id + 1
+        step_content += "#{} = PRODUCT('{}','{}','',(#{}));\n".format(product_id,
+                                                                      primitive.name,
+                                                                      primitive.name,
+                                                                      product_context_id)
+        product_definition_formation_id = product_id + 1
+        step_content += "#{} = PRODUCT_DEFINITION_FORMATION('','',#{});\n".format(product_definition_formation_id, product_id)
+        product_definition_id = product_definition_formation_id + 1
+        step_content += "#{} = PRODUCT_DEFINITION('design','',#{},#{});\n".format(product_definition_id,
+                                                                                product_definition_formation_id,
+                                                                                product_definition_context_id)
+        product_definition_shape_id = product_definition_id + 1
+        step_content += "#{} = PRODUCT_DEFINITION_SHAPE('','',#{});\n".format(product_definition_shape_id, product_definition_id)
+        shape_definition_repr_id = product_definition_shape_id + 1
+        step_content += "#{} = SHAPE_DEFINITION_REPRESENTATION(#{},#{});\n".format(shape_definition_repr_id,
+                                                                                  product_definition_shape_id,
+                                                                                  primitive_id
+                                                                                  )
+        product_related_category = shape_definition_repr_id + 1
+        step_content += "#{} = PRODUCT_RELATED_PRODUCT_CATEGORY('part',$,(#{}));\n".format(
+            product_related_category,
+            product_id
             )
+        draughting_id = product_related_category + 1
+        step_content += "#{} = DRAUGHTING_PRE_DEFINED_CURVE_FONT('continuous');\n".format(
+            draughting_id)
+        color_id = draughting_id + 1
+        step_content += "#{} = COLOUR_RGB('',{}, {}, {});\n".format(
+            color_id,
+            round(float(primitive.color[0]), 4),
+            round(float(primitive.color[1]), 4),
+            round(float(primitive.color[2]), 4)
+        )
 
-            curve_style_id = color_id + 1
-            step_content += "#{} = CURVE_STYLE('',#{},POSITIVE_LENGTH_MEASURE(0.1),#{});\n".format(
-                    curve_style_id, draughting_id, color_id)
+        curve_style_id = color_id + 1
+        step_content += "#{} = CURVE_STYLE('',#{},POSITIVE_LENGTH_MEASURE(0.1),#{});\n".format(
+                curve_style_id, draughting_id, color_id)
 
-            fill_area_color_id = curve_style_id + 1
-            step_content += "#{} = FILL_AREA_STYLE_COLOUR('',#{});\n".format(
-                    fill_area_color_id, color_id)
+        fill_area_color_id = curve_style_id + 1
+        step_content += "#{} = FILL_AREA_STYLE_COLOUR('',#{});\n".format(
+                fill_area_color_id, color_id)
 
-            fill_area_id = fill_area_color_id + 1
-            step_content += "#{} = FILL_AREA_STYLE('',#{});\n".format(
-                    fill_area_id, fill_area_color_id)
+        fill_area_id = fill_area_color_id + 1
+        step_content += "#{} = FILL_AREA_STYLE('',#{});\n".format(
+                fill_area_id, fill_area_color_id)
 
-            suface_fill_area_id = fill_area_id + 1
-            step_content += "#{} = SURFACE_STYLE_FILL_AREA(#{});\n".format(
-                    suface_fill_area_id, fill_area_id)
+        suface_fill_area_id = fill_area_id + 1
+        step_content += "#{} = SURFACE_STYLE_FILL_AREA(#{});\n".format(
+                suface_fill_area_id, fill_area_id)
 
-            suface_side_style_id = suface_fill_area_id + 1
-            step_content += "#{} = SURFACE_SIDE_STYLE('',(#{}));\n".format(
-                    suface_side_style_id, suface_fill_area_id)
+        suface_side_style_id = suface_fill_area_id + 1
+        step_content += "#{} = SURFACE_SIDE_STYLE('',(#{}));\n".format(
+                suface_side_style_id, suface_fill_area_id)
 
-            suface_style_usage_id = suface_side_style_id + 1
-            step_content += "#{} = SURFACE_STYLE_USAGE(.BOTH.,#{});\n".format(
-                    suface_style_usage_id, suface_side_style_id)
+        suface_style_usage_id = suface_side_style_id + 1
+        step_content += "#{} = SURFACE_STYLE_USAGE(.BOTH.,#{});\n".format(
+                suface_style_usage_id, suface_side_style_id)
 
-            presentation_style_id = suface_style_usage_id + 1
+        presentation_style_id = suface_style_usage_id + 1
 
-            step_content += "#{} = PRESENTATION_STYLE_ASSIGNMENT((#{},#{}));\n".format(
-                    presentation_style_id, suface_style_usage_id, curve_style_id)
+        step_content += "#{} = PRESENTATION_STYLE_ASSIGNMENT((#{},#{}));\n".format(
+                presentation_style_id, suface_style_usage_id, curve_style_id)
 
-            styled_item_id = presentation_style_id + 1
-            step_content += "#{} = STYLED_ITEM('color',(#{}),#{});\n".format(
-                    styled_item_id, presentation_style_id, primitive_id)
+        styled_item_id = presentation_style_id + 1
+        step_content += "#{} = STYLED_ITEM('color',(#{}),#{});\n".format(
+                styled_item_id, presentation_style_id, primitive_id)
 
-            current_id = styled_item_id + 1
+        writer.write(step_content)
+        return styled_item_id + 1
 
-        step_content += STEP_FOOTER
-        
-        if filename:
-            with open(filename, 'w') as f:
-                f.write(step_content)
-                print('file written to {}'.format(os.path.abspath(filename)))
-        else:
-            return step_content
 
+def step_offset_ids(content, offset):
+    """
+    Shift the ids of STEP content written from STEP_FIRST_ID by offset.
+    Ids of the header (lower than STEP_FIRST_ID) and quoted strings are kept
+    """
+    def offset_id(match):
+        if match.group(1) is None:
+            return match.group(0)
+        entity_id = int(match.group(1))
+        if entity_id < STEP_FIRST_ID:
+            return match.group(0)
+        return '#{}'.format(entity_id + offset)
+    return STEP_WRITER_REFERENCE.sub(offset_id, content)
+
+
+def primitive_step_content(primitive):
+    """
+    STEP content of a primitive with local ids starting at STEP_FIRST_ID.
+    Used as a worker of VolumeModel.to_step_stream in other processes.
+
+    :returns: The content and the next free local id
+    """
+    stream = io.StringIO()
+    writer = StepWriter(stream)
+    next_id = VolumeModel.primitive_to_step(primitive, STEP_FIRST_ID, writer)
+    writer.flush()
+    return stream.getvalue(), next_id
 
 class MovingVolumeModel(VolumeModel):
     def __init__(self, primitives, step_frames, name=''):
@@ -1599,8 +2918,10 @@ class MovingVolumeModel(VolumeModel):
         primitives_to_meshes = []
         for ip, primitive in enumerate(self.primitives):
             if hasattr(primitive, 'babylon_meshes'):
-                meshes.extend(primitive.babylon_meshes())
-                primitives_to_meshes.append(ip)
+                primitive_meshes = primitive.babylon_meshes()
+                if primitive_meshes:
+                    meshes.extend(primitive_meshes)
+                    primitives_to_meshes.append(ip)
 
         bbox = self._bounding_box()
         center = bbox.center
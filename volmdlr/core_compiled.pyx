@@ -10,30 +10,34 @@ Cython functions
 from typing import TypeVar, List, Tuple
 import math
 from dessia_common import DessiaObject
-import matplotlib.pyplot as plt
-from matplotlib.patches import FancyArrow, FancyArrowPatch
 import warnings
 import random
 import numpy as npy
-from mpl_toolkits.mplot3d import proj3d
+cimport cython
+from libc.math cimport cos, sin, fabs
+from volmdlr.lazy import lazy_module
+
+plt = lazy_module('matplotlib.pyplot')
+patches = lazy_module('matplotlib.patches')
+proj3d = lazy_module('mpl_toolkits.mplot3d.proj3d')
 
 # =============================================================================
 
 cdef (double, double) Csub2D(double u1, double u2,
-                             double v1, double v2):
+                             double v1, double v2) noexcept nogil:
     return (u1-v1, u2-v2)
 
 
 # =============================================================================
 
 cdef (double, double) Cadd2D(double u1, double u2,
-                             double v1, double v2,):
+                             double v1, double v2,) noexcept nogil:
     return (u1+v1, u2+v2)
 
 
 # =============================================================================
 
-cdef (double, double) Cmul2D(double u1, double u2, double value):
+cdef (double, double) Cmul2D(double u1, double u2, double value) noexcept nogil:
     return (u1*value, u2*value)
 
 #def mul2D(vector, value):
@@ -42,7 +46,7 @@ cdef (double, double) Cmul2D(double u1, double u2, double value):
 # =============================================================================
 
 cdef double CVector2DDot(double u1, double u2,
-                         double v1, double v2):
+                         double v1, double v2) noexcept nogil:
     return u1*v1 + u2*v2
 
 #def Vector2DDot(vector1, vector2):
@@ -51,7 +55,7 @@ cdef double CVector2DDot(double u1, double u2,
 
 # =============================================================================
 
-cdef double CVector2Dnorm(double u1, double u2):
+cdef double CVector2Dnorm(double u1, double u2) noexcept nogil:
     return (u1*u1 + u2*u2)**0.5
 
 #def Vector2Dnorm(vector):
@@ -60,7 +64,7 @@ cdef double CVector2Dnorm(double u1, double u2):
 # =============================================================================
 
 cdef (double, double, double) Csub3D(double u1, double u2, double u3,
-                                     double v1, double v2, double v3):
+                                     double v1, double v2, double v3) noexcept nogil:
     return (u1-v1, u2-v2, u3-v3)
 
 #def sub3D(vector1, vector2):
@@ -70,7 +74,7 @@ cdef (double, double, double) Csub3D(double u1, double u2, double u3,
 # =============================================================================
 
 cdef (double, double, double) Cadd3D(double u1, double u2, double u3,
-                                     double v1, double v2, double v3):
+                                     double v1, double v2, double v3) noexcept nogil:
     return (u1+v1, u2+v2, u3+v3)
 
 #def add3D(vector1, vector2):
@@ -80,7 +84,7 @@ cdef (double, double, double) Cadd3D(double u1, double u2, double u3,
 # =============================================================================
 
 cdef (double, double, double) Cmul3D(double u1, double u2, double u3,
-                                     double value):
+                                     double value) noexcept nogil:
     return (u1*value, u2*value, u3*value)
 
 #def mul3D(vector, value):
@@ -89,7 +93,7 @@ cdef (double, double, double) Cmul3D(double u1, double u2, double u3,
 # =============================================================================
 
 cdef double CVector3DDot(double u1, double u2, double u3,
-                         double v1, double v2, double v3):
+                         double v1, double v2, double v3) noexcept nogil:
     return u1*v1 + u2*v2 + u3*v3
 
 #def Vector3DDot(vector1, vector2):
@@ -98,7 +102,7 @@ cdef double CVector3DDot(double u1, double u2, double u3,
 
 # =============================================================================
 
-cdef double CVector3Dnorm(double u1, double u2, double u3):
+cdef double CVector3Dnorm(double u1, double u2, double u3) noexcept nogil:
     return (u1*u1 + u2*u2 + u3*u3)**0.5
 
 #def Vector3Dnorm(vector):
@@ -108,7 +112,7 @@ cdef double CVector3Dnorm(double u1, double u2, double u3):
 # =============================================================================
 
 cdef (double, double, double) CVector3D_cross(double u1, double u2, double u3,
-                                               double v1, double v2, double v3):
+                                               double v1, double v2, double v3) noexcept nogil:
     return (u2*v3 - u3*v2, u3*v1 - u1*v3, u1*v2 - u2*v1)
 
 #def vector3D_cross(vector1, vector2):
@@ -121,14 +125,15 @@ cdef (double, double, double) CVector3D_cross(double u1, double u2, double u3,
 cdef (double, double, double) C_vector3D_rotation(double vx, double vy, double vz,
                                                   double center_x, double center_y, double center_z,
                                                   double axis_x, double axis_y, double axis_z,
-                                                  double angle):
+                                                  double angle) noexcept nogil:
 
     cdef double ux = vx - center_x
     cdef double uy = vy - center_y
     cdef double uz = vz - center_z
 
-    cdef double cos_angle = math.cos(angle)
-    cdef double sin_angle = math.sin(angle)
+    cdef double cos_angle = cos(angle)
+    cdef double sin_angle = sin(angle)
+    cdef double rv2_x, rv2_y, rv2_z, rv3_x, rv3_y, rv3_z
 
     cdef double rv1_x = cos_angle*ux
     cdef double rv1_y = cos_angle*uy
@@ -154,17 +159,70 @@ def vector3D_rotation(vector, center, axis, angle):
                                    angle)
 
 
+def vectors3D_rotation(vectors, center, axis, angle):
+    """
+    Batch version of vector3D_rotation, looping without the GIL
+
+    :param vectors: An array-like of shape (N, 3)
+    :returns: The rotated vectors, an array of shape (N, 3)
+    """
+    cdef double[:, ::1] vectors_view = npy.ascontiguousarray(
+        vectors, dtype=npy.float64).reshape(-1, 3)
+    rotated = npy.empty((vectors_view.shape[0], 3))
+    cdef double[:, ::1] rotated_view = rotated
+    cdef double cx = center.x, cy = center.y, cz = center.z
+    cdef double ax = axis.x, ay = axis.y, az = axis.z
+    cdef double c_angle = angle
+    cdef Py_ssize_t i
+
+    with nogil:
+        for i in range(vectors_view.shape[0]):
+            (rotated_view[i, 0],
+             rotated_view[i, 1],
+             rotated_view[i, 2]) = C_vector3D_rotation(
+                 vectors_view[i, 0], vectors_view[i, 1], vectors_view[i, 2],
+                 cx, cy, cz, ax, ay, az, c_angle)
+    return rotated
+
+
 
 cdef (double, double, double) C_matrix_vector_multiplication3(double M11, double M12, double M13,
                                                               double M21, double M22, double M23,
                                                               double M31, double M32, double M33,
-                                                              double v1, double v2, double v3):
+                                                              double v1, double v2, double v3) noexcept nogil:
 
     return (M11*v1 + M12*v2 + M13*v3,
             M21*v1 + M22*v2 + M23*v3,
             M31*v1 + M32*v2 + M33*v3)
 
 
+def matrix_vectors_multiplication3(matrix, vectors):
+    """
+    Products of a 3x3 matrix with many vectors, looping without the GIL
+
+    :param matrix: An array-like of shape (3, 3)
+    :param vectors: An array-like of shape (N, 3)
+    :returns: An array of shape (N, 3)
+    """
+    cdef double[:, ::1] m = npy.ascontiguousarray(matrix, dtype=npy.float64)
+    cdef double[:, ::1] vectors_view = npy.ascontiguousarray(
+        vectors, dtype=npy.float64).reshape(-1, 3)
+    products = npy.empty((vectors_view.shape[0], 3))
+    cdef double[:, ::1] products_view = products
+    cdef Py_ssize_t i
+
+    with nogil:
+        for i in range(vectors_view.shape[0]):
+            (products_view[i, 0],
+             products_view[i, 1],
+             products_view[i, 2]) = C_matrix_vector_multiplication3(
+                 m[0, 0], m[0, 1], m[0, 2],
+                 m[1, 0], m[1, 1], m[1, 2],
+                 m[2, 0], m[2, 1], m[2, 2],
+                 vectors_view[i, 0], vectors_view[i, 1], vectors_view[i, 2])
+    return products
+
+
 cdef (double, double, double,
       double, double, double,
       double, double, double) Cmatrix_multiplication3(double A11, double A12, double A13,
@@ -192,7 +250,7 @@ def polygon_point_belongs(point, points):
     cdef int i
     cdef int n = len(points)
     cdef bint inside = False
-    cdef float x, y, p1x, p1y, p2x, p2y, xints
+    cdef double x, y, p1x, p1y, p2x, p2y, xints
     x,y=point
     p1x,p1y = points[0]
 
@@ -209,10 +267,60 @@ def polygon_point_belongs(point, points):
 
     return inside
 
+
+cdef bint Cpolygon_point_belongs(double x, double y,
+                                 double[:, ::1] polygon) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef Py_ssize_t n = polygon.shape[0]
+    cdef bint inside = False
+    cdef double p1x, p1y, p2x, p2y
+    cdef double xints = 0.
+
+    p1x = polygon[0, 0]
+    p1y = polygon[0, 1]
+    for i in range(1, n + 1):
+        p2x = polygon[i % n, 0]
+        p2y = polygon[i % n, 1]
+        if y > min(p1y, p2y):
+            if y <= max(p1y, p2y):
+                if x <= max(p1x, p2x):
+                    if p1y != p2y:
+                        xints = (y-p1y)*(p2x-p1x)/(p2y-p1y)+p1x
+                    if p1x == p2x or x <= xints:
+                        inside = not inside
+        p1x = p2x
+        p1y = p2y
+    return inside
+
+
+def polygon_points_belong(points, polygon):
+    """
+    Batch version of polygon_point_belongs, looping without the GIL
+
+    :param points: An array-like of shape (N, 2)
+    :param polygon: The vertices of the polygon, an array-like of shape (M, 2)
+    :returns: A boolean array of shape (N,)
+    """
+    cdef double[:, ::1] points_view = npy.ascontiguousarray(
+        points, dtype=npy.float64).reshape(-1, 2)
+    cdef double[:, ::1] polygon_view = npy.ascontiguousarray(
+        polygon, dtype=npy.float64).reshape(-1, 2)
+    mask = npy.zeros(points_view.shape[0], dtype=npy.uint8)
+    cdef unsigned char[::1] mask_view = mask
+    cdef Py_ssize_t i
+
+    if polygon_view.shape[0]:
+        with nogil:
+            for i in range(points_view.shape[0]):
+                mask_view[i] = Cpolygon_point_belongs(points_view[i, 0],
+                                                      points_view[i, 1],
+                                                      polygon_view)
+    return mask.view(npy.bool_)
+
 # =============================================================================
 
-cdef (double, (double, double)) CLineSegment2DPointDistance((double, double) p1, (double, double) p2, (double, double) point):
-    cdef double t
+cdef (double, (double, double)) CLineSegment2DPointDistance((double, double) p1, (double, double) p2, (double, double) point) noexcept nogil:
+    cdef double t, ppx, ppy, vx, vy
     cdef (double, double) u, projection
 
     u = (p2[0] - p1[0], p2[1] - p1[1])
@@ -227,32 +335,212 @@ def LineSegment2DPointDistance(points, point):
     return CLineSegment2DPointDistance(tuple(points[0]), tuple(points[1]), tuple(point))
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef int Ctriangles_ray_parity(double px, double py, double pz,
+                               double pu, double pv,
+                               double dx, double dy, double dz,
+                               double[:, :, ::1] triangles,
+                               double[:, ::1] projected_boxes,
+                               double tolerance) noexcept nogil:
+    """
+    Parity of the crossings of the ray from p in direction d with the
+    triangles (Moller-Trumbore), -1 if the ray grazes an edge or the point is
+    on a triangle. Triangles whose box projected on a plane normal to d does
+    not contain the projection (pu, pv) of p are skipped.
+    """
+    cdef Py_ssize_t i
+    cdef int crossings = 0
+    cdef double e1x, e1y, e1z, e2x, e2y, e2z, hx, hy, hz, sx, sy, sz
+    cdef double qx, qy, qz, det, u, v, t
+    cdef double epsilon = 1e-9
+
+    for i in range(triangles.shape[0]):
+        if pu < projected_boxes[i, 0] or pu > projected_boxes[i, 1] \
+                or pv < projected_boxes[i, 2] or pv > projected_boxes[i, 3]:
+            continue
+        e1x = triangles[i, 1, 0] - triangles[i, 0, 0]
+        e1y = triangles[i, 1, 1] - triangles[i, 0, 1]
+        e1z = triangles[i, 1, 2] - triangles[i, 0, 2]
+        e2x = triangles[i, 2, 0] - triangles[i, 0, 0]
+        e2y = triangles[i, 2, 1] - triangles[i, 0, 1]
+        e2z = triangles[i, 2, 2] - triangles[i, 0, 2]
+        hx, hy, hz = CVector3D_cross(dx, dy, dz, e2x, e2y, e2z)
+        det = CVector3DDot(e1x, e1y, e1z, hx, hy, hz)
+        if fabs(det) <= epsilon * CVector3Dnorm(e1x, e1y, e1z) \
+                * CVector3Dnorm(e2x, e2y, e2z):
+            # Ray parallel to the triangle
+            continue
+        sx = px - triangles[i, 0, 0]
+        sy = py - triangles[i, 0, 1]
+        sz = pz - triangles[i, 0, 2]
+        u = CVector3DDot(sx, sy, sz, hx, hy, hz) / det
+        if u < -epsilon or u > 1 + epsilon:
+            continue
+        qx, qy, qz = CVector3D_cross(sx, sy, sz, e1x, e1y, e1z)
+        v = CVector3DDot(dx, dy, dz, qx, qy, qz) / det
+        if v < -epsilon or u + v > 1 + epsilon:
+            continue
+        t = CVector3DDot(e2x, e2y, e2z, qx, qy, qz) / det
+        if t < -tolerance:
+            continue
+        if t <= tolerance or u <= epsilon or v <= epsilon \
+                or u + v >= 1 - epsilon:
+            return -1
+        crossings += 1
+    return crossings % 2
+
+
+def triangles_ray_parity(points, triangles, direction, tolerance=1e-6):
+    """
+    Classify points against a closed triangulated surface by the parity of
+    the crossings of rays of a given direction, looping without the GIL
+
+    :param points: An array-like of shape (N, 3)
+    :param triangles: The vertices of the triangles, an array-like of shape
+        (T, 3, 3)
+    :param direction: The direction of the rays, a unit Vector3D
+    :param tolerance: The distance under which a point is considered on a
+        triangle
+    :returns: An array of shape (N,) of 1 for points inside, 0 for points
+        outside and -1 for undecided points, whose ray grazes an edge or
+        which are on the surface
+    """
+    points = npy.ascontiguousarray(points, dtype=npy.float64).reshape(-1, 3)
+    triangles = npy.ascontiguousarray(triangles,
+                                      dtype=npy.float64).reshape(-1, 3, 3)
+    # Projections on a plane normal to the direction
+    normal = npy.array([direction.x, direction.y, direction.z])
+    u_axis = npy.cross(normal, npy.eye(3)[npy.argmin(npy.abs(normal))])
+    u_axis /= npy.linalg.norm(u_axis)
+    v_axis = npy.cross(normal, u_axis)
+    projections = npy.column_stack((points @ u_axis, points @ v_axis))
+    triangles_u = triangles @ u_axis
+    triangles_v = triangles @ v_axis
+    margin = tolerance + 1e-9 * (npy.abs(triangles).max()
+                                 if len(triangles) else 0.)
+    projected_boxes = npy.column_stack((triangles_u.min(axis=1) - margin,
+                                        triangles_u.max(axis=1) + margin,
+                                        triangles_v.min(axis=1) - margin,
+                                        triangles_v.max(axis=1) + margin))
+
+    cdef double[:, ::1] points_view = points
+    cdef double[:, ::1] projections_view = projections
+    cdef double[:, :, ::1] triangles_view = triangles
+    cdef double[:, ::1] boxes_view = projected_boxes
+    parities = npy.empty(points_view.shape[0], dtype=npy.int8)
+    cdef signed char[::1] parities_view = parities
+    cdef double dx = direction.x, dy = direction.y, dz = direction.z
+    cdef double c_tolerance = tolerance
+    cdef Py_ssize_t i
+
+    with nogil:
+        for i in range(points_view.shape[0]):
+            parities_view[i] = Ctriangles_ray_parity(
+                points_view[i, 0], points_view[i, 1], points_view[i, 2],
+                projections_view[i, 0], projections_view[i, 1],
+                dx, dy, dz, triangles_view, boxes_view, c_tolerance)
+    return parities
+
+
+def LineSegment2DPointsDistance(points, batch_points):
+    """
+    Batch version of LineSegment2DPointDistance, looping without the GIL
+
+    :param points: The two end points of the line segment
+    :param batch_points: An array-like of shape (N, 2)
+    :returns: The distances, an array of shape (N,), and the projections of
+        the points on the line segment, an array of shape (N, 2)
+    """
+    cdef (double, double) p1 = tuple(points[0])
+    cdef (double, double) p2 = tuple(points[1])
+    cdef double[:, ::1] points_view = npy.ascontiguousarray(
+        batch_points, dtype=npy.float64).reshape(-1, 2)
+    distances = npy.empty(points_view.shape[0])
+    projections = npy.empty((points_view.shape[0], 2))
+    cdef double[::1] distances_view = distances
+    cdef double[:, ::1] projections_view = projections
+    cdef (double, double) projection
+    cdef Py_ssize_t i
+
+    with nogil:
+        for i in range(points_view.shape[0]):
+            distances_view[i], projection = CLineSegment2DPointDistance(
+                p1, p2, (points_view[i, 0], points_view[i, 1]))
+            projections_view[i, 0] = projection[0]
+            projections_view[i, 1] = projection[1]
+    return distances, projections
+
+
 # =============================================================================
 #  Points, Vectors
 # =============================================================================
 
-class Arrow3D(FancyArrowPatch):
-    def __init__(self, xs, ys, zs, *args, **kwargs):
-        FancyArrowPatch.__init__(self, (0,0), (0,0), *args, **kwargs)
-        self._verts3d = xs, ys, zs
+def _arrow_3d_class():
+    """
+    The Arrow3D class. It derives from a matplotlib patch, so it is defined
+    at first use, and then stored in the module as Arrow3D
+    """
+    arrow_3d = globals().get('Arrow3D', None)
+    if arrow_3d is not None:
+        return arrow_3d
+
+    class Arrow3D(patches.FancyArrowPatch):
+        def __init__(self, xs, ys, zs, *args, **kwargs):
+            patches.FancyArrowPatch.__init__(self, (0,0), (0,0), *args, **kwargs)
+            self._verts3d = xs, ys, zs
+
+        def plot2d(self, renderer):
+            xs3d, ys3d, zs3d = self._verts3d
+            xs, ys, zs = proj3d.proj_transform(xs3d, ys3d, zs3d, renderer.M)
+            self.set_positions((xs[0],ys[0]),(xs[1],ys[1]))
+            patches.FancyArrowPatch.draw(self, renderer)
+
+        def plot(self, ax=None, color='b'):
+            if ax is None:
+                fig = plt.figure()
+                ax = fig.add_subplot(111, projection='3d')
+
+            points = [self.start, self.end]
+            x = [p.x for p in points]
+            y = [p.y for p in points]
+            z = [p.z for p in points]
+            ax.plot(x, y, z, 'o-k')
+            return ax
 
-    def plot2d(self, renderer):
-        xs3d, ys3d, zs3d = self._verts3d
-        xs, ys, zs = proj3d.proj_transform(xs3d, ys3d, zs3d, renderer.M)
-        self.set_positions((xs[0],ys[0]),(xs[1],ys[1]))
-        FancyArrowPatch.draw(self, renderer)
+    Arrow3D.__module__ = __name__
+    Arrow3D.__qualname__ = 'Arrow3D'
+    globals()['Arrow3D'] = Arrow3D
+    return Arrow3D
 
-    def plot(self, ax=None, color='b'):
-        if ax is None:
-            fig = plt.figure()
-            ax = fig.add_subplot(111, projection='3d')
 
-        points = [self.start, self.end]
-        x = [p.x for p in points]
-        y = [p.y for p in points]
-        z = [p.z for p in points]
-        ax.plot(x, y, z, 'o-k')
-        return ax
+def __getattr__(name):
+    # Arrow3D is defined at first access, not to import matplotlib with
+    # the module
+    if name != 'Arrow3D':
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+    return _arrow_3d_class()
+
+
+cdef class _Coordinates2D:
+    """
+    Coordinates of 2D vectors stored as C doubles, instead of Python floats
+    in an instance dict
+    """
+    cdef public double x, y
+    cdef public object name
+
+
+cdef class _Coordinates3D:
+    """
+    Coordinates of 3D vectors stored as C doubles, instead of Python floats
+    in an instance dict
+    """
+    cdef public double x, y, z
+    cdef public object name
+
 
 class Vector(DessiaObject):
     """
@@ -296,12 +584,20 @@ class Vector(DessiaObject):
         point /= n
         return point
 
-class Vector2D(Vector):
+class Vector2D(_Coordinates2D, Vector):
     def __init__(self, x:float, y:float, name=''):
         self.x = x
         self.y = y
         self.name = name
 
+    def _serializable_dict(self):
+        dict_ = Vector._serializable_dict(self)
+        dict_.update({'x': self.x, 'y': self.y, 'name': self.name})
+        return dict_
+
+    def __copy__(self):
+        return self.__class__(self.x, self.y, name=self.name)
+
     def __repr__(self):
         return '{}: [{}, {}]'.format(self.__class__.__name__, self.x, self.y)
 
@@ -477,7 +773,7 @@ class Vector2D(Vector):
             head_width = 0.3*amplitude
 
         if not normalize:
-            ax.add_patch(FancyArrow(origin[0], origin[1],
+            ax.add_patch(patches.FancyArrow(origin[0], origin[1],
                                     self.x*amplitude, self.y*amplitude,
                                     width=width,
                                     head_width=head_width,
@@ -486,7 +782,7 @@ class Vector2D(Vector):
         else:
             normalized_vector = self.copy()
             normalized_vector.normalize()
-            ax.add_patch(FancyArrow(origin[0], origin[1],
+            ax.add_patch(patches.FancyArrow(origin[0], origin[1],
                                     normalized_vector.x*amplitude,
                                     normalized_vector.y*amplitude,
                                     width=width,
@@ -649,7 +945,7 @@ class Point2D(Vector2D):
 
 O2D = Point2D(0, 0)
 
-class Vector3D(Vector):
+class Vector3D(_Coordinates3D, Vector):
 
     def __init__(self, x:float, y:float, z:float, name:str=''):
         self.x = x
@@ -657,6 +953,15 @@ class Vector3D(Vector):
         self.z = z
         self.name = name
 
+    def _serializable_dict(self):
+        dict_ = Vector._serializable_dict(self)
+        dict_.update({'x': self.x, 'y': self.y, 'z': self.z,
+                      'name': self.name})
+        return dict_
+
+    def __copy__(self):
+        return self.__class__(self.x, self.y, self.z, name=self.name)
+
     def __repr__(self):
         return '{}: [{}, {}, {}]'.format(self.__class__.__name__, self.x, self.y, self.z)
 
@@ -714,6 +1019,8 @@ class Vector3D(Vector):
         return 0
 
     def __eq__(self, other_vector:'Vector3D'):
+        if other_vector is self:
+            return True
         if other_vector.__class__.__name__ not in ['Vector3D', 'Point3D']:
             return False
         return math.isclose(self.x, other_vector.x, abs_tol=1e-06) \
@@ -942,9 +1249,9 @@ class Vector3D(Vector):
         ys = [starting_point[1], self.y+starting_point[1]]
         zs = [starting_point[2], self.z+starting_point[2]]
         if color:
-            a = Arrow3D(xs, ys, zs, mutation_scale=10, lw=3, arrowstyle="-|>", color=color)
+            a = _arrow_3d_class()(xs, ys, zs, mutation_scale=10, lw=3, arrowstyle="-|>", color=color)
         else:
-            a = Arrow3D(xs, ys, zs, mutation_scale=10, lw=3, arrowstyle="-|>")
+            a = _arrow_3d_class()(xs, ys, zs, mutation_scale=10, lw=3, arrowstyle="-|>")
         ax.add_artist(a)
         return ax
 
@@ -1036,6 +1343,173 @@ class Point3D(Vector3D):
 
 O3D = Point3D(0, 0, 0)
 
+# =============================================================================
+#  Arrays of points
+# =============================================================================
+
+class Points2D:
+    """
+    A batch of 2D points stored in a (N, 2) array of floats, transformed at
+    once instead of point by point
+
+    :param array: An array-like of shape (N, 2)
+    """
+    def __init__(self, array):
+        self.array = npy.asarray(array, dtype=float).reshape(-1, 2)
+
+    def __len__(self):
+        return self.array.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.__class__(self.array[key])
+        return Point2D(*self.array[key].tolist())
+
+    def __repr__(self):
+        return '{}: {} points'.format(self.__class__.__name__, len(self))
+
+    @classmethod
+    def from_points(cls, points):
+        return cls(npy.array([(point.x, point.y) for point in points],
+                             dtype=float))
+
+    def to_points(self):
+        return [Point2D(x, y) for x, y in self.array.tolist()]
+
+    def copy(self):
+        return self.__class__(self.array.copy())
+
+    def point_distance(self, point2):
+        """
+        Distances to a point, or to the points of a Points2D of same length
+        """
+        if isinstance(point2, Points2D):
+            other = point2.array
+        else:
+            other = npy.array([point2.x, point2.y])
+        return npy.linalg.norm(self.array - other, axis=1)
+
+    def rotation(self, center, angle, copy=True):
+        cos_angle = math.cos(angle)
+        sin_angle = math.sin(angle)
+        center = npy.array([center.x, center.y])
+        array = (self.array - center).dot(npy.array([[cos_angle, sin_angle],
+                                                     [-sin_angle, cos_angle]]))
+        array += center
+        if copy:
+            return self.__class__(array)
+        self.array = array
+
+    def translation(self, offset, copy=True):
+        array = self.array + npy.array([offset.x, offset.y])
+        if copy:
+            return self.__class__(array)
+        self.array = array
+
+    def to_3d(self, plane_origin, vx, vy):
+        return Points3D(npy.outer(self.array[:, 0], [vx.x, vx.y, vx.z])
+                        + npy.outer(self.array[:, 1], [vy.x, vy.y, vy.z])
+                        + npy.array([plane_origin.x, plane_origin.y,
+                                     plane_origin.z]))
+
+
+class Points3D:
+    """
+    A batch of 3D points stored in a (N, 3) array of floats, transformed at
+    once instead of point by point
+
+    :param array: An array-like of shape (N, 3)
+    """
+    def __init__(self, array):
+        self.array = npy.asarray(array, dtype=float).reshape(-1, 3)
+
+    def __len__(self):
+        return self.array.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.__class__(self.array[key])
+        return Point3D(*self.array[key].tolist())
+
+    def __repr__(self):
+        return '{}: {} points'.format(self.__class__.__name__, len(self))
+
+    @classmethod
+    def from_points(cls, points):
+        return cls(npy.array([(point.x, point.y, point.z) for point in points],
+                             dtype=float))
+
+    def to_points(self):
+        return [Point3D(x, y, z) for x, y, z in self.array.tolist()]
+
+    def copy(self):
+        return self.__class__(self.array.copy())
+
+    def point_distance(self, point2):
+        """
+        Distances to a point, or to the points of a Points3D of same length
+        """
+        if isinstance(point2, Points3D):
+            other = point2.array
+        else:
+            other = npy.array([point2.x, point2.y, point2.z])
+        return npy.linalg.norm(self.array - other, axis=1)
+
+    def rotation(self, center, axis, angle, copy=True):
+        """
+        rotation of angle around axis, with the Rodrigues formula as
+        Vector3D.rotation
+        """
+        cos_angle = math.cos(angle)
+        center = npy.array([center.x, center.y, center.z])
+        axis = npy.array([axis.x, axis.y, axis.z])
+        vectors = self.array - center
+        array = (vectors * cos_angle
+                 + npy.outer(vectors.dot(axis), axis) * (1 - cos_angle)
+                 + npy.cross(axis, vectors) * math.sin(angle)
+                 + center)
+        if copy:
+            return self.__class__(array)
+        self.array = array
+
+    def translation(self, offset, copy=True):
+        array = self.array + npy.array([offset.x, offset.y, offset.z])
+        if copy:
+            return self.__class__(array)
+        self.array = array
+
+    def frame_mapping(self, frame, side, copy=True):
+        """
+        side = 'old' or 'new'
+        """
+        if side == 'old':
+            points = frame.old_coordinates(self)
+        elif side == 'new':
+            points = frame.new_coordinates(self)
+        else:
+            raise ValueError('side must be either old or new')
+        if copy:
+            return points
+        self.array = points.array
+
+    def plane_projection3d(self, plane_origin, x, y):
+        z = npy.cross([x.x, x.y, x.z], [y.x, y.y, y.z])
+        z /= npy.linalg.norm(z)
+        origin = npy.array([plane_origin.x, plane_origin.y, plane_origin.z])
+        return self.__class__(
+            self.array - npy.outer((self.array - origin).dot(z), z))
+
+    def plane_projection2d(self, plane_origin, x, y):
+        projection = self.plane_projection3d(plane_origin, x, y).array
+        return Points2D(npy.column_stack(
+            (projection.dot([x.x, x.y, x.z]), projection.dot([y.x, y.y, y.z]))))
+
+    def to_2d(self, plane_origin, x, y):
+        array = self.array - npy.array([plane_origin.x, plane_origin.y,
+                                        plane_origin.z])
+        return Points2D(npy.column_stack((array.dot([x.x, x.y, x.z]),
+                                          array.dot([y.x, y.y, y.z]))))
+
 # =============================================================================
 #  Basis, Frames
 # =============================================================================
@@ -1426,21 +1900,107 @@ class Basis3D(Basis):
         self.v = vect_v
         self.w = vect_w
 
-    def transfer_matrix(self):
+    def _matrix_key(self):
+        return (self.u.x, self.u.y, self.u.z,
+                self.v.x, self.v.y, self.v.z,
+                self.w.x, self.w.y, self.w.z)
+
+    def _cached_matrix(self, name, compute):
+        """
+        Matrices are cached as long as the coordinates of the basis are
+        unchanged, as frames are applied to many points
+        """
+        key = self._matrix_key()
+        cache = getattr(self, '_matrix_cache', None)
+        if cache is None or cache[0] != key:
+            cache = (key, {})
+            self._matrix_cache = cache
+        matrices = cache[1]
+        if name not in matrices:
+            matrices[name] = compute()
+        return matrices[name]
+
+    def _transfer_matrix(self):
         return Matrix33(self.u.x, self.v.x, self.w.x,
                         self.u.y, self.v.y, self.w.y,
                         self.u.z, self.v.z, self.w.z)
 
-    def inverse_transfer_matrix(self):
+    def _inverse_transfer_matrix(self):
         return self.transfer_matrix().inverse()
 
+    def _transfer_array(self):
+        array = self.transfer_matrix().to_numpy()
+        array.flags.writeable = False
+        return array
+
+    def _inverse_transfer_array(self):
+        array = self.inverse_transfer_matrix().to_numpy()
+        array.flags.writeable = False
+        return array
+
+    def _homogeneous_matrix(self):
+        matrix = npy.identity(4)
+        matrix[:3, :3] = self._cached_matrix('transfer_array',
+                                             self._transfer_array)
+        matrix.flags.writeable = False
+        return matrix
+
+    def _inverse_homogeneous_matrix(self):
+        matrix = npy.identity(4)
+        matrix[:3, :3] = self._cached_matrix('inverse_transfer_array',
+                                             self._inverse_transfer_array)
+        matrix.flags.writeable = False
+        return matrix
+
+    def transfer_matrix(self):
+        return self._cached_matrix('transfer_matrix', self._transfer_matrix)
+
+    def inverse_transfer_matrix(self):
+        return self._cached_matrix('inverse_transfer_matrix',
+                                   self._inverse_transfer_matrix)
+
+    def homogeneous_matrix(self):
+        """
+        The (4, 4) read-only array mapping homogeneous local coordinates to
+        global ones
+        """
+        return self._cached_matrix('homogeneous_matrix',
+                                   self._homogeneous_matrix)
+
+    def inverse_homogeneous_matrix(self):
+        """
+        The (4, 4) read-only array mapping homogeneous global coordinates to
+        local ones
+        """
+        return self._cached_matrix('inverse_homogeneous_matrix',
+                                   self._inverse_homogeneous_matrix)
+
+    def _array_mapping(self, points, matrix):
+        """
+        Maps an (N, 3) array or a Points3D with a (4, 4) homogeneous matrix
+        """
+        if isinstance(points, Points3D):
+            return Points3D(self._array_mapping(points.array, matrix))
+        array = npy.asarray(points, dtype=float)
+        return array.dot(matrix[:3, :3].T) + matrix[:3, 3]
+
     def new_coordinates(self, vector):
-        matrix = self.inverse_transfer_matrix()
-        return matrix.vector_multiplication(vector)
+        """
+        :param vector: A Vector3D, a Points3D or an (N, 3) array
+        """
+        if isinstance(vector, Vector3D):
+            matrix = self.inverse_transfer_matrix()
+            return matrix.vector_multiplication(vector)
+        return self._array_mapping(vector, self.inverse_homogeneous_matrix())
 
     def old_coordinates(self, point):
-        matrix = self.transfer_matrix()
-        return matrix.vector_multiplication(point)
+        """
+        :param point: A Vector3D, a Points3D or an (N, 3) array
+        """
+        if isinstance(point, Vector3D):
+            matrix = self.transfer_matrix()
+            return matrix.vector_multiplication(point)
+        return self._array_mapping(point, self.homogeneous_matrix())
 
     def copy(self):
         return Basis3D(self.u, self.v, self.w)
@@ -1575,26 +2135,13 @@ class Frame3D(Basis3D):
 
 
     def __add__(self, other_frame):
-        P1 = self.transfer_matrix()
-        new_origin = P1.vector_multiplication(other_frame.origin) + self.origin
-
-
-        M = P1 * other_frame.transfer_matrix()
-        return Frame3D(new_origin,
-                       Vector3D(M.M11, M.M21, M.M31),
-                       Vector3D(M.M12, M.M22, M.M32),
-                       Vector3D(M.M13, M.M23, M.M33))
-
+        return Frame3D.from_homogeneous_matrix(
+            self.homogeneous_matrix().dot(other_frame.homogeneous_matrix()))
 
     def __sub__(self, other_frame):
-        P1inv = other_frame.inverse_transfer_matrix()
-        P2 = self.transfer_matrix()
-        new_origin = P1inv.vector_multiplication(self.origin - other_frame.origin)
-        M = P1inv * P2
-        return Frame3D(new_origin,
-                       Vector3D(M.M11, M.M21, M.M31),
-                       Vector3D(M.M12, M.M22, M.M32),
-                       Vector3D(M.M13, M.M23, M.M33))
+        return Frame3D.from_homogeneous_matrix(
+            other_frame.inverse_homogeneous_matrix().dot(
+                self.homogeneous_matrix()))
 
     def __round__(self, ndigits=6):
         return self.__class__(round(self.origin, ndigits),
@@ -1608,13 +2155,50 @@ class Frame3D(Basis3D):
     def basis(self):
         return Basis3D(self.u, self.v, self.w)
 
+    @classmethod
+    def from_homogeneous_matrix(cls, matrix, name:str=''):
+        """
+        The frame of a (4, 4) homogeneous matrix, such as the one of
+        homogeneous_matrix
+        """
+        (ux, vx, wx, ox), (uy, vy, wy, oy), (uz, vz, wz, oz) = \
+            matrix[:3].tolist()
+        return cls(Point3D(ox, oy, oz), Vector3D(ux, uy, uz),
+                   Vector3D(vx, vy, vz), Vector3D(wx, wy, wz), name)
+
+    def _matrix_key(self):
+        return Basis3D._matrix_key(self) + (self.origin.x, self.origin.y,
+                                            self.origin.z)
+
+    def _homogeneous_matrix(self):
+        matrix = npy.identity(4)
+        matrix[:3, :3] = self._cached_matrix('transfer_array',
+                                             self._transfer_array)
+        matrix[:3, 3] = (self.origin.x, self.origin.y, self.origin.z)
+        matrix.flags.writeable = False
+        return matrix
+
+    def _inverse_homogeneous_matrix(self):
+        inverse = self._cached_matrix('inverse_transfer_array',
+                                      self._inverse_transfer_array)
+        matrix = npy.identity(4)
+        matrix[:3, :3] = inverse
+        matrix[:3, 3] = -inverse.dot((self.origin.x, self.origin.y,
+                                      self.origin.z))
+        matrix.flags.writeable = False
+        return matrix
+
     def new_coordinates(self, vector):
         """ You have to give coordinates in the global landmark """
-        return Basis3D.new_coordinates(self, vector - self.origin)
+        if isinstance(vector, Vector3D):
+            return Basis3D.new_coordinates(self, vector - self.origin)
+        return self._array_mapping(vector, self.inverse_homogeneous_matrix())
 
     def old_coordinates(self, vector):
         """ You have to give coordinates in the local landmark """
-        return Basis3D.old_coordinates(self, vector) + self.origin
+        if isinstance(vector, Vector3D):
+            return Basis3D.old_coordinates(self, vector) + self.origin
+        return self._array_mapping(vector, self.homogeneous_matrix())
 
     def rotation(self, axis, angle, copy=True):
         new_base = Basis3D.rotation(self, axis, angle, copy=True)
@@ -1628,7 +2212,8 @@ class Frame3D(Basis3D):
     def translation(self, offset, copy=True):
         if copy:
             return Frame3D(self.origin.translation(offset, copy=True), self.u, self.v, self.w, self.name)
-        self.origin.translation(offset, copy=False)
+        # The origin may be shared with other objects: it is replaced, not moved
+        self.origin = self.origin.translation(offset, copy=True)
 
     def copy(self):
         return Frame3D(self.origin.copy(), self.u.copy(), self.v.copy(), self.w.copy())
@@ -5,7 +5,8 @@
 """
 from typing import List, Tuple
 import math
-import matplotlib.pyplot as plt
+from volmdlr.lazy import lazy_module
+plt = lazy_module('matplotlib.pyplot')
 import dessia_common as dc
 import volmdlr.edges
 
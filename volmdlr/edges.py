@@ -13,16 +13,17 @@ from geomdl import BSpline
 
 from geomdl.operations import length_curve
 
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib import __version__ as _mpl_version
-import matplotlib.pyplot as plt
-import matplotlib.patches
 from typing import List
 
 import dessia_common as dc
 import volmdlr.core
 import volmdlr.geometry
-import plot_data.core as plot_data
+from volmdlr.lazy import lazy_module
+
+plt = lazy_module('matplotlib.pyplot')
+patches = lazy_module('matplotlib.patches')
+mplot3d = lazy_module('mpl_toolkits.mplot3d')
+plot_data = lazy_module('plot_data.core')
 
 
 def standardize_knot_vector(knot_vector):
@@ -273,7 +274,7 @@ class Line2D(Line):
         if ax is None:
             fig, ax = plt.subplots()
 
-        if version.parse(_mpl_version) >= version.parse('3.3.2'):
+        if version.parse(plt.matplotlib.__version__) >= version.parse('3.3.2'):
             if dashed:
                 ax.axline((self.point1.x, self.point1.y),
                           (self.point2.x, self.point2.y),
@@ -759,7 +760,7 @@ class LineSegment2D(LineSegment):
             else:
                 self.points = [frame.NewCoordinates(p) for p in self.points]
 
-    def plot_data(self, edge_style: plot_data.EdgeStyle = None):
+    def plot_data(self, edge_style: 'plot_data.EdgeStyle' = None):
         return plot_data.LineSegment(data=[self.start.x, self.start.y,
                                            self.end.x, self.end.y],
                                         edge_style=edge_style)
@@ -972,7 +973,7 @@ class Arc2D(Edge):
             for p in [self.center, self.start, self.interior, self.end]:
                 p.plot(ax=ax, color=color, alpha=alpha)
 
-        ax.add_patch(matplotlib.patches.Arc(self.center, 2 * self.radius, 2 * self.radius, angle=0,
+        ax.add_patch(patches.Arc(self.center, 2 * self.radius, 2 * self.radius, angle=0,
                                             theta1=self.angle1 * 0.5 / math.pi * 360,
                                             theta2=self.angle2 * 0.5 / math.pi * 360,
                                             color=color,
@@ -1057,7 +1058,7 @@ class Arc2D(Edge):
         
         return arc_to_nodes[self] 
       
-    def plot_data(self, edge_style: plot_data.EdgeStyle = None):
+    def plot_data(self, edge_style: 'plot_data.EdgeStyle' = None):
 
         list_node = self.polygon_points()
         data = []
@@ -1170,7 +1171,7 @@ class FullArc2D(Edge):
             fig, ax = plt.subplots()
 
         if self.radius > 0:
-            ax.add_patch(matplotlib.patches.Arc((self.center.x, self.center.y),
+            ax.add_patch(patches.Arc((self.center.x, self.center.y),
                                                 2 * self.radius,
                                                 2 * self.radius,
                                                 angle=0,
@@ -1385,7 +1386,7 @@ class Line3D(Line):
 
     def plot(self, ax=None, color='k', alpha=1, dashed=True):
         if ax is None:
-            ax = Axes3D(plt.figure())
+            ax = mplot3d.Axes3D(plt.figure())
 
 
         # Line segment
@@ -2455,7 +2456,7 @@ class Arc3D(Edge):
              edge_ends=False, edge_direction=False):
         if ax is None:
             fig = plt.figure()
-            ax = Axes3D(fig)
+            ax = mplot3d.Axes3D(fig)
         else:
             fig = None
         # if plot_points:
@@ -2910,7 +2911,7 @@ class FullArc3D(Edge):
              edge_direction=False):
         if ax is None:
             fig = plt.figure()
-            ax = Axes3D(fig)
+            ax = mplot3d.Axes3D(fig)
 
         x = []
         y = []
@@ -3113,7 +3114,7 @@ class ArcEllipse3D(Edge):
     def plot(self, ax=None):
         if ax is None:
             fig = plt.figure()
-            ax = Axes3D(fig)
+            ax = mplot3d.Axes3D(fig)
         else:
             fig = None
 
@@ -3,12 +3,12 @@
 """
 
 """
+import io
 import triangle
 from typing import List, Tuple
 import math
 import numpy as npy
 import scipy as scp
-import matplotlib.pyplot as plt
 import dessia_common as dc
 from geomdl import BSpline
 import volmdlr.core
@@ -16,6 +16,17 @@ import volmdlr.core_compiled
 import volmdlr.edges as vme
 import volmdlr.wires
 import volmdlr.display
+import volmdlr.parallel
+from volmdlr.lazy import lazy_module
+
+plt = lazy_module('matplotlib.pyplot')
+
+# Fixed directions of the rays classifying points against closed shells, not
+# aligned with the usual edges, so that results are reproducible
+RAY_DIRECTIONS = [vector / vector.norm() for vector in
+                  (volmdlr.Vector3D(0.6398, 0.5237, 0.5623),
+                   volmdlr.Vector3D(-0.4319, 0.7416, 0.5131),
+                   volmdlr.Vector3D(0.2891, -0.3578, 0.8878))]
 
 
 class Surface2D(volmdlr.core.Primitive2D):
@@ -45,6 +56,19 @@ class Surface2D(volmdlr.core.Primitive2D):
 
         return True
 
+    def points_belong(self, points2d):
+        """
+        Batch version of point_belongs
+
+        :param points2d: A list of Point2D, a Points2D or an (N, 2) array
+        :returns: A boolean array
+        """
+        points2d = volmdlr.wires.points_2d_array(points2d)
+        mask = self.outer_contour.points_belong(points2d)
+        for inner_contour in self.inner_contours:
+            mask &= ~inner_contour.points_belong(points2d)
+        return mask
+
     def triangulation(self, min_x_density=None, min_y_density=None):
         if self.area() == 0.:
             return volmdlr.display.DisplayMesh2D([], triangles=[])
@@ -1854,6 +1878,13 @@ class Face3D(volmdlr.core.Primitive3D):
         return [self.surface3d.contour2d_to_3d(c) for c in
                 self.surface2d.inner_contours]
 
+    def triangulation_is_exact(self):
+        """
+        Whether the triangulation of the face is the face itself, and not an
+        approximation
+        """
+        return False
+
     def _bounding_box(self):
         """
         this error is raised to enforce overloading of this method
@@ -2094,6 +2125,12 @@ class PlaneFace3D(Face3D):
         """
         return self.outer_contour3d._bounding_box()
 
+    def triangulation_is_exact(self):
+        return all(isinstance(primitive, vme.LineSegment2D)
+                   for contour in ([self.surface2d.outer_contour]
+                                   + self.surface2d.inner_contours)
+                   for primitive in contour.primitives)
+
     # def average_center_point(self):
     #     """
     #     excluding holes
@@ -2119,25 +2156,25 @@ class PlaneFace3D(Face3D):
         # On utilise le theroeme de Pythagore pour calculer
         # la distance minimale entre le point et le contour
 
-        projected_pt = point.PlaneProjection3D(self.plane.origin,
-                                               self.plane.vectors[0],
-                                               self.plane.vectors[1])
+        frame = self.surface3d.frame
+        projected_pt = point.plane_projection3d(frame.origin, frame.u,
+                                                frame.v)
         projection_distance = point.point_distance(projected_pt)
 
-        if self.point_on_face(projected_pt):
+        if self.point_belongs(projected_pt):
             if return_other_point:
                 return projection_distance, projected_pt
             return projection_distance
 
-        point_2D = point.to_2d(self.plane.origin, self.plane.vectors[0],
-                               self.plane.vectors[1])
+        point_2D = point.to_2d(frame.origin, frame.u, frame.v)
 
-        border_distance, other_point = self.polygon2D.PointBorderDistance(
+        polygon2d = self.surface2d.outer_contour.to_polygon(
+            angle_resolution=10)
+        border_distance, other_point = polygon2d.point_border_distance(
             point_2D, return_other_point=True)
 
-        other_point = other_point.to_3d(self.plane.origin,
-                                        self.plane.vectors[0],
-                                        self.plane.vectors[1])
+        other_point = volmdlr.Point2D(other_point[0], other_point[1]).to_3d(
+            frame.origin, frame.u, frame.v)
 
         if return_other_point:
             return (projection_distance ** 2 + border_distance ** 2) ** 0.5, \
@@ -3459,6 +3496,8 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
             self.color = color
         self.alpha = alpha
         self.bounding_box = self._bounding_box()
+        self._faces_bvh = None
+        self._classification_mesh = None
 
     def __hash__(self):
         return sum([hash(f) for f in self.faces])
@@ -3478,17 +3517,26 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
             faces.append(object_dict[int(face[1:])])
         return cls(faces, name=arguments[0][1:-1])
 
-    def to_step(self, current_id):
-        step_content = ''
+    def to_step(self, current_id, writer=None):
+        """
+        :param writer: A volmdlr.core.StepWriter. If given, the content is
+            emitted into it face by face and an empty string is returned
+        """
+        if writer is None:
+            stream = io.StringIO()
+            writer = volmdlr.core.StepWriter(stream)
+        else:
+            stream = None
+
         face_ids = []
         for face in self.faces:
             face_content, face_sub_ids = face.to_step(current_id)
-            step_content += face_content
+            writer.write(face_content)
             face_ids.extend(face_sub_ids)
             current_id = max(face_sub_ids) + 1
 
         shell_id = current_id
-        step_content += "#{} = {}('{}',({}));\n".format(current_id,
+        step_content = "#{} = {}('{}',({}));\n".format(current_id,
                                                         self.STEP_FUNCTION,
                                                         self.name,
                                                         volmdlr.core.step_ids_to_str(
@@ -3504,8 +3552,12 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
         brep_id = frame_id + 1
         step_content += "#{} = ADVANCED_BREP_SHAPE_REPRESENTATION('',(#{},#{}),#7);\n".format(
             brep_id, frame_id, manifold_id)
+        writer.write(step_content)
 
-        return step_content, brep_id
+        if stream is None:
+            return '', brep_id
+        writer.flush()
+        return stream.getvalue(), brep_id
 
     def rotation(self, center, axis, angle, copy=True):
         if copy:
@@ -3513,9 +3565,8 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
                          in self.faces]
             return self.__class__(new_faces, color=self.color, alpha=self.alpha, name=self.name)
         else:
-            for face in self.faces:
-                face.rotation(center, axis, angle, copy=False)
-            self.bounding_box = self._bounding_box()
+            self._transform_faces(lambda face: face.rotation(
+                center, axis, angle, copy=False))
 
     def translation(self, offset, copy=True):
         if copy:
@@ -3523,9 +3574,8 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
                          self.faces]
             return self.__class__(new_faces, color=self.color, alpha=self.alpha, name=self.name)
         else:
-            for face in self.faces:
-                face.translation(offset, copy=False)
-            self.bounding_box = self._bounding_box()
+            self._transform_faces(lambda face: face.translation(
+                offset, copy=False))
 
     def frame_mapping(self, frame, side, copy=True):
         """
@@ -3536,9 +3586,24 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
                          self.faces]
             return OpenShell3D(new_faces, name=self.name)
         else:
-            for face in self.faces:
-                face.frame_mapping(frame, side, copy=False)
-            self.bounding_box = self._bounding_box()
+            self._transform_faces(lambda face: face.frame_mapping(
+                frame, side, copy=False))
+
+    def _transform_faces(self, transform):
+        """
+        Apply in place transform to the faces. Faces may share their surface
+        (see volmdlr.step.StepEntityPool): it is transformed only once.
+        """
+        transformed_surfaces = set()
+        for face in self.faces:
+            if id(face.surface3d) in transformed_surfaces:
+                face.bounding_box = face._bounding_box()
+            else:
+                transformed_surfaces.add(id(face.surface3d))
+                transform(face)
+        self.bounding_box = self._bounding_box()
+        self._faces_bvh = None
+        self._classification_mesh = None
 
     def copy(self):
         new_faces = [face.copy() for face in self.faces]
@@ -3580,18 +3645,27 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
         """
         Returns the boundary box
         """
-        bbox = self.faces[0]._bounding_box()
+        return volmdlr.core.BoundingBoxArray.from_bounding_boxes(
+            [face._bounding_box() for face in self.faces]).union()
 
-        for face in self.faces[1:]:
-            bbox += face._bounding_box()
-
-        return bbox
+    @property
+    def faces_bvh(self):
+        """
+        The bounding volume hierarchy of the faces bounding boxes, built at
+        first use
+        """
+        if getattr(self, '_faces_bvh', None) is None:
+            self._faces_bvh = volmdlr.core.BoundingVolumeHierarchy(
+                [face.bounding_box for face in self.faces])
+        return self._faces_bvh
 
     def linesegment_intersections(self,
                                  linesegment3d:vme.LineSegment3D)\
             -> List[Tuple[Face3D, List[volmdlr.Point3D]]]:
         intersections = []
-        for face in self.faces:
+        for index in self.faces_bvh.segment_query(linesegment3d.start,
+                                                  linesegment3d.end):
+            face = self.faces[index]
             face_intersections = face.linesegment_intersections(linesegment3d)
             if face_intersections:
                 intersections.append((face, face_intersections))
@@ -3638,16 +3712,9 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
         """
         Computes the distance of a point to a Shell3D, whether it is inside or outside the Shell3D
         """
-        distance_min, point1_min = self.faces[0].distance_to_point(point,
-                                                                   return_other_point=True)
-        for face in self.faces[1:]:
-            bbox_distance = self.bounding_box.distance_to_point(point)
-            if bbox_distance < distance_min:
-                distance, point1 = face.distance_to_point(point,
-                                                          return_other_point=True)
-                if distance < distance_min:
-                    distance_min, point1_min = distance, point1
-
+        _, _, point1_min = self.faces_bvh.nearest(
+            point, lambda index: self.faces[index].distance_to_point(
+                point, return_other_point=True))
         return point1_min
 
     def intersection_internal_aabb_volume(self, shell2: 'OpenShell3D',
@@ -3662,12 +3729,13 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
                 if intersection_points is not None:
                     intersections_points.extend(intersection_points)
 
-        shell1_points_inside_shell2 = []
+        points = []
         for face in self.faces:
-            for point in face.outer_contour3d.discretization_points(
-                    resolution):
-                if shell2.point_belongs(point):
-                    shell1_points_inside_shell2.append(point)
+            points.extend(face.outer_contour3d.discretization_points(
+                resolution))
+        inside = shell2.points_belong(points)
+        shell1_points_inside_shell2 = [point for point, point_inside
+                                       in zip(points, inside) if point_inside]
 
         if len(intersections_points + shell1_points_inside_shell2) == 0:
             return 0
@@ -3687,12 +3755,14 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
                 if intersection_points is not None:
                     intersections_points.extend(intersection_points)
 
-        shell1_points_outside_shell2 = []
+        points = []
         for face in self.faces:
-            for point in face.outer_contour3d.discretization_points(
-                    resolution):
-                if not shell2.point_belongs(point):
-                    shell1_points_outside_shell2.append(point)
+            points.extend(face.outer_contour3d.discretization_points(
+                resolution))
+        inside = shell2.points_belong(points)
+        shell1_points_outside_shell2 = [point for point, point_inside
+                                        in zip(points, inside)
+                                        if not point_inside]
 
         if len(intersections_points + shell1_points_outside_shell2) == 0:
             return 0
@@ -3705,6 +3775,37 @@ class OpenShell3D(volmdlr.core.CompositePrimitive3D):
             bbox = primitive.bounding_box
 
 
+    def classification_mesh(self):
+        """
+        The triangles of the faces used to classify points, computed at first
+        use
+
+        :returns: The vertices of the triangles, an array of shape (T, 3, 3),
+            and the bounding boxes of the faces that the triangles only
+            approximate, curved faces and faces that could not be
+            triangulated, an array of shape (F, 6)
+        """
+        if getattr(self, '_classification_mesh', None) is None:
+            triangles = [npy.empty((0, 3, 3))]
+            approximated_boxes = [npy.empty((0, 6))]
+            for face in self.faces:
+                try:
+                    mesh = face.triangulation()
+                except NotImplementedError:
+                    mesh = None
+                if mesh is not None and mesh.triangles:
+                    points = npy.array([(point.x, point.y, point.z)
+                                        for point in mesh.points])
+                    triangles.append(points[npy.array(mesh.triangles)])
+                if mesh is None or not face.triangulation_is_exact():
+                    bbox = face.bounding_box
+                    approximated_boxes.append(npy.array(
+                        [[bbox.xmin, bbox.xmax, bbox.ymin, bbox.ymax,
+                          bbox.zmin, bbox.zmax]]))
+            self._classification_mesh = (npy.concatenate(triangles),
+                                         npy.concatenate(approximated_boxes))
+        return self._classification_mesh
+
     def triangulation(self):
         mesh = volmdlr.display.DisplayMesh3D([], [])
         for i, face in enumerate(self.faces):
@@ -3797,14 +3898,8 @@ class ClosedShell3D(OpenShell3D):
 
         nb_pts1 = len(points1)
         nb_pts2 = len(points2)
-        compteur1 = 0
-        compteur2 = 0
-        for point1 in points1:
-            if shell2.point_belongs(point1):
-                compteur1 += 1
-        for point2 in points2:
-            if self.point_belongs(point2):
-                compteur2 += 1
+        compteur1 = int(npy.count_nonzero(shell2.points_belong(points1)))
+        compteur2 = int(npy.count_nonzero(self.points_belong(points2)))
 
         inter1 = compteur1 / nb_pts1
         inter2 = compteur2 / nb_pts2
@@ -3819,6 +3914,87 @@ class ClosedShell3D(OpenShell3D):
             return None
         return 1
 
+    def points_belong(self, points, tolerance: float = 1e-6):
+        """
+        Batch version of point_belongs, with reproducible results. The points
+        are classified by the parity of the crossings of a ray of fixed
+        direction with the triangles of classification_mesh. Points whose ray
+        grazes an edge, and points near faces that the triangles only
+        approximate, are classified with rays crossing the faces.
+
+        :param points: A list of Point3D, a Points3D or an (N, 3) array
+        :param tolerance: The distance under which a point is considered on
+            a triangle or near a face
+        :returns: A boolean array
+        """
+        array = volmdlr.wires.points_3d_array(points)
+        bbox = self.bounding_box
+        mask = volmdlr.core.BoundingBoxArray.from_bounding_boxes(
+            [bbox]).point_belongs(array)[0]
+        candidates = npy.flatnonzero(mask)
+        if not len(candidates):
+            return mask
+
+        triangles, approximated_boxes = self.classification_mesh()
+        parities = volmdlr.parallel.map_batches(
+            volmdlr.core_compiled.triangles_ray_parity, array[candidates],
+            triangles, RAY_DIRECTIONS[0], tolerance)
+        mask[candidates] = parities == 1
+
+        undecided = parities == -1
+        if len(approximated_boxes):
+            boxes = volmdlr.core.BoundingBoxArray(approximated_boxes)
+            boxes.array[:, 0::2] -= tolerance
+            boxes.array[:, 1::2] += tolerance
+            undecided |= boxes.point_belongs(array[candidates]).any(axis=0)
+        for index in candidates[undecided]:
+            mask[index] = self._rays_point_belongs(
+                volmdlr.Point3D(*array[index].tolist()), tolerance)
+        return mask
+
+    def _rays_point_belongs(self, point3d: volmdlr.Point3D,
+                            tolerance: float = 1e-6):
+        """
+        Parity of the intersections with the faces of rays of fixed
+        directions. The first ray that crosses no edge decides, otherwise the
+        majority of the rays. When faces have no segment intersections, the
+        triangles approximating them are crossed instead and each ray only
+        votes. If the rays of RAY_DIRECTIONS are tied, the opposite rays
+        vote too. A point for which no ray votes, every ray grazing an edge
+        or starting on the surface, is outside.
+        """
+        bbox = self.bounding_box
+        ray_length = 2 * ((bbox.xmax - bbox.xmin) ** 2
+                          + (bbox.ymax - bbox.ymin) ** 2
+                          + (bbox.zmax - bbox.zmin) ** 2) ** 0.5
+        directions = RAY_DIRECTIONS + [-direction
+                                       for direction in RAY_DIRECTIONS]
+        votes = []
+        for index, direction in enumerate(directions):
+            if index == len(RAY_DIRECTIONS) \
+                    and 2 * sum(votes) != len(votes):
+                break
+            ray = vme.LineSegment3D(point3d, point3d + direction * ray_length)
+            try:
+                points = [point for _, face_points
+                          in self.linesegment_intersections(ray)
+                          for point in face_points]
+            except (AttributeError, NotImplementedError):
+                parity = volmdlr.core_compiled.triangles_ray_parity(
+                    [(point3d.x, point3d.y, point3d.z)],
+                    self.classification_mesh()[0], direction, tolerance)[0]
+                if parity != -1:
+                    votes.append(bool(parity))
+                continue
+            votes.append(len(points) % 2 == 1)
+            if all(point1.point_distance(point2) > tolerance
+                   for i, point1 in enumerate(points)
+                   for point2 in points[i + 1:]):
+                return votes[-1]
+        if not votes:
+            return False
+        return 2 * sum(votes) > len(votes)
+
     def point_belongs(self, point3d: volmdlr.Point3D, nb_rays: int = 1):
         """
         Ray Casting algorithm
@@ -3883,9 +4059,8 @@ class ClosedShell3D(OpenShell3D):
         for face in self.faces:
             points.extend(
                 face.outer_contour3d.discretization_points(resolution))
-        for point in points:
-            if not shell2.point_belongs(point):
-                return False
+        if not npy.all(shell2.points_belong(points)):
+            return False
 
         # Check if any faces are intersecting
         for face1 in self.faces:
@@ -3895,3 +4070,73 @@ class ClosedShell3D(OpenShell3D):
                     return False
 
         return True
+
+
+class ShellInstances3D(volmdlr.core.Primitive3D):
+    """
+    A shell placed in several frames, without copying its geometry. Used to
+    import the repeated parts of STEP assemblies.
+
+    :param shell: The shell, in its own coordinates
+    :param frames: The frames in which the shell is placed, as in
+        shell.frame_mapping(frame, 'old')
+    """
+    _standalone_in_db = True
+    _non_serializable_attributes = ['bounding_box']
+
+    def __init__(self, shell: OpenShell3D, frames: List[volmdlr.Frame3D],
+                 name: str = ''):
+        self.shell = shell
+        self.frames = frames
+        volmdlr.core.Primitive3D.__init__(self, color=shell.color,
+                                          alpha=shell.alpha, name=name)
+        self.bounding_box = self._bounding_box()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def _bounding_box(self):
+        """
+        Bounding box of the instances of the corners of the shell's one
+        """
+        corners = self.shell.bounding_box.points
+        points = [frame.old_coordinates(corner) for frame in self.frames
+                  for corner in corners]
+        xmin = min(point.x for point in points)
+        xmax = max(point.x for point in points)
+        ymin = min(point.y for point in points)
+        ymax = max(point.y for point in points)
+        zmin = min(point.z for point in points)
+        zmax = max(point.z for point in points)
+        return volmdlr.core.BoundingBox(xmin, xmax, ymin, ymax, zmin, zmax)
+
+    def shells(self):
+        """
+        Copies of the shell placed in each frame
+        """
+        return [self.shell.frame_mapping(frame, 'old', copy=True)
+                for frame in self.frames]
+
+    def babylon_meshes(self):
+        """
+        The shell is triangulated once, and its mesh placed in each frame
+        """
+        meshes = []
+        for mesh in self.shell.babylon_meshes():
+            positions = npy.array(mesh['positions']).reshape(-1, 3)
+            for frame in self.frames:
+                origin = npy.array([frame.origin.x, frame.origin.y,
+                                    frame.origin.z])
+                basis = npy.array([[frame.u.x, frame.v.x, frame.w.x],
+                                   [frame.u.y, frame.v.y, frame.w.y],
+                                   [frame.u.z, frame.v.z, frame.w.z]])
+                instance_mesh = mesh.copy()
+                instance_mesh['positions'] = npy.round(
+                    positions.dot(basis.T) + origin, 6).ravel().tolist()
+                meshes.append(instance_mesh)
+        return meshes
+
+    def plot(self, ax=None, color='k', alpha=1):
+        for shell in self.shells():
+            ax = shell.plot(ax=ax, color=color, alpha=alpha)
+        return ax
@@ -7,7 +7,7 @@
 from numpy import dot, cross, array, zeros, random
 import volmdlr as vm
 import math
-from scipy.linalg import norm
+from numpy.linalg import norm
 
 
 # def PointProjectionPlane(point, plane_origin, plane_normal):
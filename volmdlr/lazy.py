@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lazy import of the heavy optional dependencies (plotting, optimization,
+graphs), so that importing volmdlr stays fast for the processes that only
+need geometry.
+"""
+
+import importlib
+import sys
+
+
+class LazyModule:
+    """
+    A module imported at the first access to one of its attributes
+
+    :param name: The full name of the module, such as 'matplotlib.pyplot'
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if self._module is None:
+            return "<lazy module '{}'>".format(self._name)
+        return repr(self._module)
+
+
+def lazy_module(name):
+    """
+    The module of the given name if it is already imported, otherwise a
+    LazyModule importing it at first use
+    """
+    module = sys.modules.get(name, None)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Thread pool for the batch kernels of core_compiled, which release the GIL:
+large arrays are split in batches of rows computed on several cores.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as npy
+
+# Below this number of rows per thread, threads cost more than they save
+MIN_BATCH_SIZE = 20000
+
+_executors = {}
+
+
+def default_threads():
+    """
+    The number of threads used by default: the number of cores available to
+    the process
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _executor(threads):
+    if threads not in _executors:
+        _executors[threads] = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='volmdlr')
+    return _executors[threads]
+
+
+def _concatenate(results):
+    if isinstance(results[0], tuple):
+        return tuple(npy.concatenate(arrays) for arrays in zip(*results))
+    return npy.concatenate(results)
+
+
+def map_batches(function, array, *args, threads=None,
+                min_batch_size=MIN_BATCH_SIZE, **kwargs):
+    """
+    Call function(batch, *args, **kwargs) on batches of rows of the array in
+    a pool of threads, and concatenate the results along the first axis.
+    The function should release the GIL, as the batch kernels of
+    core_compiled do, otherwise threads bring no speedup.
+
+    :param function: A function returning an array, or a tuple of arrays,
+        with one row per row of the batch
+    :param array: The array to split
+    :param threads: The number of threads, default_threads() by default
+    :param min_batch_size: The minimum number of rows of a batch. Small
+        arrays are computed in the calling thread.
+    """
+    array = npy.asarray(array)
+    if threads is None:
+        threads = default_threads()
+    number_batches = min(threads, len(array) // max(min_batch_size, 1))
+    if number_batches <= 1:
+        return function(array, *args, **kwargs)
+
+    batches = npy.array_split(array, number_batches)
+    futures = [_executor(threads).submit(function, batch, *args, **kwargs)
+               for batch in batches]
+    return _concatenate([future.result() for future in futures])
@@ -4,12 +4,14 @@
 Common abstract primitives
 """
 
-from scipy.optimize import linprog
 import math
 from numpy import zeros
 import dessia_common as dc
 from typing import Dict, List
 import volmdlr
+from volmdlr.lazy import lazy_module
+
+optimize = lazy_module('scipy.optimize')
 
 
 class RoundedLineSegments:
@@ -149,7 +151,7 @@ class RoundedLineSegments:
                             b_ub[ieq_ub] = lines_length[ip1]
                             ieq_ub += 1
 
-                    d = linprog(C, A_ub, b_ub, bounds=bounds)
+                    d = optimize.linprog(C, A_ub, b_ub, bounds=bounds)
 
                     for ipoint, dof_point in dof.items():
                         r = d.x[dof_point] * math.tan(alpha[ipoint])
@@ -7,13 +7,15 @@
 from typing import List
 import math
 import numpy as npy
-import matplotlib.patches
 import volmdlr
 # from volmdlr.core_compiled import polygon_point_belongs
 from volmdlr.primitives import RoundedLineSegments
 import volmdlr.edges
 import volmdlr.wires
-import matplotlib.pyplot as plt
+from volmdlr.lazy import lazy_module
+
+plt = lazy_module('matplotlib.pyplot')
+patches = lazy_module('matplotlib.patches')
 
 
 class OpenedRoundedLineSegments2D(RoundedLineSegments, volmdlr.wires.Wire2D):
@@ -434,12 +436,12 @@ class Measure2D(volmdlr.edges.LineSegment2D):
             label += '{} m'.format(round(distance, ndigits))
 
         if self.type_ == 'distance':
-            arrow = matplotlib.patches.FancyArrowPatch((x1, y1), (x2, y2),
+            arrow = patches.FancyArrowPatch((x1, y1), (x2, y2),
                                     arrowstyle='<|-|>,head_length=10,head_width=5',
                                     shrinkA=0, shrinkB=0,
                                     color='k')
         elif self.type_ == 'radius':
-            arrow = matplotlib.patches.FancyArrowPatch((x1, y1), (x2, y2),
+            arrow = patches.FancyArrowPatch((x1, y1), (x2, y2),
                                     arrowstyle='-|>,head_length=10,head_width=5',
                                     shrinkA=0, shrinkB=0,
                                     color='k')
@@ -15,7 +15,9 @@ import volmdlr.primitives
 import volmdlr.faces
 from typing import Tuple, List, Dict
 
-import matplotlib.pyplot as plt
+from volmdlr.lazy import lazy_module
+
+plt = lazy_module('matplotlib.pyplot')
 
 
 class OpenRoundedLineSegments3D(volmdlr.wires.Wire3D, volmdlr.primitives.RoundedLineSegments):
@@ -1088,3 +1090,92 @@ class BSplineExtrusion(volmdlr.core.Primitive3D):
             return cls(bsplinecurve, vectextru, name)
         else:
             raise NotImplementedError  ## a adapter pour les bpsline
+
+
+class PointCloud3D(volmdlr.core.Primitive3D):
+    """
+    A lightweight cloud of 3D points stored in a (N, 3) array of floats,
+    instead of a list of volmdlr.Point3D
+
+    :param points: An array-like of shape (N, 3)
+    """
+    _non_serializable_attributes = ['points', 'bounding_box']
+
+    def __init__(self, points, color=None, alpha=1, name=''):
+        self.points = npy.asarray(points, dtype=float).reshape(-1, 3)
+        volmdlr.core.Primitive3D.__init__(self, color=color, alpha=alpha,
+                                          name=name)
+        self.bounding_box = self._bounding_box()
+
+    def __len__(self):
+        return self.points.shape[0]
+
+    def to_dict(self):
+        dict_ = volmdlr.core.Primitive3D.to_dict(self)
+        dict_['points'] = self.points.tolist()
+        return dict_
+
+    @classmethod
+    def dict_to_object(cls, dict_, force_generic=False):
+        return cls(dict_['points'], color=dict_.get('color', None),
+                   alpha=dict_.get('alpha', 1), name=dict_.get('name', ''))
+
+    def _bounding_box(self):
+        if not len(self):
+            return volmdlr.core.BoundingBox(0, 0, 0, 0, 0, 0)
+        xmin, ymin, zmin = self.points.min(axis=0)
+        xmax, ymax, zmax = self.points.max(axis=0)
+        return volmdlr.core.BoundingBox(xmin, xmax, ymin, ymax, zmin, zmax)
+
+    def to_points(self):
+        """
+        The points as a list of volmdlr.Point3D
+        """
+        return [volmdlr.Point3D(*point) for point in self.points.tolist()]
+
+    def _transformed(self, points, copy):
+        if copy:
+            return PointCloud3D(points.array, color=self.color,
+                                alpha=self.alpha, name=self.name)
+        self.points = points.array
+        self.bounding_box = self._bounding_box()
+
+    def translation(self, offset, copy=True):
+        return self._transformed(
+            volmdlr.Points3D(self.points).translation(offset), copy)
+
+    def rotation(self, center, axis, angle, copy=True):
+        return self._transformed(volmdlr.Points3D(self.points).rotation(
+            center, axis / axis.norm(), angle), copy)
+
+    def frame_mapping(self, frame, side, copy=True):
+        """
+        side = 'old' or 'new'
+        """
+        return self._transformed(
+            volmdlr.Points3D(self.points).frame_mapping(frame, side), copy)
+
+    def copy(self):
+        return PointCloud3D(self.points.copy(), color=self.color,
+                            alpha=self.alpha, name=self.name)
+
+    def babylon_meshes(self):
+        """
+        Points have no surface to display: clouds are skipped in babylonjs
+        """
+        return []
+
+    def plot(self, ax=None, color=None, alpha=None, marker='.'):
+        """
+        The color and alpha of the cloud are used by default
+        """
+        if ax is None:
+            fig = plt.figure()
+            ax = fig.add_subplot(111, projection='3d')
+        if color is None:
+            color = 'k' if self.color is None else self.color
+        if alpha is None:
+            alpha = self.alpha
+        ax.scatter(self.points[:, 0], self.points[:, 1], self.points[:, 2],
+                   color=color, alpha=alpha, marker=marker)
+        return ax
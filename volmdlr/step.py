@@ -5,18 +5,50 @@
 """
 
 
-import matplotlib.pyplot as plt
-import networkx as nx
+import gc
+import hashlib
+import itertools
+import math
+import os
+import pickle
+import re
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+import numpy as npy
 import volmdlr
 import volmdlr.core
 import volmdlr.primitives3d
 import volmdlr.edges
 import volmdlr.wires
 import volmdlr.faces
-import plot_data.graph
+from volmdlr.lazy import lazy_module
+
+plt = lazy_module('matplotlib.pyplot')
+nx = lazy_module('networkx')
+plot_data_graph = lazy_module('plot_data.graph')
 
 import webbrowser
 
+STEP_ARGUMENT_DELIMITERS = re.compile('[(),]')
+# An argument with at most two levels of nested parenthesis
+STEP_ARGUMENT = re.compile(r'(?:[^(),]|\((?:[^()]|\([^()]*\))*\))*')
+STEP_CONNECTION = re.compile(r'#(\d+)(?=[,)])')
+# A record ends with the first semicolon which is not in a quoted string
+STEP_RECORD = re.compile(r"[^;']*(?:'[^']*'[^;']*)*;")
+# A record of a single entity, without spaces: id, name and arguments
+STEP_SIMPLE_RECORD = re.compile(r"#(\d+)=([A-Z0-9_]+)\(((?:[^;']|'[^']*')*)\);")
+# The arguments of a function, with at most two levels of nested parenthesis
+STEP_ARGUMENTS = re.compile(r'(?:[^(),]|\((?:[^()]|\([^()]*\))*\))+')
+STEP_READ_CHUNK_SIZE = 1 << 20
+STEP_FRAME_MAPPING = 'REPRESENTATION_RELATIONSHIP, REPRESENTATION_RELATIONSHIP_WITH_TRANSFORMATION, SHAPE_REPRESENTATION_RELATIONSHIP'
+STEP_SHELLS = ('CLOSED_SHELL', 'OPEN_SHELL')
+# Entities between a shell and the representation containing it
+STEP_SHELL_CONTAINERS = ('MANIFOLD_SOLID_BREP', 'SHELL_BASED_SURFACE_MODEL',
+                         'BREP_WITH_VOIDS')
+
 
 def step_split_arguments(function_arg):
     """
@@ -26,29 +58,230 @@ def step_split_arguments(function_arg):
     """
     if len(function_arg) > 0 and function_arg[-1] != ')':
         function_arg += ')'
+    closing = function_arg.find(')')
+    if closing != -1 and function_arg.find('(', 0, closing) == -1:
+        # No nested parenthesis: plain split
+        return function_arg[:closing].split(',')
+
+    arguments = []
+    position = 0
+    length = len(function_arg)
+    while position < length:
+        end = STEP_ARGUMENT.match(function_arg, position).end()
+        if end == length:
+            break
+        char = function_arg[end]
+        if char == '(':
+            # Deeper nesting than handled by the regular expression
+            return step_split_nested_arguments(function_arg)
+        arguments.append(function_arg[position:end])
+        if char == ')':
+            break
+        position = end + 1
+    return arguments
+
+
+def step_split_nested_arguments(function_arg):
+    """
+    Same as step_split_arguments for any depth of parenthesis
+    """
     arguments = []
-    argument = ""
     parenthesis = 1
-    for char in function_arg:
+    start = 0
+    # Only visit delimiters instead of every character of the argument
+    for match in STEP_ARGUMENT_DELIMITERS.finditer(function_arg):
+        char = match.group()
         if char == "(":
             parenthesis += 1
-
-        if char != "," or parenthesis > 1:
-            argument += char
-        else:
-            arguments.append(argument)
-            argument = ""
-
-        if char == ")":
+        elif char == ")":
             parenthesis -= 1
             if parenthesis == 0:
-                arguments.append(argument[:-1])
-                argument = ""
+                arguments.append(function_arg[start:match.start()])
                 break
+        elif parenthesis == 1:
+            arguments.append(function_arg[start:match.start()])
+            start = match.end()
     return arguments
 
 
+def step_text_records(text):
+    """
+    Yield the records (text ending with ';') of STEP text without spaces.
+    Semicolons inside quoted strings do not end a record, an incomplete last
+    record is not yielded.
+    """
+    match = STEP_RECORD.match(text)
+    while match is not None:
+        yield match.group()
+        match = STEP_RECORD.match(text, match.end())
+
+
+@contextmanager
+def gc_paused():
+    """
+    Disable the cyclic garbage collector, whose passes triggered by the
+    allocation of many entities take a large part of the reading time
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def step_frames_transformation(frame_from, frame_to):
+    """
+    Frame of the transformation moving frame_from onto frame_to, such as
+    frame.old_coordinates(point) is
+    frame_to.old_coordinates(frame_from.new_coordinates(point))
+    """
+    basis_from = frame_from.basis()
+    basis_to = frame_to.basis()
+    vectors = [basis_to.old_coordinates(basis_from.new_coordinates(vector))
+               for vector in [volmdlr.X3D, volmdlr.Y3D, volmdlr.Z3D]]
+    origin = frame_to.old_coordinates(
+        frame_from.new_coordinates(volmdlr.O3D))
+    return volmdlr.Frame3D(origin, *vectors)
+
+
+def step_frames_composition(outer_frame, inner_frame):
+    """
+    Frame of the mapping in inner_frame then in outer_frame ('old' side).
+    None stands for the identity.
+    """
+    if outer_frame is None:
+        return inner_frame
+    if inner_frame is None:
+        return outer_frame
+    basis = outer_frame.basis()
+    return volmdlr.Frame3D(outer_frame.old_coordinates(inner_frame.origin),
+                           basis.old_coordinates(inner_frame.u),
+                           basis.old_coordinates(inner_frame.v),
+                           basis.old_coordinates(inner_frame.w))
+
+
+class StepDependencyGraph:
+    """
+    Compact directed graph of the dependencies between STEP entities, stored
+    as integer arrays in compressed sparse row form: the successors of the
+    node of index i are indices[indptr[i]:indptr[i+1]].
+
+    :param ids: The ids of the entities (nodes of the graph)
+    :param connections: (id1, id2) tuples, entity id1 depending on entity id2
+    """
+
+    def __init__(self, ids, connections):
+        ids = npy.unique(npy.fromiter(ids, dtype=npy.int64))
+        if connections:
+            edges = npy.searchsorted(ids, npy.asarray(connections,
+                                                      dtype=npy.int64))
+        else:
+            edges = npy.zeros((0, 2), dtype=npy.int64)
+
+        # Nodes without any connection are not part of the graph
+        degrees = npy.bincount(edges.ravel(), minlength=len(ids))
+        connected = degrees > 0
+        new_indices = npy.cumsum(connected) - 1
+        self.ids = ids[connected]
+        edges = new_indices[edges]
+
+        self.indptr, self.indices = self._compressed_rows(edges[:, 0],
+                                                          edges[:, 1])
+        self.reverse_indptr, self.reverse_indices = self._compressed_rows(
+            edges[:, 1], edges[:, 0])
+        self._lists = None
+        self._reverse_lists = None
+
+    def _compressed_rows(self, sources, targets):
+        order = npy.argsort(sources, kind='stable')
+        indptr = npy.zeros(len(self.ids) + 1, dtype=npy.int64)
+        npy.cumsum(npy.bincount(sources, minlength=len(self.ids)),
+                   out=indptr[1:])
+        return indptr, targets[order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, entity_id):
+        index = npy.searchsorted(self.ids, entity_id)
+        return index < len(self.ids) and self.ids[index] == entity_id
+
+    def node_indices(self, entity_ids):
+        return npy.searchsorted(self.ids,
+                                npy.asarray(entity_ids, dtype=npy.int64))
+
+    def successors(self, entity_id):
+        index = self.node_indices(entity_id)
+        return self.ids[self.indices[self.indptr[index]:
+                                     self.indptr[index + 1]]].tolist()
+
+    def predecessors(self, entity_id):
+        index = self.node_indices(entity_id)
+        return self.ids[self.reverse_indices[self.reverse_indptr[index]:
+                                             self.reverse_indptr[index + 1]]]\
+            .tolist()
+
+    def _adjacency_lists(self, reverse=False):
+        # Python lists are much faster than arrays to traverse node by node
+        if reverse:
+            if self._reverse_lists is None:
+                self._reverse_lists = (self.reverse_indptr.tolist(),
+                                       self.reverse_indices.tolist())
+            return self._reverse_lists
+        if self._lists is None:
+            self._lists = (self.indptr.tolist(), self.indices.tolist())
+        return self._lists
+
+    def reachable(self, entity_ids, reverse=False):
+        """
+        Ids of the entities reachable from any of entity_ids (included),
+        computed in a single traversal. If reverse is True, connections are
+        followed backwards, giving the entities that depend on entity_ids.
+        """
+        indptr, indices = self._adjacency_lists(reverse)
+        visited = set(self.node_indices(entity_ids).tolist())
+        stack = list(visited)
+        while stack:
+            index = stack.pop()
+            for successor in indices[indptr[index]:indptr[index + 1]]:
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append(successor)
+        return set(self.ids[list(visited)].tolist())
+
+    def topological_order(self, root_ids):
+        """
+        Ids of the entities reachable from root_ids, each one placed after
+        all the entities it depends on (depth first post order)
+        """
+        indptr, indices = self._adjacency_lists()
+        visited = bytearray(len(self.ids))
+        order = []
+        for root in self.node_indices(root_ids).tolist():
+            if visited[root]:
+                continue
+            visited[root] = 1
+            stack = [(root, indptr[root])]
+            while stack:
+                index, position = stack[-1]
+                if position < indptr[index + 1]:
+                    stack[-1] = (index, position + 1)
+                    successor = indices[position]
+                    if not visited[successor]:
+                        visited[successor] = 1
+                        stack.append((successor, indptr[successor]))
+                else:
+                    stack.pop()
+                    order.append(index)
+        return self.ids[order].tolist()
+
+
 class StepFunction:
+    # Files hold hundreds of thousands of functions
+    __slots__ = ('id', 'name', 'arg')
+
     def __init__(self, function_id, function_name, function_arg):
         self.id = function_id
         self.name = function_name
@@ -77,15 +310,382 @@ class StepFunction:
         self.arg = arguments
 
 
+class StepProfiler:
+    """
+    Collects the count, cumulative duration and peak memory of the phases of
+    a STEP import (reading, graph building, instantiation...) and of the
+    instantiation of each STEP entity name.
+
+    :param memory: If True, the peak memory allocated during each measure is
+        traced with tracemalloc. This slows the import down noticeably.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.phases = {}
+        self.entities = {}
+        # Peak memory of the measures in progress, outermost first
+        self._stack = []
+
+    @contextmanager
+    def tracing(self):
+        """
+        Trace memory allocations in this context, if not already done
+        """
+        started = self.memory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            yield
+        finally:
+            if started:
+                tracemalloc.stop()
+
+    @contextmanager
+    def measure(self, statistics, name):
+        frame = None
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # Peaks are reset for this measure: report the peak reached so
+            # far to the enclosing ones
+            for outer_frame in self._stack:
+                outer_frame[1] = max(outer_frame[1], peak)
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            frame = [current, current]
+            self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            peak_memory = 0
+            if frame is not None:
+                _, peak = tracemalloc.get_traced_memory()
+                self._stack.pop()
+                frame[1] = max(frame[1], peak)
+                for outer_frame in self._stack:
+                    outer_frame[1] = max(outer_frame[1], frame[1])
+                peak_memory = frame[1] - frame[0]
+            entry = statistics.setdefault(
+                name, {'count': 0, 'duration': 0., 'peak_memory': 0})
+            entry['count'] += 1
+            entry['duration'] += duration
+            entry['peak_memory'] = max(entry['peak_memory'], peak_memory)
+
+    def phase(self, name):
+        return self.measure(self.phases, name)
+
+    def entity(self, name):
+        return self.measure(self.entities, name)
+
+    def report(self):
+        """
+        :returns: A dict with the statistics of the phases and of the
+            entities, each one sorted by decreasing cumulative duration.
+            Durations are in seconds and peak memories in bytes.
+        """
+        def sort(statistics):
+            return dict(sorted(statistics.items(),
+                               key=lambda item: item[1]['duration'],
+                               reverse=True))
+        return {'phases': sort(self.phases), 'entities': sort(self.entities)}
+
+    def print_report(self, max_entities=20):
+        report = self.report()
+        phases = list(report['phases'].items())
+        entities = list(report['entities'].items())[:max_entities]
+        for title, statistics in [('Phase', phases), ('Entity', entities)]:
+            print('{:<50} {:>8} {:>12} {:>14}'.format(
+                title, 'count', 'duration (s)', 'peak mem (kB)'))
+            for name, entry in statistics:
+                print('{:<50} {:>8} {:>12.4f} {:>14.1f}'.format(
+                    name[:50], entry['count'], entry['duration'],
+                    entry['peak_memory'] / 1024))
+            print()
+
+
+class StepEntityPool:
+    """
+    Tolerance-aware spatial hash used during a STEP import to share
+    instances: 3D points closer than tolerance are replaced by a single
+    volmdlr.Point3D, so that endpoint comparisons become identity checks.
+    Identical planes and cylindrical surfaces of the faces of a shell are
+    replaced by a single surface.
+
+    Imported objects then share points: transform them with copy=True, or
+    in place through methods that replace points instead of moving them.
+
+    :param tolerance: The distance under which points are merged
+    """
+    _NEIGHBOUR_OFFSETS = list(itertools.product((-1, 0, 1), repeat=3))
+
+    def __init__(self, tolerance=1e-9):
+        self.tolerance = tolerance
+        self._points = {}
+        self.merged_points = 0
+        self.merged_surfaces = 0
+
+    def _cell(self, point):
+        return (math.floor(point.x / self.tolerance),
+                math.floor(point.y / self.tolerance),
+                math.floor(point.z / self.tolerance))
+
+    def _find(self, cells, point, match=None):
+        """
+        An object stored in cells at a point closer than tolerance to point
+        and matching the optional predicate, or None
+        """
+        i, j, k = self._cell(point)
+        squared_tolerance = self.tolerance ** 2
+        for di, dj, dk in self._NEIGHBOUR_OFFSETS:
+            for other_point, obj in cells.get((i + di, j + dj, k + dk), ()):
+                if (other_point.x - point.x) ** 2 \
+                        + (other_point.y - point.y) ** 2 \
+                        + (other_point.z - point.z) ** 2 <= squared_tolerance:
+                    if match is None or match(obj):
+                        return obj
+        return None
+
+    def _insert(self, cells, point, obj):
+        cells.setdefault(self._cell(point), []).append((point, obj))
+
+    def point(self, point):
+        """
+        The shared instance of point
+        """
+        shared_point = self._find(self._points, point)
+        if shared_point is None:
+            self._insert(self._points, point, point)
+            return point
+        self.merged_points += 1
+        return shared_point
+
+    def _same_surface(self, surface, other_surface):
+        if surface.__class__ is not other_surface.__class__:
+            return False
+        if isinstance(surface, volmdlr.faces.CylindricalSurface3D) \
+                and abs(surface.radius - other_surface.radius) > self.tolerance:
+            return False
+        for vector, other_vector in [(surface.frame.u, other_surface.frame.u),
+                                     (surface.frame.v, other_surface.frame.v),
+                                     (surface.frame.w, other_surface.frame.w)]:
+            if (vector - other_vector).norm() > self.tolerance:
+                return False
+        return True
+
+    def merge_surfaces(self, faces):
+        """
+        Faces whose Plane3D or CylindricalSurface3D is identical to the one
+        of a previous face get this surface instead
+        """
+        surfaces = {}
+        for face in faces:
+            surface = face.surface3d
+            if surface.__class__ not in (volmdlr.faces.Plane3D,
+                                         volmdlr.faces.CylindricalSurface3D):
+                continue
+            shared_surface = self._find(
+                surfaces, surface.frame.origin,
+                lambda other: self._same_surface(surface, other))
+            if shared_surface is None:
+                self._insert(surfaces, surface.frame.origin, surface)
+            elif shared_surface is not surface:
+                face.surface3d = shared_surface
+                self.merged_surfaces += 1
+
+
+class StepCache:
+    """
+    On disk cache of parsed STEP files, keyed by the hash of the file content
+    and the volmdlr version. Function tables and connections are stored in a
+    compact binary form. Least recently used entries are evicted when the
+    total size of the cache exceeds max_size.
+
+    :param directory: The directory of the cache files
+    :param max_size: The maximal total size of the cache in bytes
+    """
+
+    def __init__(self, directory=None, max_size=1 << 30):
+        if directory is None:
+            directory = os.path.join(os.path.expanduser('~'), '.cache',
+                                     'volmdlr', 'step')
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, stepfile):
+        file_hash = hashlib.sha256(volmdlr.__version__.encode('utf-8'))
+        with open(stepfile, 'rb') as file:
+            for chunk in iter(lambda: file.read(STEP_READ_CHUNK_SIZE), b''):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def load(self, key):
+        """
+        :returns: The functions and connections stored under key, None if
+            there are not in the cache
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        # Mark as recently used
+        os.utime(path)
+        self.hits += 1
+
+        functions = {function_id: StepFunction(function_id, name, arguments)
+                     for function_id, name, arguments
+                     in zip(data['ids'].tolist(), data['names'],
+                            data['arguments'])}
+        all_connections = list(zip(data['connections'][:, 0].tolist(),
+                                   data['connections'][:, 1].tolist()))
+        return functions, all_connections
+
+    def store(self, key, functions, all_connections):
+        data = {'ids': npy.array(list(functions.keys()), dtype=npy.int64),
+                'names': [function.name for function in functions.values()],
+                'arguments': [function.arg for function in functions.values()],
+                'connections': npy.array(all_connections,
+                                         dtype=npy.int64).reshape(-1, 2)}
+        path = self._path(key)
+        temporary_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temporary_path, 'wb') as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+        self.evict()
+
+    def size(self):
+        return sum(os.path.getsize(os.path.join(self.directory, filename))
+                   for filename in os.listdir(self.directory)
+                   if filename.endswith('.pickle'))
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in max_size
+        """
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.pickle'):
+                path = os.path.join(self.directory, filename)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total_size = sum(entry[1] for entry in entries)
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            os.remove(path)
+            total_size -= size
+
+    def clear(self):
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.pickle'):
+                os.remove(os.path.join(self.directory, filename))
+
+
 class Step:
-    def __init__(self, stepfile):
+    """
+    A STEP (ISO 10303-21) file reader
+
+    :param stepfile: The path of the STEP file
+    :param streaming: If True, the file is tokenized by binary chunks in a
+        single pass instead of line by line, so that several records may be
+        written on a line. It parses the records of a single entity with one
+        regular expression per chunk and pauses the garbage collector, which
+        makes it faster than the line reader. Reading statistics (size, duration and bytes per second) are
+        available in read_statistics.
+    :param cache: A StepCache in which parsed files are looked for before
+        reading them, and stored after
+    :param profile: If True (or a StepProfiler), the count, duration and
+        peak memory of the import phases and of the instantiation of each
+        entity name are collected in self.profiler, see StepProfiler.report
+    :param merge_tolerance: If given, coincident points and identical
+        surfaces are shared during instantiation, see StepEntityPool
+    """
+
+    def __init__(self, stepfile, streaming=False, cache=None, profile=False,
+                 merge_tolerance=None):
         self.stepfile = stepfile
+        self.read_statistics = {}
+        self.merge_tolerance = merge_tolerance
+        if profile is True:
+            profile = StepProfiler()
+        self.profiler = profile or None
+
+        with self._tracing():
+            cached = None
+            if cache is not None:
+                with self._phase('cache_load'):
+                    cache_key = cache.key(stepfile)
+                    cached = cache.load(cache_key)
+
+            if cached is not None:
+                functions, all_connections = cached
+            else:
+                with self._phase('read'):
+                    if streaming:
+                        functions, all_connections = \
+                            self.read_functions_streaming()
+                    else:
+                        functions, all_connections = self.read_functions()
+                if cache is not None:
+                    with self._phase('cache_store'):
+                        cache.store(cache_key, functions, all_connections)
 
-        self.functions, self.all_connections = self.read_functions()
+        self._set_functions(functions, all_connections)
+
+    @classmethod
+    def from_functions(cls, functions, all_connections, stepfile='',
+                       merge_tolerance=None):
+        """
+        Step of already parsed functions and connections
+        """
+        step = cls.__new__(cls)
+        step.stepfile = stepfile
+        step.read_statistics = {}
+        step.merge_tolerance = merge_tolerance
+        step.profiler = None
+        step._set_functions(functions, all_connections)
+        return step
+
+    def _set_functions(self, functions, all_connections):
+        self.functions = functions
+        self.all_connections = all_connections
 
         self.upd_graph = False
+        self.relationships_shortcut = False
+        self.dependencies = None
+        self.names_index = None
+        self.object_dict = {}
+        self.entity_pool = None
+        if self.merge_tolerance is not None:
+            self.entity_pool = StepEntityPool(self.merge_tolerance)
+
+    def _tracing(self):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.tracing()
+
+    def _phase(self, name):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(name)
 
     def read_functions(self):
+        """
+        Reading of the file line by line. Records written on several lines
+        are assembled, a line must not hold several records.
+        """
+        start = time.time()
         f = open(self.stepfile, "r", encoding="ISO-8859-1")
 
         all_connections = []
@@ -107,83 +707,178 @@ class Step:
                 continue
 
             line = previous_line + line
+            previous_line = str()
 
             # SKIP HEADER
             if line[0] != "#":
-                previous_line = str()
                 continue
 
-            function = line.split("=")
-            function_id = int(function[0][1:])
-            function_name_arg = function[1].split("(", 1)
-            function_name = function_name_arg[0]
-            function_arg = function_name_arg[1].split("#")
-            function_connections = []
-            for connec in function_arg[1:]:
-                connec = connec.split(",")
-                connec = connec[0].split(")")
-                if connec[0][-1] != "'":
-                    function_connection = int(connec[0])
-                    function_connections.append(
-                        (function_id, function_connection))
-
+            function, function_connections = self.read_function(line)
             all_connections.extend(function_connections)
+            functions[function.id] = function
 
-            previous_line = str()
+        f.close()
+        self._set_read_statistics(os.path.getsize(self.stepfile),
+                                  time.time() - start)
 
-            # FUNCTION ARGUMENTS
-            function_arg = function_name_arg[1]
-            arguments = step_split_arguments(function_arg)
-            new_name = ''
-            new_arguments = []
-            if function_name == "":
-                name_arg = self.step_subfunctions(arguments)
-                for name, arg in name_arg:
-                    new_name += name + ', '
-                    new_arguments.extend(arg)
-                new_name = new_name[:-2]
-                function_name = new_name
-                arguments = new_arguments
-                for arg in arguments:
-                    if arg[0] == '#':
-                        function_connections.append(
-                            (function_id, int(arg[1:])))
-
-            for i, argument in enumerate(arguments):
-                if argument[:2] == '(#' and argument[-1] == ')':
-                    arg_list = volmdlr.core.set_to_list(argument)
-                    arguments[i] = arg_list
-
-            if function_id == 918:
-                print(function_name, arguments)
-            function = StepFunction(function_id, function_name, arguments)
-            functions[function_id] = function
+        return functions, all_connections
 
-        f.close()
+    def read_functions_streaming(self, chunk_size=STEP_READ_CHUNK_SIZE):
+        """
+        Single pass reading of the file by binary chunks. Records are split
+        on semicolons whatever the line breaks, so several records may be on
+        a line. The records of a single entity are parsed by one regular
+        expression over the chunk, the others by read_function. Gives the
+        same functions and connections as read_functions.
+        """
+        functions = {}
+        all_connections = []
+
+        start = time.time()
+        with open(self.stepfile, 'rb') as stream, gc_paused():
+            leftover = ''
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                chunk = chunk.decode('ISO-8859-1')
+                buffer = leftover + chunk.replace(' ', '').replace(
+                    '\n', '').replace('\r', '')
+                position = self._read_chunk_functions(buffer, functions,
+                                                      all_connections)
+                leftover = buffer[position:]
+            self._read_records(leftover, functions, all_connections)
+            size = stream.tell()
+        self._set_read_statistics(size, time.time() - start)
 
         return functions, all_connections
 
+    def _read_chunk_functions(self, buffer, functions, all_connections):
+        """
+        Parse the complete records of a chunk without spaces, into the
+        functions and connections. Returns the end of the last parsed record
+        """
+        position = 0
+        for match in STEP_SIMPLE_RECORD.finditer(buffer):
+            if match.start() != position:
+                # Header, and records of several entities
+                self._read_records(buffer[position:match.start()],
+                                   functions, all_connections)
+            position = match.end()
+
+            function_id, function_name, arguments_text = match.groups()
+            function_id = int(function_id)
+            if '(' in arguments_text:
+                arguments = STEP_ARGUMENTS.findall(arguments_text)
+                if len(arguments) - 1 + sum(map(len, arguments)) \
+                        != len(arguments_text):
+                    # Deeper nesting than handled by the regular expression
+                    arguments = step_split_nested_arguments(
+                        arguments_text + ')')
+                for i, argument in enumerate(arguments):
+                    if argument[:2] == '(#' and argument[-1] == ')':
+                        arguments[i] = volmdlr.core.set_to_list(argument)
+            else:
+                arguments = arguments_text.split(',')
+            if '#' in arguments_text:
+                all_connections.extend([
+                    (function_id, int(connection)) for connection
+                    in STEP_CONNECTION.findall(arguments_text + ')')])
+            functions[function_id] = StepFunction(function_id,
+                                                  function_name, arguments)
+        return position
+
+    def _read_records(self, text, functions, all_connections):
+        for record in step_text_records(text):
+            # SKIP HEADER
+            if record[0] != '#':
+                continue
+            function, function_connections = self.read_function(record)
+            all_connections.extend(function_connections)
+            functions[function.id] = function
+
+    def _set_read_statistics(self, size, duration):
+        self.read_statistics = {'bytes': size,
+                                'duration': duration,
+                                'bytes_per_second': size / duration if duration else math.inf}
+
+    def read_function(self, line):
+        """
+        Parse a record '#id=NAME(arguments);' without spaces into a
+        StepFunction and the list of its connections to other entities
+        """
+        function = line.split("=")
+        function_id = int(function[0][1:])
+        function_name_arg = function[1].split("(", 1)
+        function_name = function_name_arg[0]
+        function_connections = [
+            (function_id, int(connection)) for connection
+            in STEP_CONNECTION.findall(function_name_arg[1])]
+
+        # FUNCTION ARGUMENTS
+        function_arg = function_name_arg[1]
+        arguments = step_split_arguments(function_arg)
+        new_name = ''
+        new_arguments = []
+        if function_name == "":
+            name_arg = self.step_subfunctions(arguments)
+            for name, arg in name_arg:
+                new_name += name + ', '
+                new_arguments.extend(arg)
+            new_name = new_name[:-2]
+            function_name = new_name
+            arguments = new_arguments
+
+        for i, argument in enumerate(arguments):
+            if argument[:2] == '(#' and argument[-1] == ')':
+                arg_list = volmdlr.core.set_to_list(argument)
+                arguments[i] = arg_list
+
+        function = StepFunction(function_id, function_name, arguments)
+        return function, function_connections
+
+    def graph_connections(self):
+        """
+        Ids of the entities that volmdlr can interpret and the connections
+        between them. SHAPE_REPRESENTATION_RELATIONSHIPs are replaced by a
+        direct connection between the two representations.
+        """
+        if not self.relationships_shortcut:
+            for function in self.functions.values():
+                if function.name == 'SHAPE_REPRESENTATION_RELATIONSHIP':
+                    # Create short cut from id1 to id2
+                    id1 = int(function.arg[2][1:])
+                    id2 = int(function.arg[3][1:])
+                    elem1 = (function.id, id1)
+                    elem2 = (function.id, id2)
+                    self.all_connections.remove(elem1)
+                    self.all_connections.remove(elem2)
+                    self.all_connections.append((elem1[1], elem2[1]))
+
+                    self.functions[id1].arg.append('#{}'.format(id2))
+            self.relationships_shortcut = True
+
+        nodes = {function.id for function in self.functions.values()
+                 if function.name in STEP_TO_VOLMDLR
+                 and function.name != 'SHAPE_REPRESENTATION_RELATIONSHIP'}
+        connections = [connection for connection in self.all_connections
+                       if connection[0] in nodes and connection[1] in nodes]
+        return nodes, connections
+
+    def create_dependencies(self):
+        with self._phase('dependency_graph'):
+            nodes, connections = self.graph_connections()
+            return StepDependencyGraph(nodes, connections)
+
     def create_graph(self, draw=False, html=False):
 
         G = nx.Graph()
         F = nx.DiGraph()
         labels = {}
 
+        nodes, connections = self.graph_connections()
         for function in self.functions.values():
-
-            if function.name == 'SHAPE_REPRESENTATION_RELATIONSHIP':
-                # Create short cut from id1 to id2
-                id1 = int(function.arg[2][1:])
-                id2 = int(function.arg[3][1:])
-                elem1 = (function.id, id1)
-                elem2 = (function.id, id2)
-                self.all_connections.remove(elem1)
-                self.all_connections.remove(elem2)
-                self.all_connections.append((elem1[1], elem2[1]))
-
-                self.functions[id1].arg.append('#{}'.format(id2))
-
-            elif function.name in STEP_TO_VOLMDLR:
+            if function.id in nodes:
                 G.add_node(function.id,
                            color='rgb(0, 0, 0)',
                            shape='.',
@@ -194,19 +889,9 @@ class Step:
                            name=str(function.id))
                 labels[function.id] = str(function.id) + ' ' + function.name
 
-        # Delete connection if node not found
-        node_list = list(F.nodes())
-        delete_connection = []
-        for connection in self.all_connections:
-            if connection[0] not in node_list \
-                    or connection[1] not in node_list:
-                delete_connection.append(connection)
-        for delete in delete_connection:
-            self.all_connections.remove(delete)
-
         # Create graph connections
-        G.add_edges_from(self.all_connections)
-        F.add_edges_from(self.all_connections)
+        G.add_edges_from(connections)
+        F.add_edges_from(connections)
 
         # Remove single nodes
         delete_nodes = []
@@ -445,54 +1130,449 @@ class Step:
                                                                     arguments))
         return volmdlr_object
 
-    def to_volume_model(self):
-        if not self.upd_graph:
-            self.graph = self.create_graph()
+    def create_index(self):
+        """
+        Index the entity table once: dependency graph and entity ids by name
+        """
+        if self.dependencies is None:
+            self.dependencies = self.create_dependencies()
+        if self.names_index is None:
+            with self._phase('names_index'):
+                self.names_index = {}
+                for function in self.functions.values():
+                    self.names_index.setdefault(function.name, []).append(
+                        function.id)
+
+    def entities_ids(self, names):
+        """
+        Ids of the entities of the dependency graph having one of the names
+        """
+        self.create_index()
+        ids = []
+        for name in names:
+            ids.extend([entity_id for entity_id
+                        in self.names_index.get(name, [])
+                        if entity_id in self.dependencies])
+        return sorted(ids)
+
+    def shells_info(self):
+        """
+        Lists the shells of the file without instantiating them
 
-        object_dict = {}
+        :returns: A list of dicts with the id, the name, the STEP type of the
+            shell and a bounding box hint computed from its cartesian points
+            (in the frame of its representation)
+        """
+        infos = []
+        for shell_id in self.entities_ids(STEP_SHELLS):
+            function = self.functions[shell_id]
+            infos.append({'id': shell_id,
+                          'name': function.arg[0][1:-1],
+                          'type': function.name,
+                          'bounding_box': self.bounding_box_hint(shell_id)})
+        return infos
+
+    def products_info(self):
+        """
+        Lists the products of the file and the ids of their shells
+        (see shells_info), without instantiating them
+        """
+        self.create_index()
+        all_shell_ids = self.entities_ids(STEP_SHELLS)
+        infos = []
+        for definition_id in self.names_index.get(
+                'SHAPE_DEFINITION_REPRESENTATION', []):
+            arguments = self.functions[definition_id].arg
+            try:
+                product_definition_shape = self.functions[int(arguments[0][1:])]
+                product_definition = self.functions[
+                    int(product_definition_shape.arg[2][1:])]
+                formation = self.functions[
+                    int(product_definition.arg[2][1:])]
+                product = self.functions[int(formation.arg[2][1:])]
+            except (KeyError, IndexError, ValueError):
+                continue
+            representation_id = int(arguments[1][1:])
+            if representation_id in self.dependencies:
+                reachable = self.dependencies.reachable([representation_id])
+                shell_ids = [shell_id for shell_id in all_shell_ids
+                             if shell_id in reachable]
+            else:
+                shell_ids = []
+            infos.append({'id': product.id,
+                          'name': product.arg[1][1:-1],
+                          'shells': shell_ids})
+        return infos
 
-        self.graph.add_node("#0")
-        frame_mapping_nodes = []
-        shell_nodes = []
-        for node in self.graph.nodes:
-            if node != '#0' and self.functions[node].name == 'REPRESENTATION_RELATIONSHIP, REPRESENTATION_RELATIONSHIP_WITH_TRANSFORMATION, SHAPE_REPRESENTATION_RELATIONSHIP':
-                frame_mapping_nodes.append(node)
-            if node != '#0' and (self.functions[node].name == "CLOSED_SHELL"
-                                 or
-                                 self.functions[node].name == "OPEN_SHELL"):
-                shell_nodes.append(node)
-
-        frame_mapped_shell_node = []
-        for s_node in shell_nodes:
-            for fm_node in frame_mapping_nodes:
-                if nx.has_path(self.graph, source=fm_node, target=s_node):
-                    frame_mapped_shell_node.append(s_node)
-                    break
-        shell_nodes_copy = shell_nodes.copy()
-        [shell_nodes.remove(node) for node in frame_mapped_shell_node]
-
-        for node in shell_nodes + frame_mapping_nodes:
-            self.graph.add_edge('#0', node)
-
-        edges = list(
-            nx.algorithms.traversal.breadth_first_search.bfs_edges(self.graph,
-                                                                   "#0"))[::-1]
-        for edge_nb, edge in enumerate(edges):
-            instanciate_id = edge[1]
-            volmdlr_object = self.instanciate(
-                self.functions[instanciate_id].name,
-                self.functions[instanciate_id].arg[:],
-                object_dict)
+    def bounding_box_hint(self, entity_id):
+        """
+        Bounding box of the cartesian points the entity depends on. Curved
+        geometries may exceed it.
+        """
+        self.create_index()
+        coordinates = [self.functions[point_id].arg[1][1:-1].split(',')
+                       for point_id in self.dependencies.reachable([entity_id])
+                       if self.functions[point_id].name == 'CARTESIAN_POINT']
+        if not coordinates:
+            return None
+        points = npy.array(coordinates, dtype=float) / 1000
+        xmin, ymin, zmin = points.min(axis=0)
+        xmax, ymax, zmax = points.max(axis=0)
+        return volmdlr.core.BoundingBox(xmin, xmax, ymin, ymax, zmin, zmax)
+
+    def instanciate_shells(self, shell_ids):
+        """
+        Instantiate only the entities needed by the shells of ids shell_ids
+        (see shells_info), including the frame mappings of their
+        representations. Instantiated entities are kept in self.object_dict
+        and not instantiated twice.
+        """
+        with self._tracing():
+            return self._instanciate_shells(shell_ids, self.object_dict)
+
+    def _shells_roots(self, shell_ids):
+        """
+        Nodes from which instantiating shell_ids: the shells that are not
+        frame mapped and the representation relationships mapping the others
+        """
+        self.create_index()
+        for shell_id in shell_ids:
+            if shell_id not in self.dependencies \
+                    or self.functions[shell_id].name not in STEP_SHELLS:
+                raise ValueError('#{} is not a shell'.format(shell_id))
+
+        # Representation relationships depending on the shells
+        dependents = self.dependencies.reachable(shell_ids, reverse=True)
+        frame_mapping_nodes = [node for node
+                               in self.entities_ids([STEP_FRAME_MAPPING])
+                               if node in dependents]
+
+        frame_mapped_nodes = self.dependencies.reachable(frame_mapping_nodes)
+        root_nodes = [node for node in shell_ids
+                      if node not in frame_mapped_nodes]
+        return root_nodes + frame_mapping_nodes
+
+    def _instanciate_shells(self, shell_ids, object_dict):
+        roots = self._shells_roots(shell_ids)
+        with self._phase('topological_order'):
+            order = self.dependencies.topological_order(roots)
+        with self._phase('instantiation'):
+            self.instanciate_entities(order, object_dict)
+        return [object_dict[node] for node in shell_ids]
+
+    def instanciate_entities(self, entity_ids, object_dict):
+        """
+        Instantiate entities given in an order where each one comes after the
+        ones it depends on. Entities already in object_dict are skipped.
+        """
+        for instanciate_id in entity_ids:
+            if instanciate_id in object_dict:
+                continue
+            function = self.functions[instanciate_id]
+            if self.profiler is None:
+                volmdlr_object = self.instanciate(function.name,
+                                                  function.arg[:],
+                                                  object_dict)
+            else:
+                with self.profiler.entity(function.name):
+                    volmdlr_object = self.instanciate(function.name,
+                                                      function.arg[:],
+                                                      object_dict)
+
+            if self.entity_pool is not None:
+                if function.name == 'CARTESIAN_POINT' \
+                        and isinstance(volmdlr_object, volmdlr.Point3D):
+                    volmdlr_object = self.entity_pool.point(volmdlr_object)
+                elif function.name in STEP_SHELLS:
+                    self.entity_pool.merge_surfaces(volmdlr_object.faces)
 
             object_dict[instanciate_id] = volmdlr_object
 
-        shells = []
-        for node in shell_nodes_copy:
-            shells.append(object_dict[node])
+    def independent_subgraphs(self, shell_ids):
+        """
+        Partition the instantiation of shell_ids into independent groups:
+        shells reached by the same roots (for instance a representation
+        relationship) are in the same group. Entities shared between groups,
+        such as units and contexts, are part of each of them.
+
+        :returns: A list of (entity ids in instantiation order, shell ids)
+        """
+        roots = self._shells_roots(shell_ids)
+        requested_shells = set(shell_ids)
+
+        # Union-find of roots sharing shells
+        parents = list(range(len(roots)))
+
+        def find(index):
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        shell_root = {}
+        for iroot, root in enumerate(roots):
+            for node in self.dependencies.reachable([root]):
+                if node in requested_shells:
+                    if node in shell_root:
+                        parents[find(iroot)] = find(shell_root[node])
+                    else:
+                        shell_root[node] = iroot
+
+        groups = {}
+        for iroot, root in enumerate(roots):
+            groups.setdefault(find(iroot), []).append(root)
+
+        subgraphs = []
+        for group_roots in groups.values():
+            order = self.dependencies.topological_order(group_roots)
+            group_nodes = set(order)
+            subgraphs.append((order, [shell_id for shell_id in shell_ids
+                                      if shell_id in group_nodes]))
+        return subgraphs
+
+    def to_volume_model(self, processes=1, instances=False):
+        """
+        Instantiate all the shells of the file
+
+        :param processes: If greater than 1, independent shells are
+            instantiated in a pool of this number of processes. Entities
+            instantiated in other processes are not profiled one by one.
+        :param instances: If True, each shell is instantiated once and the
+            primitives of the model are volmdlr.faces.ShellInstances3D,
+            see shell_instances. processes is then not used.
+        """
+        with self._tracing():
+            if instances:
+                with self._phase('instantiation'):
+                    shells = self.shell_instances()
+                with self._phase('volume_model'):
+                    return volmdlr.core.VolumeModel(shells)
+            shell_nodes = self.entities_ids(STEP_SHELLS)
+            if processes > 1:
+                with self._phase('parallel_instantiation'):
+                    shells = self._instanciate_shells_parallel(shell_nodes,
+                                                               processes)
+            else:
+                shells = self._instanciate_shells(shell_nodes, {})
+            with self._phase('volume_model'):
+                return volmdlr.core.VolumeModel(shells)
+
+    def _instanciate_shells_parallel(self, shell_ids, processes):
+        subgraphs = self.independent_subgraphs(shell_ids)
+        orders = []
+        functions = []
+        groups_shell_ids = []
+        for order, group_shell_ids in subgraphs:
+            orders.append(order)
+            functions.append({node: self.functions[node] for node in order})
+            groups_shell_ids.append(group_shell_ids)
+
+        shells = {}
+        chunksize = max(1, len(subgraphs) // (4 * processes))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for group_shell_ids, group_shells in zip(
+                    groups_shell_ids,
+                    executor.map(instanciate_step_subgraph, functions, orders,
+                                 groups_shell_ids,
+                                 itertools.repeat(self.merge_tolerance),
+                                 chunksize=chunksize)):
+                shells.update(zip(group_shell_ids, group_shells))
+        return [shells[shell_id] for shell_id in shell_ids]
+
+    def _referrers(self):
+        """
+        Ids of the entities referencing each entity
+        """
+        referrers = {}
+        for referrer_id, referenced_id in self.all_connections:
+            referrers.setdefault(referenced_id, []).append(referrer_id)
+        return referrers
+
+    def _representation_placements(self, referrers):
+        """
+        Placements of representations in other ones, from representation
+        relationships and mapped items
+
+        :returns: A dict giving for a representation id a list of
+            (parent representation id, (frame_from id, frame_to id) or None
+            for the identity)
+        """
+        self.create_index()
+        links = {}
+        for relationship_id in self.names_index.get(
+                'SHAPE_REPRESENTATION_RELATIONSHIP', []):
+            arguments = self.functions[relationship_id].arg
+            parent_id, child_id = int(arguments[2][1:]), int(arguments[3][1:])
+            links.setdefault(child_id, []).append((parent_id, None))
+
+        for relationship_id in self.names_index.get(STEP_FRAME_MAPPING, []):
+            arguments = self.functions[relationship_id].arg
+            child_id, parent_id = int(arguments[2][1:]), int(arguments[3][1:])
+            transformation = self.functions[int(arguments[4][1:])]
+            if transformation.name != 'ITEM_DEFINED_TRANSFORMATION':
+                raise NotImplementedError(
+                    'Transformation {} not handled'.format(transformation.name))
+            links.setdefault(child_id, []).append(
+                (parent_id, (int(transformation.arg[2][1:]),
+                             int(transformation.arg[3][1:]))))
+
+        for mapped_item_id in self.names_index.get('MAPPED_ITEM', []):
+            arguments = self.functions[mapped_item_id].arg
+            representation_map = self.functions[int(arguments[1][1:])]
+            target = self.functions[int(arguments[2][1:])]
+            if target.name != 'AXIS2_PLACEMENT_3D':
+                raise NotImplementedError(
+                    'Mapped item target {} not handled'.format(target.name))
+            child_id = int(representation_map.arg[1][1:])
+            placement = (int(representation_map.arg[0][1:]), target.id)
+            for parent_id in referrers.get(mapped_item_id, []):
+                if self.functions[parent_id].name.endswith(
+                        'SHAPE_REPRESENTATION'):
+                    links.setdefault(child_id, []).append(
+                        (parent_id, placement))
+        return links
+
+    def _shell_representations(self, shell_id, referrers):
+        """
+        Ids of the representations containing a shell
+        """
+        representations = []
+        nodes = [shell_id]
+        visited = set(nodes)
+        while nodes:
+            node = nodes.pop()
+            for referrer_id in referrers.get(node, []):
+                if referrer_id in visited:
+                    continue
+                visited.add(referrer_id)
+                name = self.functions[referrer_id].name
+                if name.endswith('SHAPE_REPRESENTATION'):
+                    representations.append(referrer_id)
+                elif name in STEP_SHELL_CONTAINERS:
+                    nodes.append(referrer_id)
+        return representations
+
+    def shells_placements(self, shell_ids=None, object_dict=None):
+        """
+        Placements of shells in the whole model, without instantiating nor
+        moving them. A shell used by several instances of a part (repeated
+        representation relationships, mapped items) has several placements.
+
+        :param shell_ids: Ids of the shells, all the shells by default
+        :param object_dict: A dict in which the frames are instantiated
+        :returns: A dict giving for each shell id a list of volmdlr.Frame3D
+            (to be used as in shell.frame_mapping(frame, 'old'))
+        """
+        if shell_ids is None:
+            shell_ids = self.entities_ids(STEP_SHELLS)
+        if object_dict is None:
+            object_dict = {}
+        referrers = self._referrers()
+        links = self._representation_placements(referrers)
+
+        frame_ids = {frame_id for representation_links in links.values()
+                     for _, frames in representation_links if frames
+                     for frame_id in frames}
+        self.instanciate_entities(
+            self.dependencies.topological_order(sorted(frame_ids)),
+            object_dict)
+
+        placements = {}
+
+        def representation_placements(representation_id, visiting):
+            if representation_id in placements:
+                return placements[representation_id]
+            if representation_id in visiting:
+                raise ValueError('Cyclic representation relationships '
+                                 'with #{}'.format(representation_id))
+            visiting.add(representation_id)
+            frames = []
+            for parent_id, frame_ids in links.get(representation_id, []):
+                frame = None
+                if frame_ids is not None:
+                    frame = step_frames_transformation(
+                        object_dict[frame_ids[0]], object_dict[frame_ids[1]])
+                for parent_frame in representation_placements(parent_id,
+                                                              visiting):
+                    frames.append(step_frames_composition(parent_frame,
+                                                          frame))
+            visiting.remove(representation_id)
+            if not frames:
+                frames = [None]
+            placements[representation_id] = frames
+            return frames
+
+        shells_frames = {}
+        for shell_id in shell_ids:
+            frames = []
+            for representation_id in self._shell_representations(shell_id,
+                                                                 referrers):
+                frames.extend(representation_placements(representation_id,
+                                                        set()))
+            if not frames:
+                frames = [None]
+            shells_frames[shell_id] = [volmdlr.OXYZ.copy() if frame is None
+                                       else frame for frame in frames]
+        return shells_frames
+
+    def shell_instances(self):
+        """
+        Instantiate each shell of the file once, in its own coordinates, with
+        the frames of its instances. Memory and time depend on the number of
+        distinct parts, not on the number of instances.
+
+        :returns: A list of volmdlr.faces.ShellInstances3D
+        """
+        shell_ids = self.entities_ids(STEP_SHELLS)
+        object_dict = {}
+        placements = self.shells_placements(shell_ids, object_dict)
+        self.instanciate_entities(
+            self.dependencies.topological_order(shell_ids), object_dict)
+        return [volmdlr.faces.ShellInstances3D(object_dict[shell_id],
+                                               placements[shell_id],
+                                               name=object_dict[shell_id].name)
+                for shell_id in shell_ids]
+
+    def cartesian_points(self, bounding_box=None):
+        """
+        Coordinates of the 3D cartesian points of the file, parsed directly
+        into a (N, 3) array, in meters
 
-        return volmdlr.core.VolumeModel(shells)
+        :param bounding_box: If given, only the points inside this
+            volmdlr.core.BoundingBox are kept
+        """
+        coordinates = [function.arg[1][1:-1]
+                       for function in self.functions.values()
+                       if function.name == 'CARTESIAN_POINT'
+                       and function.arg[1].count(',') == 2]
+        if not coordinates:
+            return npy.empty((0, 3))
+        points = npy.fromstring(','.join(coordinates), sep=',')
+        points = points.reshape(-1, 3) / 1000
+        if bounding_box is not None:
+            inside = ((points[:, 0] >= bounding_box.xmin)
+                      & (points[:, 0] <= bounding_box.xmax)
+                      & (points[:, 1] >= bounding_box.ymin)
+                      & (points[:, 1] <= bounding_box.ymax)
+                      & (points[:, 2] >= bounding_box.zmin)
+                      & (points[:, 2] <= bounding_box.zmax))
+            points = points[inside]
+        return points
+
+    def to_scatter_volume_model(self, name, vectorized=False,
+                                bounding_box=None):
+        """
+        :param vectorized: If True, the points are returned in a single
+            volmdlr.primitives3d.PointCloud3D instead of a volmdlr.Point3D
+            per CARTESIAN_POINT
+        :param bounding_box: Only with vectorized, keep only the points
+            inside this volmdlr.core.BoundingBox
+        """
+        if vectorized:
+            cloud = volmdlr.primitives3d.PointCloud3D(
+                self.cartesian_points(bounding_box), name=name)
+            return volmdlr.core.VolumeModel([cloud], name=name)
 
-    def to_scatter_volume_model(self, name):
         object_dict = {}
         points3d = []
         for stepfunction in self.functions.values():
@@ -517,7 +1597,23 @@ class Step:
                                  in self.functions.values()
                                  if stepfunction.name == 'CARTESIAN_POINT'
                                  or stepfunction.name == 'DIRECTION'])
-        return [plot_data.graph.NetworkxGraph(graph=graph)]
+        return [plot_data_graph.NetworkxGraph(graph=graph)]
+
+
+def instanciate_step_subgraph(functions, entity_ids, shell_ids,
+                              merge_tolerance=None):
+    """
+    Instantiate the shells of a subgraph of a STEP file. Used as a worker
+    of Step.to_volume_model in other processes.
+
+    :param functions: The StepFunctions of the subgraph by id
+    :param entity_ids: Ids of the entities in instantiation order
+    """
+    step = Step.from_functions(functions, [],
+                               merge_tolerance=merge_tolerance)
+    object_dict = {}
+    step.instanciate_entities(entity_ids, object_dict)
+    return [object_dict[shell_id] for shell_id in shell_ids]
 
 
 STEP_TO_VOLMDLR = {
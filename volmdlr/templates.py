@@ -1,6 +1,5 @@
 
 import os
-import pkg_resources
 from string import Template
 
 
@@ -32,7 +31,7 @@ babylon_unpacker_cdn_header = '''
 </head>
 '''
 
-babylon_unpacker_embedded_header = '''
+_babylon_unpacker_embedded_start = '''
 <!doctype html>
 <html>
 <head>
@@ -55,18 +54,30 @@ babylon_unpacker_embedded_header = '''
    <script>
    '''
 
-for filename in ['babylon.js', 'babylonjs.loaders.min.js', 'earcut.min.js', 'pep.js']:
-    with pkg_resources.resource_stream(
-            pkg_resources.Requirement('volmdlr'),
-            os.path.join('volmdlr/assets/js/', filename)) as fjs:
-        babylon_unpacker_embedded_header += fjs.read().decode('utf-8')
-
-babylon_unpacker_embedded_header += '''
+_babylon_unpacker_embedded_end = '''
       </script>
 </head>
 '''
 
 
+def __getattr__(name):
+    # The embedded header holds several MB of javascript: it is read at
+    # first use rather than at import
+    if name != 'babylon_unpacker_embedded_header':
+        raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
+    import pkg_resources
+    header = _babylon_unpacker_embedded_start
+    for filename in ['babylon.js', 'babylonjs.loaders.min.js', 'earcut.min.js', 'pep.js']:
+        with pkg_resources.resource_stream(
+                pkg_resources.Requirement('volmdlr'),
+                os.path.join('volmdlr/assets/js/', filename)) as fjs:
+            header += fjs.read().decode('utf-8')
+    header += _babylon_unpacker_embedded_end
+    globals()[name] = header
+    return header
+
+
 babylon_unpacker_body_template = Template(
 '''
 <body>
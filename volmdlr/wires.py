@@ -7,9 +7,6 @@ Script checking offset and Curvilinear absissa of roundedline2D
 import math
 from typing import List
 import numpy as npy
-import matplotlib.pyplot as plt
-import matplotlib.patches
-from mpl_toolkits.mplot3d import Axes3D
 from typing import List
 
 import volmdlr
@@ -18,16 +15,44 @@ import volmdlr.core
 # import volmdlr.plot_data
 from volmdlr.core_compiled import (
                             LineSegment2DPointDistance,
-                            polygon_point_belongs, Matrix22
+                            polygon_point_belongs, polygon_points_belong,
+                            Matrix22
                             )
 import volmdlr.edges
+import volmdlr.display
+import volmdlr.parallel
 import volmdlr.geometry as vmgeo
 import itertools
 from typing import List, Tuple,Dict
-from scipy.spatial import Delaunay
-import plot_data.core as plot_data
+from volmdlr.lazy import lazy_module
 
-import plot_data.core as plot_data
+plt = lazy_module('matplotlib.pyplot')
+patches = lazy_module('matplotlib.patches')
+mplot3d = lazy_module('mpl_toolkits.mplot3d')
+spatial = lazy_module('scipy.spatial')
+plot_data = lazy_module('plot_data.core')
+
+
+def points_2d_array(points):
+    """
+    The (N, 2) array of a list of Point2D, of a Points2D or of an array-like
+    """
+    if isinstance(points, volmdlr.Points2D):
+        return points.array
+    if len(points) and isinstance(points[0], volmdlr.Vector2D):
+        return volmdlr.Points2D.from_points(points).array
+    return npy.asarray(points, dtype=float).reshape(-1, 2)
+
+
+def points_3d_array(points):
+    """
+    The (N, 3) array of a list of Point3D, of a Points3D or of an array-like
+    """
+    if isinstance(points, volmdlr.Points3D):
+        return points.array
+    if len(points) and isinstance(points[0], volmdlr.Vector3D):
+        return volmdlr.Points3D.from_points(points).array
+    return npy.asarray(points, dtype=float).reshape(-1, 3)
 
 
 class Wire:
@@ -399,6 +424,31 @@ class Contour2D(Contour, Wire2D):
                 return True
         return False
 
+    def points_belong(self, points):
+        """
+        Batch version of point_belongs
+
+        :param points: A list of Point2D, a Points2D or an (N, 2) array
+        :returns: A boolean array
+        """
+        array = points_2d_array(points)
+        mask = self.polygon.points_belong(array)
+        for arcs, inside in ((self.external_arcs, True),
+                             (self.internal_arcs, False)):
+            for arc in arcs:
+                # Only the points in the bounding square of the arc circle
+                # (with a margin for the tolerance of point_belongs) are
+                # tested one by one
+                half_side = arc.radius + 1e-6
+                candidates = npy.flatnonzero(
+                    (npy.abs(array[:, 0] - arc.center.x) <= half_side)
+                    & (npy.abs(array[:, 1] - arc.center.y) <= half_side)
+                    & (mask != inside))
+                for index in candidates:
+                    if arc.point_belongs(volmdlr.Point2D(*array[index])):
+                        mask[index] = inside
+        return mask
+
     def point_distance(self, point):
         min_distance = self.primitives[0].point_distance(point)
         for primitive in self.primitives[1:]:
@@ -474,7 +524,7 @@ class Contour2D(Contour, Wire2D):
 
         return A
 
-    def plot_data(self, edge_style: plot_data.EdgeStyle = None, surface_style:plot_data.SurfaceStyle = None):
+    def plot_data(self, edge_style: 'plot_data.EdgeStyle' = None, surface_style:'plot_data.SurfaceStyle' = None):
         plot_data_primitives = [item.plot_data() for item in self.primitives]
         return plot_data.Contour2D(plot_data_primitives=plot_data_primitives,
                                            edge_style=edge_style,
@@ -557,10 +607,13 @@ class Contour2D(Contour, Wire2D):
 
     def random_point_inside(self):
         xmin, xmax, ymin, ymax = self.bounding_rectangle()
-        for i in range(1000):
-            p = volmdlr.Point2D.random(xmin, xmax, ymin, ymax)
-            if self.point_belongs(p):
-                return p
+        # Candidates are drawn and tested by batches
+        for _ in range(20):
+            points = [volmdlr.Point2D.random(xmin, xmax, ymin, ymax)
+                      for _ in range(50)]
+            inside = npy.flatnonzero(self.points_belong(points))
+            if inside.size:
+                return points[inside[0]]
     # def line_intersections(self, line:Line2D) -> List[Tuple[volmdlr.Point2D, Primitive2D]]:
     #     """
     #     Returns a list of points and lines of intersection with the contour
@@ -781,7 +834,7 @@ class Contour2D(Contour, Wire2D):
             return self.polygon.points, [(0, 1, 2), (0, 2, 3)]
 
         # Use delaunay triangulation
-        tri = Delaunay([p.vector for p in self.polygon.points])
+        tri = spatial.Delaunay([p.vector for p in self.polygon.points])
         indices = tri.simplices
         return self.polygon.points, tri.simplices
 
@@ -852,39 +905,27 @@ class Contour2D(Contour, Wire2D):
         x = [xmin + i * dx / n for i in range(n + 1)]
         y = [ymin + i * dy / m for i in range(m + 1)]
 
-        point_is_inside = {}
-        point_index = {}
-        ip = 0
-        points = []
-        triangles = []
-        for xi in x:
-            for yi in y:
-                p = volmdlr.Point2D(xi, yi)
-                if self.point_belongs(p):
-                    point_index[p] = ip
-                    points.append(p)
-                    ip += 1
+        grid = npy.array([(xi, yi) for xi in x for yi in y])
+        inside = self.points_belong(grid)
+        # Index of the grid points in the mesh, -1 outside the contour
+        point_index = npy.full(inside.shape, -1, dtype=int)
+        point_index[inside] = npy.arange(npy.count_nonzero(inside))
+        point_index = point_index.reshape(n + 1, m + 1).tolist()
+        points = [volmdlr.Point2D(xi, yi) for xi, yi in grid[inside].tolist()]
 
+        triangles = []
         for i in range(n):
             for j in range(m):
-                p1 = volmdlr.Point2D(x[i], y[j])
-                p2 = volmdlr.Point2D(x[i + 1], y[j])
-                p3 = volmdlr.Point2D(x[i + 1], y[j + 1])
-                p4 = volmdlr.Point2D(x[i], y[j + 1])
-                points_in = []
-                for p in [p1, p2, p3, p4]:
-                    if p in point_index:
-                        points_in.append(p)
-                if len(points_in) == 4:
-                    triangles.append(
-                        [point_index[p1], point_index[p2], point_index[p3]])
-                    triangles.append(
-                        [point_index[p1], point_index[p3], point_index[p4]])
-
-                elif len(points_in) == 3:
-                    triangles.append([point_index[p] for p in points_in])
+                quad = [point_index[i][j], point_index[i + 1][j],
+                        point_index[i + 1][j + 1], point_index[i][j + 1]]
+                indices = [index for index in quad if index != -1]
+                if len(indices) == 4:
+                    triangles.append([quad[0], quad[1], quad[2]])
+                    triangles.append([quad[0], quad[2], quad[3]])
+                elif len(indices) == 3:
+                    triangles.append(indices)
 
-        return volmdlr.display_mesh.DisplayMesh2D(points, triangles)
+        return volmdlr.display.DisplayMesh2D(points, triangles)
 
 
 
@@ -946,6 +987,17 @@ class ClosedPolygon2D(Contour2D):
         return polygon_point_belongs((point.x, point.y),
                                      [(p.x, p.y) for p in self.points])
 
+    def points_belong(self, points):
+        """
+        Batch version of point_belongs
+
+        :param points: A list of Point2D, a Points2D or an (N, 2) array
+        :returns: A boolean array
+        """
+        return volmdlr.parallel.map_batches(polygon_points_belong,
+                                            points_2d_array(points),
+                                            [(p.x, p.y) for p in self.points])
+
     def second_moment_area(self, point):
         Ix, Iy, Ixy = 0, 0, 0
         for pi, pj in zip(self.points, self.points[1:] + [self.points[0]]):
@@ -1016,7 +1068,7 @@ class ClosedPolygon2D(Contour2D):
             
         delaunay=npy.array(new_points)  
         
-        tri=Delaunay(delaunay)
+        tri=spatial.Delaunay(delaunay)
         
 
       
@@ -1744,6 +1796,11 @@ class Circle2D(Contour2D):
     def point_belongs(self, point, tolerance=1e-9):
         return point.point_distance(self.center) <= self.radius + tolerance
 
+    def points_belong(self, points, tolerance=1e-9):
+        distances = volmdlr.Points2D(points_2d_array(points)).point_distance(
+            self.center)
+        return distances <= self.radius + tolerance
+
     def border_points(self):
         start=self.center-self.radius*volmdlr.Point2D(1,0)
         end=self.center+self.radius*volmdlr.Point2D(1,0)
@@ -1837,7 +1894,7 @@ class Circle2D(Contour2D):
         # else:
         #     fig = ax.figure
         if self.radius > 0:
-            ax.add_patch(matplotlib.patches.Arc((self.center.x, self.center.y),
+            ax.add_patch(patches.Arc((self.center.x, self.center.y),
                              2 * self.radius,
                              2 * self.radius,
                              angle=0,
@@ -1902,7 +1959,7 @@ class Circle2D(Contour2D):
         center = 2 * point - self.center
         return Circle2D(center, self.radius)
 
-    def plot_data(self, edge_style:plot_data.EdgeStyle=None, surface_style:plot_data.SurfaceStyle=None):
+    def plot_data(self, edge_style:'plot_data.EdgeStyle'=None, surface_style:'plot_data.SurfaceStyle'=None):
         return plot_data.Circle2D(cx=self.center.x,
                                           cy=self.center.y,
                                           r=self.radius,
@@ -2130,7 +2187,7 @@ class Contour3D(Contour, Wire3D):
 
     def plot(self, ax=None, color='k', alpha=1, edge_details=False):
         if ax is None:
-            ax = Axes3D(plt.figure())
+            ax = mplot3d.Axes3D(plt.figure())
 
         for edge in self.primitives:
             edge.plot(ax=ax, color=color, alpha=alpha,
@@ -2229,7 +2286,7 @@ class Circle3D(Contour3D):
     def plot(self, ax=None, color='k', alpha=1):
         if ax is None:
             fig = plt.figure()
-            ax = Axes3D(fig)
+            ax = mplot3d.Axes3D(fig)
         else:
             fig = None
 
@@ -2491,7 +2548,7 @@ class Ellipse3D(Contour3D):
     def plot(self, ax=None, color='k'):
         if ax is None:
             fig = plt.figure()
-            ax = Axes3D(fig)
+            ax = mplot3d.Axes3D(fig)
         else:
             fig = None
 